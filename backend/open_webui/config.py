@@ -4,6 +4,8 @@ import os
 import shutil
 import base64
 import redis
+import threading
+import time
 
 from datetime import datetime
 from pathlib import Path
@@ -256,8 +258,23 @@ class PersistentConfig(Generic[T]):
 
 
 class AppConfig:
+    """
+    Values are read from the local PersistentConfig state. With Redis, writes are
+    stored under open-webui:config:<key>, bump a version counter and are published
+    so the other nodes update their state, without a Redis call per read.
+
+    A node catches up with a full read of all keys when it (re)subscribes or
+    receives a version out of sequence.
+    """
+
     _state: dict[str, PersistentConfig]
     _redis: Optional[redis.Redis] = None
+    _version: int = 0
+    _synced: bool = True
+
+    _prefix = "open-webui:config:"
+    _channel = "open-webui:config:updates"
+    _version_key = "open-webui:config-version"
 
     def __init__(
         self, redis_url: Optional[str] = None, redis_sentinels: Optional[list] = []
@@ -268,40 +285,110 @@ class AppConfig:
                 "_redis",
                 get_redis_connection(redis_url, redis_sentinels, decode_responses=True),
             )
+            threading.Thread(target=self._listen, daemon=True).start()
 
     def __setattr__(self, key, value):
         if isinstance(value, PersistentConfig):
             self._state[key] = value
+            # Keys are registered after the listener started, read them once
+            super().__setattr__("_synced", False)
         else:
             self._state[key].value = value
             self._state[key].save()
 
             if self._redis:
-                redis_key = f"open-webui:config:{key}"
-                self._redis.set(redis_key, json.dumps(self._state[key].value))
+                self._publish(key, self._state[key].value)
 
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
-        if self._redis:
-            redis_key = f"open-webui:config:{key}"
-            redis_value = self._redis.get(redis_key)
+        if self._redis and not self._synced:
+            self._sync()
 
-            if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
+        return self._state[key].value
 
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
+    def _publish(self, key: str, value):
+        try:
+            encoded_value = json.dumps(value)
 
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+            pipe = self._redis.pipeline()
+            pipe.set(f"{self._prefix}{key}", encoded_value)
+            pipe.incr(self._version_key)
+            version = pipe.execute()[-1]
 
-        return self._state[key].value
+            self._redis.publish(
+                self._channel,
+                json.dumps({"key": key, "value": value, "version": version}),
+            )
+        except Exception as e:
+            log.error(f"Error publishing config {key} to Redis: {e}")
+
+    def _set_value(self, key: str, value):
+        if key in self._state and self._state[key].value != value:
+            self._state[key].value = value
+            log.info(f"Updated {key} from Redis: {value}")
+
+    def _sync(self):
+        # Flag first, so keys registered while reading trigger another sync
+        super().__setattr__("_synced", True)
+        keys = list(self._state.keys())
+
+        try:
+            pipe = self._redis.pipeline()
+            pipe.get(self._version_key)
+            pipe.mget([f"{self._prefix}{key}" for key in keys])
+            version, values = pipe.execute()
+        except Exception as e:
+            log.error(f"Error reading config from Redis: {e}")
+            super().__setattr__("_synced", False)
+            return
+
+        for key, value in zip(keys, values):
+            if value is None:
+                continue
+            try:
+                self._set_value(key, json.loads(value))
+            except json.JSONDecodeError:
+                log.error(f"Invalid JSON format in Redis for {key}: {value}")
+
+        super().__setattr__("_version", int(version or 0))
+
+    def _handle_message(self, message: dict):
+        try:
+            data = json.loads(message["data"])
+        except (json.JSONDecodeError, TypeError):
+            log.error(f"Invalid config update message: {message['data']}")
+            return
+
+        version = data.get("version", 0)
+        if version <= self._version:
+            # Already read by a full sync
+            return
+
+        if version != self._version + 1:
+            # Missed an update, read everything again
+            self._sync()
+            return
+
+        self._set_value(data.get("key"), data.get("value"))
+        super().__setattr__("_version", version)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+
+                # Updates published before subscribing were missed
+                self._sync()
+
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._handle_message(message)
+            except Exception as e:
+                log.warning(f"Config update subscription lost, retrying: {e}")
+                time.sleep(1)
 
 
 ####################################
@@ -761,6 +848,15 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# Bytes of files from remote storage kept locally, least recently used first evicted
+STORAGE_CACHE_MAX_SIZE = int(
+    os.environ.get("STORAGE_CACHE_MAX_SIZE", str(10 * 1024 * 1024 * 1024))
+)
+# Seconds a cached file is used before checking it still matches the remote one
+STORAGE_CACHE_VALIDATE_INTERVAL = int(
+    os.environ.get("STORAGE_CACHE_VALIDATE_INTERVAL", "60")
+)
+
 ####################################
 # File Upload DIR
 ####################################
@@ -1824,6 +1920,12 @@ ENABLE_RAG_HYBRID_SEARCH = PersistentConfig(
     os.environ.get("ENABLE_RAG_HYBRID_SEARCH", "").lower() == "true",
 )
 
+# Persistent per-collection BM25 index used by hybrid search, rebuilt lazily from the vector DB
+ENABLE_RAG_BM25_INDEX = (
+    os.environ.get("ENABLE_RAG_BM25_INDEX", "True").lower() == "true"
+)
+RAG_BM25_INDEX_DIR = os.environ.get("RAG_BM25_INDEX_DIR", f"{CACHE_DIR}/bm25")
+
 RAG_FULL_CONTEXT = PersistentConfig(
     "RAG_FULL_CONTEXT",
     "rag.full_context",
@@ -1887,6 +1989,12 @@ RAG_EMBEDDING_BATCH_SIZE = PersistentConfig(
     ),
 )
 
+# Embedding batches sent to ollama/openai at the same time, failed batches are retried with backoff
+RAG_EMBEDDING_MAX_IN_FLIGHT = int(os.environ.get("RAG_EMBEDDING_MAX_IN_FLIGHT", "4"))
+RAG_EMBEDDING_BATCH_MAX_RETRIES = int(
+    os.environ.get("RAG_EMBEDDING_BATCH_MAX_RETRIES", "3")
+)
+
 RAG_EMBEDDING_QUERY_PREFIX = os.environ.get("RAG_EMBEDDING_QUERY_PREFIX", None)
 
 RAG_EMBEDDING_CONTENT_PREFIX = os.environ.get("RAG_EMBEDDING_CONTENT_PREFIX", None)
@@ -1895,6 +2003,19 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+# Cache of computed embeddings keyed by engine, model, prefix and text
+# "memory" (in-process LRU), "disk" (SQLite file), "redis" or "" to disable
+RAG_EMBEDDING_CACHE_TYPE = os.environ.get("RAG_EMBEDDING_CACHE_TYPE", "memory").lower()
+RAG_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("RAG_EMBEDDING_CACHE_MAX_ENTRIES", "10000")
+)
+RAG_EMBEDDING_CACHE_DIR = os.environ.get(
+    "RAG_EMBEDDING_CACHE_DIR", f"{CACHE_DIR}/embeddings"
+)
+RAG_EMBEDDING_CACHE_REDIS_URL = os.environ.get(
+    "RAG_EMBEDDING_CACHE_REDIS_URL", REDIS_URL
+)
+
 RAG_RERANKING_MODEL = PersistentConfig(
     "RAG_RERANKING_MODEL",
     "rag.reranking_model",
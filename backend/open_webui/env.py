@@ -318,6 +318,57 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Seconds streamed message updates are coalesced for before being written, 0 writes through
+CHAT_MESSAGE_WRITE_BUFFER_INTERVAL = os.environ.get(
+    "CHAT_MESSAGE_WRITE_BUFFER_INTERVAL", "1"
+)
+
+try:
+    CHAT_MESSAGE_WRITE_BUFFER_INTERVAL = float(CHAT_MESSAGE_WRITE_BUFFER_INTERVAL)
+except Exception:
+    CHAT_MESSAGE_WRITE_BUFFER_INTERVAL = 1.0
+
+# Seconds between full content snapshots sent to clients receiving delta chat:completion events
+CHAT_COMPLETION_SNAPSHOT_INTERVAL = os.environ.get(
+    "CHAT_COMPLETION_SNAPSHOT_INTERVAL", "5"
+)
+
+try:
+    CHAT_COMPLETION_SNAPSHOT_INTERVAL = float(CHAT_COMPLETION_SNAPSHOT_INTERVAL)
+except Exception:
+    CHAT_COMPLETION_SNAPSHOT_INTERVAL = 5.0
+
+# Seconds streamed chat:completion events of a message are batched for before being emitted,
+# 0 emits every event
+CHAT_COMPLETION_EMIT_COALESCE_INTERVAL = os.environ.get(
+    "CHAT_COMPLETION_EMIT_COALESCE_INTERVAL", "0.04"
+)
+
+try:
+    CHAT_COMPLETION_EMIT_COALESCE_INTERVAL = float(
+        CHAT_COMPLETION_EMIT_COALESCE_INTERVAL
+    )
+except Exception:
+    CHAT_COMPLETION_EMIT_COALESCE_INTERVAL = 0.04
+
+# Events after which a batch is emitted before the interval ends, 0 for no limit
+CHAT_COMPLETION_EMIT_COALESCE_MAX_EVENTS = os.environ.get(
+    "CHAT_COMPLETION_EMIT_COALESCE_MAX_EVENTS", "0"
+)
+
+try:
+    CHAT_COMPLETION_EMIT_COALESCE_MAX_EVENTS = int(
+        CHAT_COMPLETION_EMIT_COALESCE_MAX_EVENTS
+    )
+except Exception:
+    CHAT_COMPLETION_EMIT_COALESCE_MAX_EVENTS = 0
+
+# Mirror chat messages into the normalized `chat_message` table and read them from there,
+# rows are backfilled from the chat JSON the first time a chat is read
+ENABLE_CHAT_MESSAGE_TABLE = (
+    os.environ.get("ENABLE_CHAT_MESSAGE_TABLE", "False").lower() == "true"
+)
+
 ####################################
 # REDIS
 ####################################
@@ -399,6 +450,24 @@ WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Seconds the sessions of an instance stay online in Redis after it stops refreshing them
+WEBSOCKET_PRESENCE_TTL = os.environ.get("WEBSOCKET_PRESENCE_TTL", "60")
+
+try:
+    WEBSOCKET_PRESENCE_TTL = int(WEBSOCKET_PRESENCE_TTL)
+except Exception:
+    WEBSOCKET_PRESENCE_TTL = 60
+
+# Seconds users going online and offline are batched for before being broadcast
+WEBSOCKET_PRESENCE_BROADCAST_INTERVAL = os.environ.get(
+    "WEBSOCKET_PRESENCE_BROADCAST_INTERVAL", "1"
+)
+
+try:
+    WEBSOCKET_PRESENCE_BROADCAST_INTERVAL = float(WEBSOCKET_PRESENCE_BROADCAST_INTERVAL)
+except Exception:
+    WEBSOCKET_PRESENCE_BROADCAST_INTERVAL = 1.0
+
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
 if AIOHTTP_CLIENT_TIMEOUT == "":
@@ -423,6 +492,134 @@ else:
         AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST = 10
 
 
+MODEL_LIST_CACHE_TTL = os.environ.get("MODEL_LIST_CACHE_TTL", "30")
+
+try:
+    MODEL_LIST_CACHE_TTL = int(MODEL_LIST_CACHE_TTL)
+except Exception:
+    MODEL_LIST_CACHE_TTL = 30
+
+# Seconds users, their groups and permissions are cached for, 0 disables the cache
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "10")
+
+try:
+    USER_CACHE_TTL = float(USER_CACHE_TTL)
+except Exception:
+    USER_CACHE_TTL = 10.0
+
+# Chat generations processed at once by each node, 0 for no limit. Others queue
+TASKS_MAX_CONCURRENT_PER_NODE = os.environ.get("TASKS_MAX_CONCURRENT_PER_NODE", "0")
+
+try:
+    TASKS_MAX_CONCURRENT_PER_NODE = int(TASKS_MAX_CONCURRENT_PER_NODE)
+except Exception:
+    TASKS_MAX_CONCURRENT_PER_NODE = 0
+
+# Chat completions in progress per user, model and upstream, 0 for no limit
+CHAT_ADMISSION_MAX_PER_USER = os.environ.get("CHAT_ADMISSION_MAX_PER_USER", "0")
+
+try:
+    CHAT_ADMISSION_MAX_PER_USER = int(CHAT_ADMISSION_MAX_PER_USER)
+except Exception:
+    CHAT_ADMISSION_MAX_PER_USER = 0
+
+CHAT_ADMISSION_MAX_PER_MODEL = os.environ.get("CHAT_ADMISSION_MAX_PER_MODEL", "0")
+
+try:
+    CHAT_ADMISSION_MAX_PER_MODEL = int(CHAT_ADMISSION_MAX_PER_MODEL)
+except Exception:
+    CHAT_ADMISSION_MAX_PER_MODEL = 0
+
+# Counted per node for models served by several Ollama nodes
+CHAT_ADMISSION_MAX_PER_UPSTREAM = os.environ.get("CHAT_ADMISSION_MAX_PER_UPSTREAM", "0")
+
+try:
+    CHAT_ADMISSION_MAX_PER_UPSTREAM = int(CHAT_ADMISSION_MAX_PER_UPSTREAM)
+except Exception:
+    CHAT_ADMISSION_MAX_PER_UPSTREAM = 0
+
+# Requests a user can have waiting for a slot, 0 for no limit
+CHAT_ADMISSION_MAX_QUEUE_PER_USER = os.environ.get(
+    "CHAT_ADMISSION_MAX_QUEUE_PER_USER", "10"
+)
+
+try:
+    CHAT_ADMISSION_MAX_QUEUE_PER_USER = int(CHAT_ADMISSION_MAX_QUEUE_PER_USER)
+except Exception:
+    CHAT_ADMISSION_MAX_QUEUE_PER_USER = 10
+
+# Seconds a request waits for a slot before being rejected
+CHAT_ADMISSION_QUEUE_TIMEOUT = os.environ.get("CHAT_ADMISSION_QUEUE_TIMEOUT", "120")
+
+try:
+    CHAT_ADMISSION_QUEUE_TIMEOUT = float(CHAT_ADMISSION_QUEUE_TIMEOUT)
+except Exception:
+    CHAT_ADMISSION_QUEUE_TIMEOUT = 120.0
+
+# Streamed chunks passed at once to the filters supporting batches
+STREAM_FILTER_MAX_BATCH = os.environ.get("STREAM_FILTER_MAX_BATCH", "32")
+
+try:
+    STREAM_FILTER_MAX_BATCH = int(STREAM_FILTER_MAX_BATCH)
+except Exception:
+    STREAM_FILTER_MAX_BATCH = 32
+
+# Workers processing uploaded files in this process, 0 leaving the jobs to
+# dedicated workers started with `python -m open_webui.ingestion`
+INGESTION_WORKERS = os.environ.get("INGESTION_WORKERS", "2")
+
+try:
+    INGESTION_WORKERS = int(INGESTION_WORKERS)
+except Exception:
+    INGESTION_WORKERS = 2
+
+INGESTION_MAX_ATTEMPTS = os.environ.get("INGESTION_MAX_ATTEMPTS", "3")
+
+try:
+    INGESTION_MAX_ATTEMPTS = int(INGESTION_MAX_ATTEMPTS)
+except Exception:
+    INGESTION_MAX_ATTEMPTS = 3
+
+# Seconds a job stays claimed by a worker that stopped renewing it
+INGESTION_JOB_LEASE = os.environ.get("INGESTION_JOB_LEASE", "300")
+
+try:
+    INGESTION_JOB_LEASE = int(INGESTION_JOB_LEASE)
+except Exception:
+    INGESTION_JOB_LEASE = 300
+
+INGESTION_POLL_INTERVAL = os.environ.get("INGESTION_POLL_INTERVAL", "1")
+
+try:
+    INGESTION_POLL_INTERVAL = float(INGESTION_POLL_INTERVAL)
+except Exception:
+    INGESTION_POLL_INTERVAL = 1.0
+
+# Files of the knowledge bases embedded at once while reindexing
+KNOWLEDGE_REINDEX_CONCURRENCY = os.environ.get("KNOWLEDGE_REINDEX_CONCURRENCY", "4")
+
+try:
+    KNOWLEDGE_REINDEX_CONCURRENCY = int(KNOWLEDGE_REINDEX_CONCURRENCY)
+except Exception:
+    KNOWLEDGE_REINDEX_CONCURRENCY = 4
+
+# Seconds of audio transcribed per request, long recordings are split on silences
+AUDIO_STT_CHUNK_DURATION = os.environ.get("AUDIO_STT_CHUNK_DURATION", "600")
+
+try:
+    AUDIO_STT_CHUNK_DURATION = int(AUDIO_STT_CHUNK_DURATION)
+except Exception:
+    AUDIO_STT_CHUNK_DURATION = 600
+
+# Chunks of a recording transcribed at once
+AUDIO_STT_CONCURRENCY = os.environ.get("AUDIO_STT_CONCURRENCY", "4")
+
+try:
+    AUDIO_STT_CONCURRENCY = int(AUDIO_STT_CONCURRENCY)
+except Exception:
+    AUDIO_STT_CONCURRENCY = 4
+
+
 AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA = os.environ.get(
     "AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA", "10"
 )
@@ -437,6 +634,62 @@ else:
     except Exception:
         AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA = 10
 
+# Connection pools shared by requests to the same upstream (scheme://host:port)
+AIOHTTP_CLIENT_POOL_LIMIT = os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT", "100")
+
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT = int(AIOHTTP_CLIENT_POOL_LIMIT)
+except Exception:
+    AIOHTTP_CLIENT_POOL_LIMIT = 100
+
+AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL", "300"
+)
+
+try:
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = int(AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL)
+except Exception:
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = 300
+
+AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT", "60"
+)
+
+try:
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT)
+except Exception:
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = 60.0
+
+# How requests for a model are spread over the OLLAMA_BASE_URLS serving it:
+# random, least_in_flight, ewma, affinity (loaded model first) or sticky (per chat)
+OLLAMA_ROUTING_POLICY = os.environ.get(
+    "OLLAMA_ROUTING_POLICY", "least_in_flight"
+).lower()
+
+# Nodes failing this many times in a row are skipped for OLLAMA_ROUTING_EJECTION_TIME seconds
+OLLAMA_ROUTING_EJECTION_THRESHOLD = os.environ.get(
+    "OLLAMA_ROUTING_EJECTION_THRESHOLD", "3"
+)
+
+try:
+    OLLAMA_ROUTING_EJECTION_THRESHOLD = int(OLLAMA_ROUTING_EJECTION_THRESHOLD)
+except Exception:
+    OLLAMA_ROUTING_EJECTION_THRESHOLD = 3
+
+OLLAMA_ROUTING_EJECTION_TIME = os.environ.get("OLLAMA_ROUTING_EJECTION_TIME", "30")
+
+try:
+    OLLAMA_ROUTING_EJECTION_TIME = float(OLLAMA_ROUTING_EJECTION_TIME)
+except Exception:
+    OLLAMA_ROUTING_EJECTION_TIME = 30.0
+
+OLLAMA_ROUTING_STICKY_TTL = os.environ.get("OLLAMA_ROUTING_STICKY_TTL", "1800")
+
+try:
+    OLLAMA_ROUTING_STICKY_TTL = float(OLLAMA_ROUTING_STICKY_TTL)
+except Exception:
+    OLLAMA_ROUTING_STICKY_TTL = 1800.0
+
 ####################################
 # OFFLINE_MODE
 ####################################
@@ -0,0 +1,281 @@
+# ingestion.py
+import asyncio
+import logging
+import time
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    INGESTION_WORKERS,
+    INGESTION_MAX_ATTEMPTS,
+    INGESTION_JOB_LEASE,
+    INGESTION_POLL_INTERVAL,
+    KNOWLEDGE_REINDEX_CONCURRENCY,
+)
+from open_webui.models.files import Files
+from open_webui.models.jobs import IngestionJobModel, IngestionJobs
+from open_webui.models.users import Users
+from open_webui.retrieval.reindex import KnowledgeReindexer
+from open_webui.routers.audio import transcribe
+from open_webui.routers.retrieval import ProcessFileForm, process_file
+from open_webui.socket.main import emit_to_user
+from open_webui.storage.provider import Storage
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Identifies the workers of this process in the claimed jobs
+WORKER_ID = str(uuid4())
+
+# Woken up when a job is enqueued by this process, instead of waiting for the
+# next poll
+wakeup: Optional[asyncio.Event] = None
+wakeup_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def enqueue_job(
+    user_id: str, file_id: Optional[str], type: str
+) -> Optional[IngestionJobModel]:
+    job = IngestionJobs.insert_new_job(user_id, file_id, type)
+    if job and wakeup is not None:
+        wakeup_loop.call_soon_threadsafe(wakeup.set)
+    return job
+
+
+def enqueue_file_job(
+    user_id: str, file_id: str, type: str = "process"
+) -> Optional[IngestionJobModel]:
+    """
+    Queue the processing of an uploaded file, picked up by the next free worker.
+    """
+    return enqueue_job(user_id, file_id, type)
+
+
+def enqueue_reindex_job(user_id: str) -> Optional[IngestionJobModel]:
+    """
+    Queue the reindexing of all the knowledge bases, unless already queued.
+    """
+    job = IngestionJobs.get_latest_job_by_type("reindex")
+    if job and job.status in ["pending", "processing"]:
+        return job
+    return enqueue_job(user_id, None, "reindex")
+
+
+async def emit_job(job: IngestionJobModel):
+    try:
+        await emit_to_user(
+            job.user_id,
+            "file:job",
+            {
+                "id": job.id,
+                "file_id": job.file_id,
+                "status": job.status,
+                "progress": job.progress,
+                "error": job.error,
+                "data": job.data,
+            },
+        )
+    except Exception as e:
+        log.debug(f"Unable to emit job {job.id}: {e}")
+
+
+async def update_job(job: IngestionJobModel, updated: dict):
+    # Jobs reclaimed after the lease expired are no longer updated by this worker
+    job = await asyncio.to_thread(
+        IngestionJobs.update_job_by_id, job.id, updated, WORKER_ID
+    )
+    if job:
+        await emit_job(job)
+    return job
+
+
+def get_request(app: FastAPI) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "app": app,
+            "method": "POST",
+            "path": "/",
+            "headers": [],
+            "query_string": b"",
+        }
+    )
+
+
+async def reindex_knowledge_bases(app: FastAPI, job: IngestionJobModel) -> dict:
+    user = Users.get_user_by_id(job.user_id)
+    if user is None:
+        raise Exception("User not found")
+
+    progress = 0.0
+
+    async def on_progress(done: int, total: int):
+        nonlocal progress
+        # At most one update per percent
+        if total and done / total - progress >= 0.01:
+            progress = done / total
+            await update_job(job, {"progress": round(progress, 2)})
+
+    reindexer = KnowledgeReindexer(
+        get_request(app),
+        user,
+        concurrency=KNOWLEDGE_REINDEX_CONCURRENCY,
+        on_progress=on_progress,
+    )
+    return await reindexer.run()
+
+
+async def process_job(app: FastAPI, job: IngestionJobModel) -> Optional[dict]:
+    if job.type == "reindex":
+        return await reindex_knowledge_bases(app, job)
+
+    user = Users.get_user_by_id(job.user_id)
+    file = Files.get_file_by_id(job.file_id)
+    if user is None or file is None:
+        raise Exception("File not found")
+
+    request = get_request(app)
+
+    if job.type == "transcribe":
+        await update_job(job, {"progress": 0.1})
+        file_path = await asyncio.to_thread(Storage.get_file, file.path)
+
+        loop = asyncio.get_running_loop()
+
+        def on_progress(done: int, total: int, transcript: str):
+            # Streams the transcript of long recordings as their chunks complete
+            asyncio.run_coroutine_threadsafe(
+                update_job(
+                    job,
+                    {
+                        "progress": round(0.1 + 0.4 * done / total, 2),
+                        "data": {"transcript": transcript},
+                    },
+                ),
+                loop,
+            ).result()
+
+        result = await asyncio.to_thread(transcribe, request, file_path, on_progress)
+
+        await update_job(job, {"progress": 0.5})
+        await asyncio.to_thread(
+            process_file,
+            request,
+            ProcessFileForm(file_id=file.id, content=result.get("text", "")),
+            user=user,
+        )
+    else:
+        await update_job(job, {"progress": 0.1})
+        await asyncio.to_thread(
+            process_file, request, ProcessFileForm(file_id=file.id), user=user
+        )
+
+
+async def renew_lease(job: IngestionJobModel):
+    while True:
+        await asyncio.sleep(INGESTION_JOB_LEASE / 3)
+        await asyncio.to_thread(
+            IngestionJobs.update_job_by_id,
+            job.id,
+            {"locked_until": int(time.time()) + INGESTION_JOB_LEASE},
+            WORKER_ID,
+        )
+
+
+async def run_job(app: FastAPI, job: IngestionJobModel):
+    log.info(f"Processing {job.type} job {job.id}, attempt {job.attempts}")
+    await emit_job(job)
+
+    heartbeat = asyncio.create_task(renew_lease(job))
+    try:
+        result = await process_job(app, job)
+    except Exception as e:
+        log.exception(f"Error processing {job.type} job {job.id}: {e}")
+        error = str(e.detail) if hasattr(e, "detail") else str(e)
+
+        if job.attempts < INGESTION_MAX_ATTEMPTS:
+            # Retried later, waiting longer after each attempt
+            await update_job(
+                job,
+                {
+                    "status": "pending",
+                    "error": error,
+                    "worker_id": None,
+                    "available_at": int(time.time()) + 2**job.attempts,
+                },
+            )
+        else:
+            await update_job(
+                job,
+                {
+                    "status": "failed",
+                    "error": error,
+                    "worker_id": None,
+                    "locked_until": None,
+                },
+            )
+        return
+    finally:
+        heartbeat.cancel()
+
+    await update_job(
+        job,
+        {
+            "status": "completed",
+            "progress": 1.0,
+            "error": None,
+            **({"data": result} if result else {}),
+            "worker_id": None,
+            "locked_until": None,
+        },
+    )
+
+
+async def run_ingestion_worker(app: FastAPI):
+    """
+    Process the queued files one at a time, until cancelled.
+    """
+    while True:
+        try:
+            job = await asyncio.to_thread(
+                IngestionJobs.claim_next_job,
+                WORKER_ID,
+                INGESTION_JOB_LEASE,
+                INGESTION_MAX_ATTEMPTS,
+            )
+        except Exception as e:
+            log.warning(f"Unable to claim an ingestion job: {e}")
+            job = None
+
+        if job is not None:
+            await run_job(app, job)
+            continue
+
+        wakeup.clear()
+        try:
+            await asyncio.wait_for(wakeup.wait(), INGESTION_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_ingestion_workers(
+    app: FastAPI, workers: int = INGESTION_WORKERS
+) -> list[asyncio.Task]:
+    global wakeup, wakeup_loop
+
+    wakeup = asyncio.Event()
+    wakeup_loop = asyncio.get_running_loop()
+    return [asyncio.create_task(run_ingestion_worker(app)) for _ in range(workers)]
+
+
+async def main():
+    from open_webui.main import app
+
+    await asyncio.gather(*start_ingestion_workers(app, max(INGESTION_WORKERS, 1)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
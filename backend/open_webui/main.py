@@ -51,6 +51,8 @@ from open_webui.utils.logger import start_logger
 from open_webui.socket.main import (
     app as socket_app,
     periodic_usage_pool_cleanup,
+    periodic_presence_refresh,
+    get_event_emitter,
 )
 from open_webui.routers import (
     audio,
@@ -88,8 +90,10 @@ from open_webui.internal.db import Session, engine
 
 from open_webui.models.functions import Functions
 from open_webui.models.models import Models
+from open_webui.models.jobs import IngestionJobs
 from open_webui.models.users import UserModel, Users
 from open_webui.models.chats import Chats
+from open_webui.storage.cache import STORAGE_CACHE
 
 from open_webui.config import (
     LICENSE_KEY,
@@ -347,6 +351,7 @@ from open_webui.env import (
     OFFLINE_MODE,
     ENABLE_OTEL,
     EXTERNAL_PWA_MANIFEST_URL,
+    INGESTION_WORKERS,
 )
 
 
@@ -361,6 +366,17 @@ from open_webui.utils.chat import (
     chat_action as chat_action_handler,
 )
 from open_webui.utils.middleware import process_chat_payload, process_chat_response
+from open_webui.utils.message_buffer import MESSAGE_WRITE_BUFFER
+from open_webui.utils.session_pool import SESSION_POOL
+from open_webui.utils.emit_coalescer import EMIT_COALESCER
+from open_webui.utils.plugin import PLUGINS
+from open_webui.utils.filter import get_stream_filter_stats
+from open_webui.utils.admission import (
+    CHAT_ADMISSION,
+    AdmissionRejected,
+    get_model_upstreams,
+    release_on_completion,
+)
 from open_webui.utils.access_control import has_access
 
 from open_webui.utils.auth import (
@@ -371,13 +387,18 @@ from open_webui.utils.auth import (
     get_verified_user,
 )
 from open_webui.utils.oauth import OAuthManager
+from open_webui.utils.user_cache import USER_CACHE
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
 
 from open_webui.tasks import (
     list_task_ids_by_chat_id,
     stop_task,
     list_tasks,
+    list_node_stats,
+    periodic_task_refresh,
+    listen_for_task_cancellations,
 )  # Import from tasks.py
+from open_webui.ingestion import start_ingestion_workers
 
 from open_webui.utils.redis import get_sentinels_from_env
 
@@ -433,8 +454,16 @@ async def lifespan(app: FastAPI):
         get_license_data(app, LICENSE_KEY)
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(periodic_presence_refresh())
+    asyncio.create_task(periodic_task_refresh())
+    asyncio.create_task(listen_for_task_cancellations())
+    if INGESTION_WORKERS > 0:
+        start_ingestion_workers(app)
     yield
 
+    await MESSAGE_WRITE_BUFFER.flush_all()
+    await SESSION_POOL.close()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -579,8 +608,9 @@ app.state.AUTH_TRUSTED_NAME_HEADER = WEBUI_AUTH_TRUSTED_NAME_HEADER
 app.state.EXTERNAL_PWA_MANIFEST_URL = EXTERNAL_PWA_MANIFEST_URL
 
 app.state.USER_COUNT = None
-app.state.TOOLS = {}
-app.state.FUNCTIONS = {}
+# Loaded tools and functions, kept by the plugin registry
+app.state.TOOLS = PLUGINS.modules["tool"]
+app.state.FUNCTIONS = PLUGINS.modules["function"]
 
 ########################################
 #
@@ -1071,8 +1101,8 @@ async def chat_completion(
     form_data: dict,
     user=Depends(get_verified_user),
 ):
-    if not request.app.state.MODELS:
-        await get_all_models(request, user=user)
+    # Served from the model catalog, only rebuilt after a model or function write
+    await get_all_models(request, user=user)
 
     model_item = form_data.pop("model_item", {})
     tasks = form_data.pop("background_tasks", None)
@@ -1105,6 +1135,7 @@ async def chat_completion(
             "chat_id": form_data.pop("chat_id", None),
             "message_id": form_data.pop("id", None),
             "session_id": form_data.pop("session_id", None),
+            "stream_delta": form_data.pop("stream_delta", False),
             "tool_ids": form_data.get("tool_ids", None),
             "tool_servers": form_data.pop("tool_servers", None),
             "files": form_data.get("files", None),
@@ -1148,13 +1179,66 @@ async def chat_completion(
             detail=str(e),
         )
 
+    event_emitter = (
+        get_event_emitter(metadata)
+        if metadata.get("chat_id")
+        and metadata.get("message_id")
+        and metadata.get("session_id")
+        else None
+    )
+
+    queued = False
+
+    async def on_queued(position: int):
+        nonlocal queued
+        queued = True
+        if event_emitter:
+            await event_emitter(
+                {
+                    "type": "status",
+                    "data": {
+                        "action": "queue",
+                        "description": "Waiting in queue, position {{position}}",
+                        "position": position,
+                        "done": False,
+                    },
+                }
+            )
+
     try:
+        release = await CHAT_ADMISSION.acquire(
+            user.id,
+            model_id=model["id"],
+            upstreams=(
+                [] if metadata.get("direct") else get_model_upstreams(request, model)
+            ),
+            on_queued=on_queued,
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+        )
+
+    try:
+        if queued and event_emitter:
+            await event_emitter(
+                {
+                    "type": "status",
+                    "data": {"action": "queue", "done": True, "hidden": True},
+                }
+            )
+
         response = await chat_completion_handler(request, form_data, user)
 
-        return await process_chat_response(
-            request, response, form_data, user, metadata, model, events, tasks
+        return release_on_completion(
+            await process_chat_response(
+                request, response, form_data, user, metadata, model, events, tasks
+            ),
+            release,
         )
     except Exception as e:
+        release()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
@@ -1215,7 +1299,12 @@ async def stop_task_endpoint(task_id: str, user=Depends(get_verified_user)):
 
 @app.get("/api/tasks")
 async def list_tasks_endpoint(user=Depends(get_verified_user)):
-    return {"tasks": list_tasks()}
+    return {"tasks": await list_tasks()}
+
+
+@app.get("/api/tasks/nodes")
+async def list_task_nodes_endpoint(user=Depends(get_admin_user)):
+    return {"nodes": await list_node_stats()}
 
 
 @app.get("/api/tasks/chat/{chat_id}")
@@ -1224,7 +1313,7 @@ async def list_tasks_by_chat_id_endpoint(chat_id: str, user=Depends(get_verified
     if chat is None or chat.user_id != user.id:
         return {"task_ids": []}
 
-    task_ids = list_task_ids_by_chat_id(chat_id)
+    task_ids = await list_task_ids_by_chat_id(chat_id)
 
     print(f"Task IDs for chat {chat_id}: {task_ids}")
     return {"task_ids": task_ids}
@@ -1251,7 +1340,7 @@ async def get_app_config(request: Request):
                 detail="Invalid token",
             )
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = USER_CACHE.get_user(data["id"], Users.get_user_by_id)
 
     user_count = Users.get_num_users()
     onboarding = False
@@ -1483,6 +1572,20 @@ async def healthcheck_with_db():
     return {"status": True}
 
 
+@app.get("/health/connections")
+async def healthcheck_connections(user=Depends(get_admin_user)):
+    return {
+        "status": True,
+        "pools": SESSION_POOL.get_stats(),
+        "emits": EMIT_COALESCER.get_stats(),
+        "admission": CHAT_ADMISSION.get_stats(),
+        "plugins": PLUGINS.get_stats(),
+        "stream_filters": get_stream_filter_stats(),
+        "ingestion": IngestionJobs.get_job_stats(),
+        "storage_cache": STORAGE_CACHE.get_stats(),
+    }
+
+
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 app.mount("/cache", StaticFiles(directory=CACHE_DIR), name="cache")
 
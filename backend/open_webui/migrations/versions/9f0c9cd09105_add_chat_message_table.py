@@ -0,0 +1,34 @@
+"""Add chat_message table
+
+Revision ID: 9f0c9cd09105
+Revises: 3781e22d8b01
+Create Date: 2025-03-04 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "9f0c9cd09105"
+down_revision = "3781e22d8b01"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Normalized chat messages, rows are backfilled lazily from `chat.chat`
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.String(), nullable=False),  # Associated chat
+        sa.Column("id", sa.String(), nullable=False),  # Message ID within the chat
+        sa.Column("parent_id", sa.Text(), nullable=True),  # Parent message ID
+        sa.Column("role", sa.Text(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),  # Full message object
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id"),
+    )
+
+
+def downgrade():
+    op.drop_table("chat_message")
@@ -0,0 +1,46 @@
+"""Add ingestion_job table
+
+Revision ID: b2d6e1f0a4c7
+Revises: 9f0c9cd09105
+Create Date: 2025-03-12 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b2d6e1f0a4c7"
+down_revision = "9f0c9cd09105"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Files processed in the background after being uploaded
+    op.create_table(
+        "ingestion_job",
+        sa.Column("id", sa.String(), nullable=False, primary_key=True),
+        sa.Column("user_id", sa.String()),
+        sa.Column("file_id", sa.String()),
+        sa.Column("type", sa.Text()),
+        sa.Column("status", sa.Text()),
+        sa.Column("progress", sa.Float(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("available_at", sa.BigInteger(), nullable=True),
+        sa.Column("worker_id", sa.String(), nullable=True),
+        sa.Column("locked_until", sa.BigInteger(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+    op.create_index(
+        "ingestion_job_status_idx", "ingestion_job", ["status", "available_at"]
+    )
+    op.create_index("ingestion_job_file_id_idx", "ingestion_job", ["file_id"])
+
+
+def downgrade():
+    op.drop_index("ingestion_job_file_id_idx", table_name="ingestion_job")
+    op.drop_index("ingestion_job_status_idx", table_name="ingestion_job")
+    op.drop_table("ingestion_job")
@@ -0,0 +1,34 @@
+"""Add knowledge_index table
+
+Revision ID: c4e8a2b9d1f3
+Revises: b2d6e1f0a4c7
+Create Date: 2025-03-14 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c4e8a2b9d1f3"
+down_revision = "b2d6e1f0a4c7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Vector DB collections of the knowledge bases, and the state of their reindexing
+    op.create_table(
+        "knowledge_index",
+        sa.Column("id", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("collection_name", sa.Text(), nullable=True),
+        sa.Column("config", sa.JSON(), nullable=True),
+        sa.Column("shadow_collection_name", sa.Text(), nullable=True),
+        sa.Column("shadow_config", sa.JSON(), nullable=True),
+        sa.Column("shadow_files", sa.JSON(), nullable=True),
+        sa.Column("failed_files", sa.JSON(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("knowledge_index")
@@ -1,16 +1,18 @@
 import logging
 import json
+import re
 import time
 import uuid
 from typing import Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, ENABLE_CHAT_MESSAGE_TABLE
+from open_webui.utils.misc import get_message_list
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
-from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy import or_, func, select, and_, text, literal
 from sqlalchemy.sql import exists
 
 ####################
@@ -20,6 +22,9 @@ from sqlalchemy.sql import exists
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
+# Keys that can be embedded in a JSON path without quoting issues
+JSON_PATH_KEY_PATTERN = re.compile(r"[\w\-]+")
+
 
 class Chat(Base):
     __tablename__ = "chat"
@@ -40,6 +45,20 @@ class Chat(Base):
     folder_id = Column(Text, nullable=True)
 
 
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    # Normalized copy of `chat.history.messages`, one row per message
+    chat_id = Column(String, primary_key=True)
+    id = Column(String, primary_key=True)
+    parent_id = Column(Text, nullable=True)
+    role = Column(Text, nullable=True)
+    data = Column(JSON)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -104,7 +123,99 @@ class ChatTitleIdResponse(BaseModel):
     created_at: int
 
 
+class ChatHistoryResponse(BaseModel):
+    currentId: Optional[str] = None
+    messages: list[dict]  # active branch, from the root to `currentId`
+
+
+class ChatMessageListResponse(BaseModel):
+    messages: list[dict]
+    total: int
+
+
 class ChatTable:
+    def _get_chat_message_values(self, chat_id: str, message: dict, now: int) -> dict:
+        try:
+            created_at = int(message.get("timestamp") or now)
+        except (TypeError, ValueError):
+            created_at = now
+
+        return {
+            "chat_id": chat_id,
+            "parent_id": message.get("parentId"),
+            "role": message.get("role"),
+            "data": message,
+            "created_at": created_at,
+            "updated_at": now,
+        }
+
+    def _has_chat_messages(self, db, id: str) -> bool:
+        return db.query(exists().where(ChatMessage.chat_id == id)).scalar()
+
+    def _sync_chat_messages(
+        self, db, id: str, chat: dict, message_ids: Optional[list[str]] = None
+    ):
+        """
+        Mirrors `chat.history.messages` into the `chat_message` table, only rows that
+        changed are written. With `message_ids` only those messages are synced, and
+        nothing is written if the chat has not been backfilled yet.
+        """
+        messages = chat.get("history", {}).get("messages", {})
+        if not isinstance(messages, dict):
+            messages = {}
+        now = int(time.time())
+
+        query = db.query(ChatMessage).filter_by(chat_id=id)
+        if message_ids is not None:
+            if not self._has_chat_messages(db, id):
+                return
+            query = query.filter(ChatMessage.id.in_(message_ids))
+        else:
+            message_ids = list(messages.keys())
+
+        existing = {row.id: row for row in query.all()}
+
+        for message_id in message_ids:
+            message = messages.get(message_id)
+            row = existing.pop(message_id, None)
+
+            if message is None:
+                if row is not None:
+                    db.delete(row)
+            elif row is None:
+                db.add(
+                    ChatMessage(
+                        id=message_id,
+                        **self._get_chat_message_values(id, message, now),
+                    )
+                )
+            elif row.data != message:
+                values = self._get_chat_message_values(id, message, now)
+                row.parent_id = values["parent_id"]
+                row.role = values["role"]
+                row.data = values["data"]
+                row.updated_at = now
+
+        # Messages that are no longer part of the chat
+        for row in existing.values():
+            db.delete(row)
+
+    def _ensure_chat_messages(self, db, id: str) -> bool:
+        """
+        Backfills the `chat_message` rows of a chat from its JSON on first read.
+        Returns False if the chat does not exist.
+        """
+        if self._has_chat_messages(db, id):
+            return True
+
+        chat = db.get(Chat, id)
+        if chat is None:
+            return False
+
+        self._sync_chat_messages(db, id, chat.chat)
+        db.commit()
+        return True
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -125,6 +236,8 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            if ENABLE_CHAT_MESSAGE_TABLE:
+                self._sync_chat_messages(db, id, form_data.chat)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
@@ -154,17 +267,23 @@ class ChatTable:
 
             result = Chat(**chat.model_dump())
             db.add(result)
+            if ENABLE_CHAT_MESSAGE_TABLE:
+                self._sync_chat_messages(db, id, form_data.chat)
             db.commit()
             db.refresh(result)
             return ChatModel.model_validate(result) if result else None
 
-    def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
+    def update_chat_by_id(
+        self, id: str, chat: dict, message_ids: Optional[list[str]] = None
+    ) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat_item = db.get(Chat, id)
                 chat_item.chat = chat
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
+                if ENABLE_CHAT_MESSAGE_TABLE:
+                    self._sync_chat_messages(db, id, chat, message_ids)
                 db.commit()
                 db.refresh(chat_item)
 
@@ -203,13 +322,41 @@ class ChatTable:
         return self.get_chat_by_id(id)
 
     def get_chat_title_by_id(self, id: str) -> Optional[str]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            # The title column is kept in sync with `chat.title` on every update
+            result = db.query(Chat.title).filter_by(id=id).first()
+            if result is None:
+                return None
+
+            return result[0] or "New Chat"
+
+    def get_chat_user_id_by_id(self, id: str) -> Optional[str]:
+        with get_db() as db:
+            result = db.query(Chat.user_id).filter_by(id=id).first()
+            return result[0] if result else None
 
-        return chat.chat.get("title", "New Chat")
+    def get_current_message_id_by_id(self, id: str) -> Optional[str]:
+        with get_db() as db:
+            result = (
+                db.query(Chat.chat[("history", "currentId")].as_string())
+                .filter_by(id=id)
+                .first()
+            )
+            return result[0] if result else None
 
     def get_messages_by_chat_id(self, id: str) -> Optional[dict]:
+        if ENABLE_CHAT_MESSAGE_TABLE:
+            with get_db() as db:
+                if not self._ensure_chat_messages(db, id):
+                    return None
+
+                rows = (
+                    db.query(ChatMessage.id, ChatMessage.data)
+                    .filter_by(chat_id=id)
+                    .all()
+                )
+                return {message_id: data for message_id, data in rows}
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
@@ -219,12 +366,116 @@ class ChatTable:
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
+        if ENABLE_CHAT_MESSAGE_TABLE:
+            with get_db() as db:
+                if not self._ensure_chat_messages(db, id):
+                    return None
+
+                row = db.get(ChatMessage, (id, message_id))
+                return row.data if row else {}
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
 
         return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
 
+    def get_message_list_by_id_and_message_id(
+        self, id: str, message_id: str
+    ) -> Optional[list[dict]]:
+        """
+        Returns the branch ending at `message_id`, ordered from the root message.
+        With the `chat_message` table only the messages of the branch are loaded.
+        """
+        if not ENABLE_CHAT_MESSAGE_TABLE:
+            messages = self.get_messages_by_chat_id(id)
+            return get_message_list(messages, message_id) if messages else None
+
+        with get_db() as db:
+            if not self._ensure_chat_messages(db, id):
+                return None
+
+            branch = (
+                select(
+                    ChatMessage.id,
+                    ChatMessage.parent_id,
+                    literal(0).label("depth"),
+                )
+                .where(ChatMessage.chat_id == id, ChatMessage.id == message_id)
+                .cte("branch", recursive=True)
+            )
+            branch = branch.union_all(
+                select(
+                    ChatMessage.id,
+                    ChatMessage.parent_id,
+                    branch.c.depth + 1,
+                ).where(
+                    ChatMessage.chat_id == id,
+                    ChatMessage.id == branch.c.parent_id,
+                )
+            )
+
+            rows = (
+                db.query(ChatMessage.data)
+                .join(
+                    branch,
+                    and_(ChatMessage.chat_id == id, ChatMessage.id == branch.c.id),
+                )
+                .order_by(branch.c.depth.desc())
+                .all()
+            )
+            return [data for (data,) in rows] or None
+
+    def get_chat_history_by_id(self, id: str) -> Optional[ChatHistoryResponse]:
+        current_id = self.get_current_message_id_by_id(id)
+        if current_id is None:
+            if self.get_chat_user_id_by_id(id) is None:
+                return None
+            return ChatHistoryResponse(currentId=None, messages=[])
+
+        return ChatHistoryResponse(
+            currentId=current_id,
+            messages=self.get_message_list_by_id_and_message_id(id, current_id) or [],
+        )
+
+    def get_inactive_messages_by_id(
+        self, id: str, skip: int = 0, limit: int = 50
+    ) -> Optional[ChatMessageListResponse]:
+        """
+        Pages through the messages that are not part of the active branch, oldest first.
+        """
+        history = self.get_chat_history_by_id(id)
+        if history is None:
+            return None
+
+        active_ids = [message["id"] for message in history.messages if "id" in message]
+
+        if ENABLE_CHAT_MESSAGE_TABLE:
+            with get_db() as db:
+                query = db.query(ChatMessage).filter(
+                    ChatMessage.chat_id == id, ChatMessage.id.notin_(active_ids)
+                )
+                total = query.count()
+                rows = (
+                    query.order_by(ChatMessage.created_at, ChatMessage.id)
+                    .offset(skip)
+                    .limit(limit)
+                    .all()
+                )
+                return ChatMessageListResponse(
+                    messages=[row.data for row in rows], total=total
+                )
+
+        messages = [
+            message
+            for message_id, message in (self.get_messages_by_chat_id(id) or {}).items()
+            if message_id not in active_ids
+        ]
+        messages.sort(key=lambda message: message.get("timestamp") or 0)
+        return ChatMessageListResponse(
+            messages=messages[skip : skip + limit], total=len(messages)
+        )
+
     def upsert_message_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
     ) -> Optional[ChatModel]:
@@ -246,7 +497,121 @@ class ChatTable:
         history["currentId"] = message_id
 
         chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return self.update_chat_by_id(id, chat, message_ids=[message_id])
+
+    def update_message_by_id_and_message_id(
+        self, id: str, message_id: str, message: dict
+    ) -> bool:
+        """
+        Merges the given fields into a single message of the chat.
+
+        On SQLite and PostgreSQL the merge runs inside the database, so only the
+        changed message is sent over the wire instead of the full chat JSON.
+        Other dialects fall back to upsert_message_to_chat_by_id_and_message_id.
+        """
+        keys = [message_id, *message.keys()]
+        if all(JSON_PATH_KEY_PATTERN.fullmatch(key) for key in keys):
+            try:
+                with get_db() as db:
+                    dialect_name = db.bind.dialect.name
+                    if dialect_name == "sqlite":
+                        fields = "".join(
+                            f", '$.\"{key}\"', json(:field_{idx})"
+                            for idx, key in enumerate(message.keys())
+                        )
+                        value = text(
+                            f"""
+                            json_set(
+                                chat,
+                                :message_path,
+                                json_set(
+                                    coalesce(json_extract(chat, :message_path), json('{{}}'))
+                                    {fields}
+                                ),
+                                '$.history.currentId',
+                                :message_id
+                            )
+                            """
+                        ).bindparams(
+                            message_path=f'$.history.messages."{message_id}"',
+                            message_id=message_id,
+                            **{
+                                f"field_{idx}": json.dumps(value)
+                                for idx, value in enumerate(message.values())
+                            },
+                        )
+                        condition = text(
+                            "json_type(chat, '$.history.messages') = 'object'"
+                        )
+                    elif dialect_name == "postgresql":
+                        # jsonb || jsonb is a shallow merge, same as {**old, **new}
+                        value = text(
+                            """
+                            jsonb_set(
+                                jsonb_set(
+                                    CAST(chat AS jsonb),
+                                    CAST(:message_path AS text[]),
+                                    COALESCE(
+                                        CAST(chat AS jsonb) #> CAST(:message_path AS text[]),
+                                        CAST('{}' AS jsonb)
+                                    ) || CAST(:message AS jsonb)
+                                ),
+                                CAST('{history,currentId}' AS text[]),
+                                to_jsonb(CAST(:message_id AS text))
+                            )::json
+                            """
+                        ).bindparams(
+                            message_path=f"{{history,messages,{message_id}}}",
+                            message=json.dumps(message),
+                            message_id=message_id,
+                        )
+                        condition = text(
+                            "json_typeof(chat #> '{history,messages}') = 'object'"
+                        )
+                    else:
+                        value = None
+
+                    if value is not None:
+                        updated = (
+                            db.query(Chat)
+                            .filter_by(id=id)
+                            .filter(condition)
+                            .update(
+                                {"chat": value, "updated_at": int(time.time())},
+                                synchronize_session=False,
+                            )
+                        )
+                        if updated and ENABLE_CHAT_MESSAGE_TABLE:
+                            self._merge_chat_message(db, id, message_id, message)
+                        db.commit()
+
+                        if updated:
+                            return True
+            except Exception as e:
+                log.exception(f"Error updating message {message_id} in chat {id}: {e}")
+
+        return (
+            self.upsert_message_to_chat_by_id_and_message_id(id, message_id, message)
+            is not None
+        )
+
+    def _merge_chat_message(self, db, id: str, message_id: str, message: dict):
+        # Same shallow merge as the JSON update, skipped until the chat is backfilled
+        row = db.get(ChatMessage, (id, message_id))
+        if row is None and not self._has_chat_messages(db, id):
+            return
+
+        now = int(time.time())
+        values = self._get_chat_message_values(
+            id, {**(row.data if row else {}), **message}, now
+        )
+        if row is None:
+            db.add(ChatMessage(id=message_id, **values))
+        else:
+            row.parent_id = values["parent_id"]
+            row.role = values["role"]
+            row.data = values["data"]
+            row.updated_at = now
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
@@ -264,7 +629,7 @@ class ChatTable:
             history["messages"][message_id]["statusHistory"] = status_history
 
         chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return self.update_chat_by_id(id, chat, message_ids=[message_id])
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
@@ -311,6 +676,7 @@ class ChatTable:
 
                 shared_chat.title = chat.title
                 shared_chat.chat = chat.chat
+                db.query(ChatMessage).filter_by(chat_id=shared_chat.id).delete()
 
                 shared_chat.updated_at = int(time.time())
                 db.commit()
@@ -323,6 +689,11 @@ class ChatTable:
     def delete_shared_chat_by_chat_id(self, chat_id: str) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id == f"shared-{chat_id}")
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=f"shared-{chat_id}").delete()
                 db.commit()
 
@@ -854,6 +1225,7 @@ class ChatTable:
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
@@ -864,7 +1236,8 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                if db.query(Chat).filter_by(id=id, user_id=user_id).delete():
+                    db.query(ChatMessage).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -876,6 +1249,11 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id == user_id)
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -888,6 +1266,13 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
@@ -901,6 +1286,11 @@ class ChatTable:
                 chats_by_user = db.query(Chat).filter_by(user_id=user_id).all()
                 shared_chat_ids = [f"shared-{chat.id}" for chat in chats_by_user]
 
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id.in_(shared_chat_ids))
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter(Chat.user_id.in_(shared_chat_ids)).delete()
                 db.commit()
 
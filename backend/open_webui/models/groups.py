@@ -6,6 +6,7 @@ import uuid
 
 from open_webui.internal.db import Base, get_db
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.user_cache import USER_CACHE
 
 from open_webui.models.files import FileMetadataResponse
 
@@ -107,6 +108,7 @@ class GroupTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                USER_CACHE.invalidate_groups()
                 if result:
                     return GroupModel.model_validate(result)
                 else:
@@ -164,6 +166,7 @@ class GroupTable:
                     }
                 )
                 db.commit()
+                USER_CACHE.invalidate_groups()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -174,6 +177,7 @@ class GroupTable:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
                 db.commit()
+                USER_CACHE.invalidate_groups()
                 return True
         except Exception:
             return False
@@ -183,6 +187,7 @@ class GroupTable:
             try:
                 db.query(Group).delete()
                 db.commit()
+                USER_CACHE.invalidate_groups()
 
                 return True
             except Exception:
@@ -203,6 +208,7 @@ class GroupTable:
                     )
                     db.commit()
 
+                USER_CACHE.invalidate_groups()
                 return True
             except Exception:
                 return False
@@ -0,0 +1,236 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Float, Integer, String, Text, JSON, func
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Ingestion Jobs DB Schema
+####################
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_job"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String)
+    file_id = Column(String)
+
+    # "process" extracts, splits and embeds the file, "transcribe" transcribes
+    # audio first, "reindex" reindexes the knowledge bases
+    type = Column(Text)
+    # pending, processing, completed or failed
+    status = Column(Text)
+    progress = Column(Float)
+    error = Column(Text, nullable=True)
+    data = Column(JSON, nullable=True)
+
+    attempts = Column(Integer)
+    # Pending jobs are claimed from this time, retries are delayed
+    available_at = Column(BigInteger)
+    # Worker processing the job, and until when, renewed while it runs
+    worker_id = Column(String, nullable=True)
+    locked_until = Column(BigInteger, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
+class IngestionJobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+    file_id: Optional[str] = None
+
+    type: str
+    status: str
+    progress: float = 0.0
+    error: Optional[str] = None
+    data: Optional[dict] = None
+
+    attempts: int = 0
+    available_at: int
+    worker_id: Optional[str] = None
+    locked_until: Optional[int] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+class IngestionJobsTable:
+    def insert_new_job(
+        self, user_id: str, file_id: Optional[str], type: str, data: dict = {}
+    ) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            now = int(time.time())
+            job = IngestionJobModel(
+                **{
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "file_id": file_id,
+                    "type": type,
+                    "status": "pending",
+                    "data": data,
+                    "available_at": now,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+
+            try:
+                result = IngestionJob(**job.model_dump())
+                db.add(result)
+                db.commit()
+                db.refresh(result)
+                return IngestionJobModel.model_validate(result)
+            except Exception as e:
+                log.exception(f"Error inserting a new ingestion job: {e}")
+                return None
+
+    def get_job_by_id(self, id: str) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            job = db.get(IngestionJob, id)
+            return IngestionJobModel.model_validate(job) if job else None
+
+    def get_latest_job_by_file_id(self, file_id: str) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            job = (
+                db.query(IngestionJob)
+                .filter_by(file_id=file_id)
+                .order_by(IngestionJob.created_at.desc())
+                .first()
+            )
+            return IngestionJobModel.model_validate(job) if job else None
+
+    def get_latest_job_by_type(self, type: str) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            job = (
+                db.query(IngestionJob)
+                .filter_by(type=type)
+                .order_by(IngestionJob.created_at.desc())
+                .first()
+            )
+            return IngestionJobModel.model_validate(job) if job else None
+
+    def claim_next_job(
+        self, worker_id: str, lease: int, max_attempts: int
+    ) -> Optional[IngestionJobModel]:
+        """
+        Claims the oldest pending job of the user with the fewest jobs being
+        processed, so one user uploading many files does not hold up the others.
+        """
+        with get_db() as db:
+            now = int(time.time())
+
+            # Jobs of workers that stopped renewing their lease are run again,
+            # unless they already took down a worker on each of their attempts
+            expired = db.query(IngestionJob).filter(
+                IngestionJob.status == "processing",
+                IngestionJob.locked_until < now,
+            )
+            expired.filter(IngestionJob.attempts >= max_attempts).update(
+                {
+                    "status": "failed",
+                    "error": "The worker processing the file stopped",
+                    "worker_id": None,
+                    "locked_until": None,
+                    "updated_at": now,
+                },
+                synchronize_session=False,
+            )
+            expired.filter(IngestionJob.attempts < max_attempts).update(
+                {"status": "pending", "worker_id": None, "locked_until": None},
+                synchronize_session=False,
+            )
+            db.commit()
+
+            candidates = (
+                db.query(IngestionJob.user_id, func.min(IngestionJob.created_at))
+                .filter(
+                    IngestionJob.status == "pending",
+                    IngestionJob.available_at <= now,
+                )
+                .group_by(IngestionJob.user_id)
+                .all()
+            )
+            if not candidates:
+                return None
+
+            processing = dict(
+                db.query(IngestionJob.user_id, func.count(IngestionJob.id))
+                .filter(IngestionJob.status == "processing")
+                .group_by(IngestionJob.user_id)
+                .all()
+            )
+            user_id, _ = min(
+                candidates,
+                key=lambda candidate: (processing.get(candidate[0], 0), candidate[1]),
+            )
+
+            job = (
+                db.query(IngestionJob)
+                .filter(
+                    IngestionJob.user_id == user_id,
+                    IngestionJob.status == "pending",
+                    IngestionJob.available_at <= now,
+                )
+                .order_by(IngestionJob.created_at)
+                .first()
+            )
+            if job is None:
+                return None
+
+            # Only one of the workers racing for the job updates it
+            claimed = (
+                db.query(IngestionJob)
+                .filter_by(id=job.id, status="pending")
+                .update(
+                    {
+                        "status": "processing",
+                        "worker_id": worker_id,
+                        "locked_until": now + lease,
+                        "attempts": IngestionJob.attempts + 1,
+                        "updated_at": now,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if not claimed:
+                return None
+
+            db.refresh(job)
+            return IngestionJobModel.model_validate(job)
+
+    def update_job_by_id(
+        self, id: str, updated: dict, worker_id: Optional[str] = None
+    ) -> Optional[IngestionJobModel]:
+        """Updates the job, only while claimed by `worker_id` if given."""
+        with get_db() as db:
+            query = db.query(IngestionJob).filter_by(id=id)
+            if worker_id is not None:
+                query = query.filter_by(worker_id=worker_id)
+
+            if not query.update({**updated, "updated_at": int(time.time())}):
+                return None
+            db.commit()
+            return self.get_job_by_id(id)
+
+    def get_job_stats(self) -> dict:
+        with get_db() as db:
+            return dict(
+                db.query(IngestionJob.status, func.count(IngestionJob.id))
+                .group_by(IngestionJob.status)
+                .all()
+            )
+
+
+IngestionJobs = IngestionJobsTable()
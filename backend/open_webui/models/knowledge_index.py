@@ -0,0 +1,122 @@
+import logging
+import time
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Text, JSON
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Knowledge Index DB Schema
+####################
+
+
+class KnowledgeIndex(Base):
+    __tablename__ = "knowledge_index"
+
+    # Id of the knowledge base, which is also the name its collection is queried by
+    id = Column(Text, primary_key=True)
+
+    # Vector DB collection holding the knowledge base, the id if None
+    collection_name = Column(Text, nullable=True)
+    # Embedding and chunking settings the collection was built with
+    config = Column(JSON, nullable=True)
+
+    # Collection being rebuilt while the current one keeps serving queries,
+    # with the files added to it so far, by content hash
+    shadow_collection_name = Column(Text, nullable=True)
+    shadow_config = Column(JSON, nullable=True)
+    shadow_files = Column(JSON, nullable=True)
+
+    failed_files = Column(JSON, nullable=True)
+
+    updated_at = Column(BigInteger)
+
+
+class KnowledgeIndexModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+
+    collection_name: Optional[str] = None
+    config: Optional[dict] = None
+
+    shadow_collection_name: Optional[str] = None
+    shadow_config: Optional[dict] = None
+    shadow_files: Optional[dict] = None
+
+    failed_files: Optional[list] = None
+
+    updated_at: int  # timestamp in epoch
+
+
+class KnowledgeIndexesTable:
+    def get_index_by_id(self, id: str) -> Optional[KnowledgeIndexModel]:
+        with get_db() as db:
+            index = db.get(KnowledgeIndex, id)
+            return KnowledgeIndexModel.model_validate(index) if index else None
+
+    def get_indexes(self) -> list[KnowledgeIndexModel]:
+        with get_db() as db:
+            return [
+                KnowledgeIndexModel.model_validate(index)
+                for index in db.query(KnowledgeIndex).all()
+            ]
+
+    def get_collection_names(self) -> dict[str, str]:
+        """Collections of the knowledge bases not stored under their id."""
+        with get_db() as db:
+            return {
+                id: collection_name
+                for id, collection_name in db.query(
+                    KnowledgeIndex.id, KnowledgeIndex.collection_name
+                )
+                .filter(KnowledgeIndex.collection_name.isnot(None))
+                .all()
+                if collection_name != id
+            }
+
+    def upsert_index_by_id(
+        self, id: str, updated: dict
+    ) -> Optional[KnowledgeIndexModel]:
+        try:
+            with get_db() as db:
+                index = db.get(KnowledgeIndex, id)
+                if index is None:
+                    index = KnowledgeIndex(id=id)
+                    db.add(index)
+
+                for key, value in {**updated, "updated_at": int(time.time())}.items():
+                    setattr(index, key, value)
+
+                db.commit()
+                db.refresh(index)
+                return KnowledgeIndexModel.model_validate(index)
+        except Exception as e:
+            log.exception(e)
+            return None
+
+    def delete_index_by_id(self, id: str) -> bool:
+        try:
+            with get_db() as db:
+                db.query(KnowledgeIndex).filter_by(id=id).delete()
+                db.commit()
+                return True
+        except Exception:
+            return False
+
+    def delete_all_indexes(self) -> bool:
+        try:
+            with get_db() as db:
+                db.query(KnowledgeIndex).delete()
+                db.commit()
+                return True
+        except Exception:
+            return False
+
+
+KnowledgeIndexes = KnowledgeIndexesTable()
@@ -0,0 +1,495 @@
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from array import array
+from collections import Counter, defaultdict
+from typing import Optional
+
+from open_webui.config import RAG_BM25_INDEX_DIR
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.vector.main import GetResult, SearchResult
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# On-disk layout of a collection index (one directory per collection):
+#
+#   .complete               marker, the index holds every chunk of the collection
+#   <segment>.seg.json      ids, lengths, doc offsets, term -> (offset, count) and
+#                           indexed metadata field -> value -> doc indexes
+#   <segment>.postings      int32 (doc index, term frequency) pairs, memory-mapped
+#   <segment>.docs          json lines with id, text and metadata, memory-mapped
+#   <tombstone>.del.json    ids deleted from older segments
+#   .compacting             lock file held by the worker merging the segments
+#
+# Segments and tombstones are immutable and only ever created or removed as whole
+# files, so several workers can append to the same collection without coordination.
+# Workers on other nodes, with their own directory, update the vector DB without
+# this index, so its document count is checked against the vector DB before use.
+
+COMPLETE_MARKER = ".complete"
+COMPACTION_LOCK = ".compacting"
+COMPACTION_LOCK_TIMEOUT = 600
+SEGMENT_SUFFIX = ".seg.json"
+TOMBSTONE_SUFFIX = ".del.json"
+
+# Merge all segments into one once there are too many of them or too many deletes
+MAX_SEGMENTS = 8
+MAX_DELETED_RATIO = 0.25
+
+# Metadata the chunks are deleted by, indexed so deletes do not read every document
+INDEXED_FIELDS = ["file_id", "hash"]
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _map_file(path: str) -> Optional[mmap.mmap]:
+    # Empty files cannot be memory-mapped
+    if os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class BM25Segment:
+    def __init__(self, path: str):
+        with open(f"{path}{SEGMENT_SUFFIX}", "r") as f:
+            meta = json.load(f)
+
+        self.ids: list[str] = meta["ids"]
+        self.lengths: list[int] = meta["lengths"]
+        self.offsets: list[int] = meta["offsets"]
+        self.terms: dict[str, list[int]] = meta["terms"]
+        # Missing from segments written before fields were indexed
+        self.fields: Optional[dict[str, dict[str, list[int]]]] = meta.get("fields")
+
+        self._postings_mmap = _map_file(f"{path}.postings")
+        self.postings = (
+            memoryview(self._postings_mmap).cast("i")
+            if self._postings_mmap
+            else memoryview(array("i"))
+        )
+        self._docs_mmap = _map_file(f"{path}.docs")
+
+    def get_doc(self, idx: int) -> dict:
+        return json.loads(self._docs_mmap[self.offsets[idx] : self.offsets[idx + 1]])
+
+    def iter_docs(self):
+        for idx in range(len(self.ids)):
+            yield self.get_doc(idx)
+
+    def find_ids(self, filter: dict) -> list[str]:
+        """Ids of the documents whose metadata matches all the filter values."""
+        if self.fields is not None and all(
+            key in self.fields and isinstance(value, str)
+            for key, value in filter.items()
+        ):
+            idxs = set.intersection(
+                *[set(self.fields[key].get(value, [])) for key, value in filter.items()]
+            )
+            return [self.ids[idx] for idx in sorted(idxs)]
+
+        return [
+            doc["id"]
+            for doc in self.iter_docs()
+            if all(
+                (doc.get("metadata") or {}).get(key) == value
+                for key, value in filter.items()
+            )
+        ]
+
+
+class BM25Index:
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.Lock()
+        self._collection_locks: dict[str, threading.RLock] = {}
+        # collection name -> loaded state, refreshed whenever the directory listing changes
+        self._state: dict[str, dict] = {}
+
+    def _get_collection_path(self, collection_name: str) -> str:
+        if re.fullmatch(r"[\w\-]+", collection_name):
+            return os.path.join(self.path, collection_name)
+        return os.path.join(
+            self.path, hashlib.sha256(collection_name.encode()).hexdigest()
+        )
+
+    def _get_collection_lock(self, collection_name: str) -> threading.RLock:
+        with self._lock:
+            return self._collection_locks.setdefault(collection_name, threading.RLock())
+
+    def _load(self, collection_name: str) -> Optional[dict]:
+        collection_path = self._get_collection_path(collection_name)
+        try:
+            names = sorted(os.listdir(collection_path))
+        except FileNotFoundError:
+            return None
+
+        if COMPLETE_MARKER not in names:
+            return None
+
+        state = self._state.get(collection_name)
+        if state and state["names"] == names:
+            return state
+
+        segment_names = [
+            name[: -len(SEGMENT_SUFFIX)]
+            for name in names
+            if name.endswith(SEGMENT_SUFFIX)
+        ]
+        tombstone_names = [name for name in names if name.endswith(TOMBSTONE_SUFFIX)]
+
+        # Segments are immutable, only load the ones that are new since the last listing
+        previous_segments = state["segments"] if state else {}
+        segments = {}
+        for segment_name in segment_names:
+            if segment_name in previous_segments:
+                segments[segment_name] = previous_segments[segment_name]
+            else:
+                try:
+                    segments[segment_name] = BM25Segment(
+                        os.path.join(collection_path, segment_name)
+                    )
+                except FileNotFoundError:
+                    # Merged away by a concurrent compaction
+                    continue
+
+        deleted = set()
+        for tombstone_name in tombstone_names:
+            try:
+                with open(os.path.join(collection_path, tombstone_name), "r") as f:
+                    deleted.update(json.load(f))
+            except FileNotFoundError:
+                continue
+
+        doc_count = 0
+        total_length = 0
+        for segment in segments.values():
+            for id, length in zip(segment.ids, segment.lengths):
+                if id not in deleted:
+                    doc_count += 1
+                    total_length += length
+
+        state = {
+            "names": names,
+            "segments": segments,
+            "tombstones": tombstone_names,
+            "deleted": deleted,
+            "doc_count": doc_count,
+            "total_count": sum(len(segment.ids) for segment in segments.values()),
+            "avgdl": (total_length / doc_count) if doc_count else 0.0,
+        }
+        self._state[collection_name] = state
+        return state
+
+    def _write_segment(self, collection_path: str, items: list[dict]) -> str:
+        postings = defaultdict(list)
+        fields = {field: defaultdict(list) for field in INDEXED_FIELDS}
+        ids = []
+        lengths = []
+        offsets = [0]
+        docs = bytearray()
+
+        for idx, item in enumerate(items):
+            tokens = tokenize(item["text"])
+            for term, tf in Counter(tokens).items():
+                postings[term].append((idx, tf))
+
+            metadata = item["metadata"] or {}
+            for field in INDEXED_FIELDS:
+                if isinstance(metadata.get(field), str):
+                    fields[field][metadata[field]].append(idx)
+
+            ids.append(item["id"])
+            lengths.append(len(tokens))
+            docs += (
+                json.dumps(
+                    {
+                        "id": item["id"],
+                        "text": item["text"],
+                        "metadata": item["metadata"],
+                    }
+                ).encode()
+                + b"\n"
+            )
+            offsets.append(len(docs))
+
+        buffer = array("i")
+        terms = {}
+        for term, entries in postings.items():
+            terms[term] = [len(buffer) // 2, len(entries)]
+            for idx, tf in entries:
+                buffer.append(idx)
+                buffer.append(tf)
+
+        # Time-ordered names keep segments sorted by insertion
+        segment_name = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        segment_path = os.path.join(collection_path, segment_name)
+
+        _write_atomic(f"{segment_path}.postings", buffer.tobytes())
+        _write_atomic(f"{segment_path}.docs", bytes(docs))
+        # The segment only becomes visible once its metadata file exists
+        _write_atomic(
+            f"{segment_path}{SEGMENT_SUFFIX}",
+            json.dumps(
+                {
+                    "ids": ids,
+                    "lengths": lengths,
+                    "offsets": offsets,
+                    "terms": terms,
+                    "fields": fields,
+                }
+            ).encode(),
+        )
+        return segment_name
+
+    def _compact(self, collection_name: str, state: dict):
+        collection_path = self._get_collection_path(collection_name)
+        items = [
+            doc
+            for segment in state["segments"].values()
+            for doc in segment.iter_docs()
+            if doc["id"] not in state["deleted"]
+        ]
+
+        log.info(
+            f"Compacting BM25 index for {collection_name}: "
+            f"{len(state['segments'])} segments, {len(items)} documents"
+        )
+        self._write_segment(collection_path, items)
+
+        # Only remove the files that were merged, anything written meanwhile is kept
+        for segment_name in state["segments"].keys():
+            for suffix in [SEGMENT_SUFFIX, ".postings", ".docs"]:
+                try:
+                    os.remove(os.path.join(collection_path, f"{segment_name}{suffix}"))
+                except OSError as e:
+                    log.debug(f"Failed to remove merged BM25 segment file: {e}")
+        for tombstone_name in state["tombstones"]:
+            try:
+                os.remove(os.path.join(collection_path, tombstone_name))
+            except OSError as e:
+                log.debug(f"Failed to remove merged BM25 tombstone: {e}")
+
+    def _maybe_compact(self, collection_name: str):
+        with self._get_collection_lock(collection_name):
+            state = self._load(collection_name)
+            if state is None:
+                return
+
+            if not (
+                len(state["segments"]) > MAX_SEGMENTS
+                or (
+                    state["total_count"]
+                    and (state["total_count"] - state["doc_count"])
+                    / state["total_count"]
+                    > MAX_DELETED_RATIO
+                )
+            ):
+                return
+
+            # Other workers share the directory, only one of them may merge at a time
+            lock_path = os.path.join(
+                self._get_collection_path(collection_name), COMPACTION_LOCK
+            )
+            try:
+                if time.time() - os.path.getmtime(lock_path) > COMPACTION_LOCK_TIMEOUT:
+                    os.remove(lock_path)
+            except OSError:
+                pass
+
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                return
+
+            try:
+                os.close(fd)
+                self._compact(collection_name, state)
+            finally:
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+
+    def has_index(self, collection_name: str) -> bool:
+        return os.path.exists(
+            os.path.join(self._get_collection_path(collection_name), COMPLETE_MARKER)
+        )
+
+    def count(self, collection_name: str) -> Optional[int]:
+        state = self._load(collection_name)
+        return state["doc_count"] if state else None
+
+    def build(self, collection_name: str, result: Optional[GetResult]) -> bool:
+        # Builds the full index of a collection from the vector DB contents
+        with self._get_collection_lock(collection_name):
+            if self.has_index(collection_name):
+                return True
+            if result is None:
+                return False
+
+            log.info(f"Building BM25 index for collection {collection_name}")
+            self.drop(collection_name)
+            self.add(
+                collection_name,
+                [
+                    {"id": id, "text": text, "metadata": metadata}
+                    for id, text, metadata in zip(
+                        (result.ids or [[]])[0],
+                        (result.documents or [[]])[0],
+                        (result.metadatas or [[]])[0],
+                    )
+                ],
+                create=True,
+            )
+            return True
+
+    def add(self, collection_name: str, items: list[dict], create: bool = False):
+        # Appends items to an existing index. Collections that were never indexed
+        # are left alone and get built from the vector DB on their first query.
+        collection_path = self._get_collection_path(collection_name)
+        if create:
+            os.makedirs(collection_path, exist_ok=True)
+        elif not self.has_index(collection_name):
+            return
+
+        if items:
+            self._write_segment(collection_path, items)
+
+        if create:
+            _write_atomic(os.path.join(collection_path, COMPLETE_MARKER), b"")
+
+        self._maybe_compact(collection_name)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        state = self._load(collection_name)
+        if state is None:
+            return
+
+        if ids is None:
+            ids = []
+            if filter:
+                for segment in state["segments"].values():
+                    ids.extend(segment.find_ids(filter))
+
+        ids = [id for id in ids if id not in state["deleted"]]
+        if not ids:
+            return
+
+        _write_atomic(
+            os.path.join(
+                self._get_collection_path(collection_name),
+                f"{time.time_ns()}-{uuid.uuid4().hex[:8]}{TOMBSTONE_SUFFIX}",
+            ),
+            json.dumps(ids).encode(),
+        )
+        self._maybe_compact(collection_name)
+
+    def drop(self, collection_name: str):
+        self._state.pop(collection_name, None)
+        shutil.rmtree(self._get_collection_path(collection_name), ignore_errors=True)
+
+    def reset(self):
+        for collection_name in list(self._state.keys()):
+            self.drop(collection_name)
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def search(
+        self, collection_name: str, query: str, k: int
+    ) -> Optional[SearchResult]:
+        state = self._load(collection_name)
+        if state is None:
+            return None
+
+        doc_count = state["doc_count"]
+        avgdl = state["avgdl"] or 1.0
+        deleted = state["deleted"]
+        segments = list(state["segments"].values())
+
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            entries = [
+                (segment_idx, segment.terms[term])
+                for segment_idx, segment in enumerate(segments)
+                if term in segment.terms
+            ]
+            if not entries:
+                continue
+
+            # Document frequencies still count deleted documents until the next compaction
+            df = sum(count for _, (_, count) in entries)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+            for segment_idx, (offset, count) in entries:
+                segment = segments[segment_idx]
+                postings = segment.postings[offset * 2 : (offset + count) * 2]
+                for i in range(0, len(postings), 2):
+                    idx, tf = postings[i], postings[i + 1]
+                    length_norm = 1 - self.b + self.b * segment.lengths[idx] / avgdl
+                    scores[(segment_idx, idx)] += (
+                        idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+                    )
+
+        ranked = sorted(
+            (
+                (score, key)
+                for key, score in scores.items()
+                if segments[key[0]].ids[key[1]] not in deleted
+            ),
+            key=lambda x: x[0],
+            reverse=True,
+        )
+
+        ids, documents, metadatas, distances = [], [], [], []
+        for score, (segment_idx, idx) in ranked:
+            if len(ids) >= k:
+                break
+
+            # A compaction in progress can briefly expose the same document twice
+            if segments[segment_idx].ids[idx] in ids:
+                continue
+
+            doc = segments[segment_idx].get_doc(idx)
+            ids.append(doc["id"])
+            documents.append(doc["text"])
+            metadatas.append(doc["metadata"])
+            distances.append(score)
+
+        return SearchResult(
+            ids=[ids],
+            documents=[documents],
+            metadatas=[metadatas],
+            distances=[distances],
+        )
+
+
+BM25_INDEX = BM25Index(RAG_BM25_INDEX_DIR)
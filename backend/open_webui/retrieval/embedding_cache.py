@@ -0,0 +1,323 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from open_webui.config import (
+    RAG_EMBEDDING_CACHE_TYPE,
+    RAG_EMBEDDING_CACHE_MAX_ENTRIES,
+    RAG_EMBEDDING_CACHE_DIR,
+    RAG_EMBEDDING_CACHE_REDIS_URL,
+)
+from open_webui.env import SRC_LOG_LEVELS, REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def get_embedding_cache_key(
+    engine: str, model: str, prefix: Optional[str], text: str
+) -> str:
+    return hashlib.sha256(
+        "\0".join([engine, model or "", prefix or "", text]).encode("utf-8")
+    ).hexdigest()
+
+
+def encode_embedding(embedding: list[float]) -> bytes:
+    # Vector DBs store float32, so nothing is lost by caching at that precision
+    return array("f", embedding).tobytes()
+
+
+def decode_embedding(value: bytes) -> list[float]:
+    embedding = array("f")
+    embedding.frombytes(value)
+    return embedding.tolist()
+
+
+class EmbeddingCache(ABC):
+    """
+    Size-bounded store of encoded embeddings. Backends implement _get_many,
+    _set_many and _clear, lookups and hit/miss accounting are shared.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_many(self, keys: list[str]) -> list[Optional[list[float]]]:
+        try:
+            values = self._get_many(keys)
+        except Exception as e:
+            log.warning(f"Error reading from embedding cache: {e}")
+            values = [None] * len(keys)
+
+        hits = sum(1 for value in values if value is not None)
+        self.stats["hits"] += hits
+        self.stats["misses"] += len(keys) - hits
+
+        return [decode_embedding(value) if value else None for value in values]
+
+    def set_many(self, items: dict[str, list[float]]):
+        try:
+            self._set_many(
+                {key: encode_embedding(value) for key, value in items.items()}
+            )
+        except Exception as e:
+            log.warning(f"Error writing to embedding cache: {e}")
+
+    def clear(self):
+        self._clear()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "type": self.type,
+            "max_entries": self.max_entries,
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+        }
+
+    @abstractmethod
+    def _get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        pass
+
+    @abstractmethod
+    def _set_many(self, items: dict[str, bytes]):
+        pass
+
+    @abstractmethod
+    def _clear(self):
+        pass
+
+
+class MemoryEmbeddingCache(EmbeddingCache):
+    type = "memory"
+
+    def __init__(self, max_entries: int):
+        super().__init__(max_entries)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+
+    def _get_many(self, keys):
+        values = []
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                values.append(value)
+        return values
+
+    def _set_many(self, items):
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskEmbeddingCache(EmbeddingCache):
+    """
+    SQLite file shared by all workers, least recently used entries are evicted
+    once the cache grows past max_entries.
+    """
+
+    type = "disk"
+
+    def __init__(self, path: str, max_entries: int):
+        super().__init__(max_entries)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding "
+            "(key TEXT PRIMARY KEY, value BLOB, accessed_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embedding_accessed_at "
+            "ON embedding (accessed_at)"
+        )
+        self._conn.commit()
+
+    def _get_many(self, keys):
+        found = {}
+        with self._lock:
+            # Stay below SQLite's default limit of bound parameters
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(
+                    self._conn.execute(
+                        f"SELECT key, value FROM embedding WHERE key IN ({placeholders})",
+                        batch,
+                    ).fetchall()
+                )
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embedding SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+
+        return [found.get(key) for key in keys]
+
+    def _set_many(self, items):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding (key, value, accessed_at) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()],
+            )
+
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embedding").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embedding WHERE key IN "
+                    "(SELECT key FROM embedding ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self.stats["evictions"] += count - self.max_entries
+
+            self._conn.commit()
+
+    def _clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embedding")
+            self._conn.commit()
+
+
+class RedisEmbeddingCache(EmbeddingCache):
+    """
+    Entries are plain keys, a sorted set of access times is used to evict the
+    least recently used ones once the cache grows past max_entries.
+    """
+
+    type = "redis"
+
+    def __init__(self, redis_url: str, max_entries: int):
+        super().__init__(max_entries)
+        self._redis = get_redis_connection(
+            redis_url,
+            get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+            decode_responses=False,
+        )
+        self._prefix = "open-webui:embedding:"
+        self._index = f"{self._prefix}index"
+
+    def _get_many(self, keys):
+        values = self._redis.mget([f"{self._prefix}{key}" for key in keys])
+
+        found = [key for key, value in zip(keys, values) if value is not None]
+        if found:
+            now = time.time()
+            self._redis.zadd(self._index, {key: now for key in found}, xx=True)
+
+        return values
+
+    def _set_many(self, items):
+        now = time.time()
+        pipe = self._redis.pipeline()
+        for key, value in items.items():
+            pipe.set(f"{self._prefix}{key}", value)
+        pipe.zadd(self._index, {key: now for key in items})
+        pipe.zcard(self._index)
+        count = pipe.execute()[-1]
+
+        if count > self.max_entries:
+            evicted = self._redis.zpopmin(self._index, count - self.max_entries)
+            if evicted:
+                self._redis.delete(
+                    *[f"{self._prefix}{key.decode()}" for key, _ in evicted]
+                )
+                self.stats["evictions"] += len(evicted)
+
+    def _clear(self):
+        keys = [
+            f"{self._prefix}{key.decode()}"
+            for key in self._redis.zrange(self._index, 0, -1)
+        ]
+        for i in range(0, len(keys), 1000):
+            self._redis.delete(*keys[i : i + 1000])
+        self._redis.delete(self._index)
+
+
+def get_embedding_cache(cache_type: str) -> Optional[EmbeddingCache]:
+    try:
+        if cache_type == "memory":
+            return MemoryEmbeddingCache(RAG_EMBEDDING_CACHE_MAX_ENTRIES)
+        elif cache_type == "disk":
+            return DiskEmbeddingCache(
+                os.path.join(RAG_EMBEDDING_CACHE_DIR, "embeddings.db"),
+                RAG_EMBEDDING_CACHE_MAX_ENTRIES,
+            )
+        elif cache_type == "redis":
+            return RedisEmbeddingCache(
+                RAG_EMBEDDING_CACHE_REDIS_URL, RAG_EMBEDDING_CACHE_MAX_ENTRIES
+            )
+        elif cache_type:
+            log.warning(f"Unknown embedding cache type: {cache_type}")
+    except Exception as e:
+        log.exception(f"Error initializing {cache_type} embedding cache: {e}")
+    return None
+
+
+def get_cached_embedding_function(
+    embedding_function: Callable,
+    engine: str,
+    model: str,
+    cache: Optional[EmbeddingCache],
+) -> Callable:
+    """
+    Wraps an embedding function so only texts missing from the cache are embedded.
+    Misses of a batch are embedded with a single call in their original order.
+    """
+    if cache is None:
+        return embedding_function
+
+    def cached_embedding_function(query, prefix=None, user=None):
+        texts = query if isinstance(query, list) else [query]
+        keys = [get_embedding_cache_key(engine, model, prefix, text) for text in texts]
+        embeddings = cache.get_many(keys)
+
+        missing = [idx for idx, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            # Texts repeated within the batch are only embedded once
+            missing_texts = {keys[idx]: texts[idx] for idx in missing}
+            missing_keys = list(missing_texts.keys())
+
+            result = embedding_function(
+                list(missing_texts.values()), prefix=prefix, user=user
+            )
+            if result is None:
+                return None
+
+            computed = dict(zip(missing_keys, result))
+            cache.set_many(computed)
+            for idx in missing:
+                embeddings[idx] = computed[keys[idx]]
+
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+    return cached_embedding_function
+
+
+EMBEDDING_CACHE = get_embedding_cache(RAG_EMBEDDING_CACHE_TYPE)
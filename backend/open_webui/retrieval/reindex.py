@@ -0,0 +1,377 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
+from fastapi import Request
+
+from open_webui.env import SRC_LOG_LEVELS, KNOWLEDGE_REINDEX_CONCURRENCY
+from open_webui.models.files import FileModel, Files
+from open_webui.models.knowledge import KnowledgeModel, Knowledges
+from open_webui.models.knowledge_index import KnowledgeIndexes
+from open_webui.retrieval.bm25 import BM25_INDEX
+from open_webui.retrieval.vector.aliases import ALIAS_TTL
+from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.routers.retrieval import (
+    ProcessFileForm,
+    get_processed_file_docs,
+    process_file,
+    save_docs_to_vector_db,
+)
+from open_webui.utils.misc import calculate_sha256_string
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def get_index_config(request: Request) -> dict:
+    """Settings a collection has to be rebuilt for when they change."""
+    config = request.app.state.config
+    return {
+        "embedding": {
+            "engine": config.RAG_EMBEDDING_ENGINE,
+            "model": config.RAG_EMBEDDING_MODEL,
+        },
+        "splitter": {
+            "type": config.TEXT_SPLITTER,
+            "chunk_size": config.CHUNK_SIZE,
+            "chunk_overlap": config.CHUNK_OVERLAP,
+            "encoding": config.TIKTOKEN_ENCODING_NAME,
+        },
+    }
+
+
+def get_file_hash(file: FileModel) -> str:
+    # Hash of the content the file was embedded from, as set by process_file
+    return calculate_sha256_string((file.data or {}).get("content", ""))
+
+
+def get_indexed_metadata(collection_name: str, file_id: str) -> Optional[dict]:
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=collection_name, filter={"file_id": file_id}, limit=1
+    )
+    if result is not None and result.metadatas and result.metadatas[0]:
+        return result.metadatas[0][0]
+    return None
+
+
+class KnowledgeReindexer:
+    """
+    Reindexes the knowledge bases, embedding up to `concurrency` files at once.
+
+    A knowledge base whose embedding or chunking settings changed, or were never
+    recorded by a reindex, is rebuilt into a shadow collection while the current
+    one keeps serving queries, and the shadow collection replaces it once complete.
+    The files added to the shadow collection are checkpointed, so an interrupted
+    rebuild resumes where it stopped. Otherwise only the files whose content
+    changed since they were embedded are reprocessed, in place.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        user,
+        concurrency: int = KNOWLEDGE_REINDEX_CONCURRENCY,
+        on_progress: Optional[Callable[[int, int], Awaitable]] = None,
+    ):
+        self.request = request
+        self.user = user
+        self.config = get_index_config(request)
+        self.semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self.on_progress = on_progress
+
+        self.total = 0
+        self.done = 0
+        self.stats = {"rebuilt": 0, "updated": 0, "skipped": 0, "failed": 0}
+
+    async def _advance(self, count: int = 1):
+        self.done += count
+        if self.on_progress and count:
+            await self.on_progress(self.done, self.total)
+
+    async def _run_all(self, collection_name: str, run, files: list[FileModel]):
+        # Concurrent inserts into a missing collection would each try to create
+        # it, so files are added one at a time until it exists
+        files = list(files)
+        while files and not await asyncio.to_thread(
+            VECTOR_DB_CLIENT.has_collection, collection_name=collection_name
+        ):
+            await run(files.pop(0))
+        await asyncio.gather(*[run(file) for file in files])
+
+    def _get_files(self, knowledge: KnowledgeModel) -> list[FileModel]:
+        return Files.get_files_by_ids((knowledge.data or {}).get("file_ids", []))
+
+    async def run(self, knowledge_bases: Optional[list[KnowledgeModel]] = None):
+        if knowledge_bases is None:
+            knowledge_bases = await asyncio.to_thread(Knowledges.get_knowledge_bases)
+
+        log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
+
+        files = {}
+        for knowledge in knowledge_bases:
+            files[knowledge.id] = await asyncio.to_thread(self._get_files, knowledge)
+        self.total = sum(len(items) for items in files.values())
+
+        # The files of all the knowledge bases share the slots
+        results = await asyncio.gather(
+            *[
+                self.reindex(knowledge, files[knowledge.id])
+                for knowledge in knowledge_bases
+            ],
+            return_exceptions=True,
+        )
+        for knowledge, result in zip(knowledge_bases, results):
+            if isinstance(result, Exception):
+                log.error(f"Error reindexing knowledge base {knowledge.id}: {result}")
+
+        log.info(f"Reindexing completed: {self.stats}")
+        return self.stats
+
+    async def reindex(self, knowledge: KnowledgeModel, files: list[FileModel]):
+        index = await asyncio.to_thread(KnowledgeIndexes.get_index_by_id, knowledge.id)
+
+        if index and index.shadow_collection_name:
+            if index.shadow_config == self.config:
+                log.info(f"Resuming the rebuild of knowledge base {knowledge.id}")
+                return await self.rebuild(
+                    knowledge,
+                    files,
+                    index.shadow_collection_name,
+                    dict(index.shadow_files or {}),
+                )
+
+            # Started with other settings
+            await asyncio.to_thread(self.drop, index.shadow_collection_name)
+
+        # Knowledge bases indexed before their settings were recorded may have
+        # been chunked differently, which the chunks do not tell
+        if index is None or index.config is None or index.config != self.config:
+            return await self.rebuild(knowledge, files)
+
+        stale_files, embedding_changed = await asyncio.to_thread(
+            self.get_stale_files, knowledge, files
+        )
+        if embedding_changed:
+            return await self.rebuild(knowledge, files)
+
+        await self.update(knowledge, files, stale_files)
+
+    def get_stale_files(
+        self, knowledge: KnowledgeModel, files: list[FileModel]
+    ) -> tuple[list[FileModel], bool]:
+        """Files to reprocess, and whether the collection has to be rebuilt."""
+        if not VECTOR_DB_CLIENT.has_collection(collection_name=knowledge.id):
+            return files, False
+
+        embedding_config = json.dumps(self.config["embedding"])
+        stale_files = []
+        for file in files:
+            metadata = get_indexed_metadata(knowledge.id, file.id)
+            if metadata is None or metadata.get("hash") != get_file_hash(file):
+                stale_files.append(file)
+            elif metadata.get("embedding_config") != embedding_config:
+                return files, True
+        return stale_files, False
+
+    def drop(self, collection_name: str, bm25: bool = True):
+        # Collections are dropped by their own name, not the knowledge base served
+        if VECTOR_DB_CLIENT.client.has_collection(collection_name):
+            VECTOR_DB_CLIENT.client.delete_collection(collection_name)
+        if bm25:
+            BM25_INDEX.drop(collection_name)
+
+    async def update(
+        self,
+        knowledge: KnowledgeModel,
+        files: list[FileModel],
+        stale_files: list[FileModel],
+    ):
+        self.stats["skipped"] += len(files) - len(stale_files)
+        await self._advance(len(files) - len(stale_files))
+
+        failed_files = []
+
+        def update_file(file: FileModel):
+            if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge.id):
+                VECTOR_DB_CLIENT.delete(
+                    collection_name=knowledge.id, filter={"file_id": file.id}
+                )
+                BM25_INDEX.delete(
+                    collection_name=knowledge.id, filter={"file_id": file.id}
+                )
+            process_file(
+                self.request,
+                ProcessFileForm(file_id=file.id, collection_name=knowledge.id),
+                user=self.user,
+            )
+
+        async def run(file: FileModel):
+            async with self.semaphore:
+                try:
+                    await asyncio.to_thread(update_file, file)
+                    self.stats["updated"] += 1
+                except Exception as e:
+                    log.error(
+                        f"Error processing file {file.filename} (ID: {file.id}): {e}"
+                    )
+                    failed_files.append({"file_id": file.id, "error": str(e)})
+                    self.stats["failed"] += 1
+            await self._advance()
+
+        await self._run_all(knowledge.id, run, stale_files)
+        await asyncio.to_thread(
+            KnowledgeIndexes.upsert_index_by_id,
+            knowledge.id,
+            {
+                "config": self.config,
+                "shadow_collection_name": None,
+                "shadow_config": None,
+                "shadow_files": None,
+                "failed_files": failed_files,
+            },
+        )
+
+    def add_file(self, collection_name: str, file: FileModel, hash: str):
+        # Leftovers of an interrupted attempt
+        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+            VECTOR_DB_CLIENT.delete(
+                collection_name=collection_name, filter={"file_id": file.id}
+            )
+
+        save_docs_to_vector_db(
+            self.request,
+            docs=get_processed_file_docs(file),
+            collection_name=collection_name,
+            metadata={"file_id": file.id, "name": file.filename, "hash": hash},
+            add=True,
+            user=self.user,
+        )
+
+    async def rebuild(
+        self,
+        knowledge: KnowledgeModel,
+        files: list[FileModel],
+        shadow_collection_name: Optional[str] = None,
+        shadow_files: Optional[dict[str, str]] = None,
+    ):
+        if shadow_collection_name is None or shadow_files is None:
+            shadow_collection_name = f"{knowledge.id}-{uuid4().hex[:8]}"
+            shadow_files = {}
+            await asyncio.to_thread(
+                KnowledgeIndexes.upsert_index_by_id,
+                knowledge.id,
+                {
+                    "shadow_collection_name": shadow_collection_name,
+                    "shadow_config": self.config,
+                    "shadow_files": {},
+                },
+            )
+
+        log.info(
+            f"Rebuilding knowledge base {knowledge.id} into {shadow_collection_name}"
+        )
+        failed_files = []
+
+        async def run(file: FileModel):
+            hash = get_file_hash(file)
+            if shadow_files.get(file.id) == hash:
+                self.stats["skipped"] += 1
+                return await self._advance()
+
+            async with self.semaphore:
+                try:
+                    await asyncio.to_thread(
+                        self.add_file, shadow_collection_name, file, hash
+                    )
+                    shadow_files[file.id] = hash
+                    await asyncio.to_thread(
+                        KnowledgeIndexes.upsert_index_by_id,
+                        knowledge.id,
+                        {"shadow_files": dict(shadow_files)},
+                    )
+                    self.stats["rebuilt"] += 1
+                except Exception as e:
+                    log.error(
+                        f"Error processing file {file.filename} (ID: {file.id}): {e}"
+                    )
+                    failed_files.append({"file_id": file.id, "error": str(e)})
+                    self.stats["failed"] += 1
+            await self._advance()
+
+        await self._run_all(shadow_collection_name, run, files)
+
+        # Files added to the knowledge base meanwhile
+        seen_file_ids = {file.id for file in files}
+        while True:
+            knowledge = await asyncio.to_thread(
+                Knowledges.get_knowledge_by_id, knowledge.id
+            )
+            if knowledge is None:
+                # Deleted meanwhile
+                return await asyncio.to_thread(self.drop, shadow_collection_name)
+
+            current_files = await asyncio.to_thread(self._get_files, knowledge)
+            new_files = [file for file in current_files if file.id not in seen_file_ids]
+            if not new_files:
+                break
+
+            self.total += len(new_files)
+            seen_file_ids.update(file.id for file in new_files)
+            await self._run_all(shadow_collection_name, run, new_files)
+
+        previous_collection_name = await asyncio.to_thread(
+            self.swap,
+            knowledge,
+            shadow_collection_name,
+            {file.id for file in current_files},
+            shadow_files,
+            failed_files,
+        )
+
+        # Nodes that have not seen the swap yet keep querying the old collection
+        await asyncio.sleep(ALIAS_TTL)
+        # Its BM25 index was dropped with the swap
+        await asyncio.to_thread(self.drop, previous_collection_name, bm25=False)
+
+    def swap(
+        self,
+        knowledge: KnowledgeModel,
+        shadow_collection_name: str,
+        file_ids: set[str],
+        shadow_files: dict[str, str],
+        failed_files: list[dict],
+    ) -> str:
+        """Serves the knowledge base from the shadow collection, returns the old one."""
+        # Files removed from the knowledge base meanwhile
+        for file_id in set(shadow_files) - file_ids:
+            VECTOR_DB_CLIENT.delete(
+                collection_name=shadow_collection_name, filter={"file_id": file_id}
+            )
+
+        index = KnowledgeIndexes.get_index_by_id(knowledge.id)
+        previous_collection_name = (
+            index.collection_name if index and index.collection_name else knowledge.id
+        )
+
+        KnowledgeIndexes.upsert_index_by_id(
+            knowledge.id,
+            {
+                "collection_name": shadow_collection_name,
+                "config": self.config,
+                "shadow_collection_name": None,
+                "shadow_config": None,
+                "shadow_files": None,
+                "failed_files": failed_files,
+            },
+        )
+        VECTOR_DB_CLIENT.invalidate()
+
+        # Built again from the new collection on its next query
+        BM25_INDEX.drop(knowledge.id)
+        BM25_INDEX.drop(shadow_collection_name)
+        log.info(
+            f"Knowledge base {knowledge.id} now served from {shadow_collection_name}"
+        )
+        return previous_collection_name
@@ -1,18 +1,26 @@
+import asyncio
 import logging
 import os
-from typing import Optional, Union
+import time
+from typing import Callable, Optional, Union
 
 import requests
 import hashlib
 from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 from huggingface_hub import snapshot_download
 from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
 from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
-from open_webui.config import VECTOR_DB
+from open_webui.config import VECTOR_DB, ENABLE_RAG_BM25_INDEX
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
+from open_webui.retrieval.embedding_cache import (
+    EMBEDDING_CACHE,
+    get_cached_embedding_function,
+)
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
@@ -29,12 +37,24 @@ from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    RAG_EMBEDDING_MAX_IN_FLIGHT,
+    RAG_EMBEDDING_BATCH_MAX_RETRIES,
 )
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
+# Keep-alive connections shared by all embedding requests
+EMBEDDING_SESSION = requests.Session()
+EMBEDDING_SESSION.mount(
+    "http://", HTTPAdapter(pool_maxsize=max(RAG_EMBEDDING_MAX_IN_FLIGHT, 10))
+)
+EMBEDDING_SESSION.mount(
+    "https://", HTTPAdapter(pool_maxsize=max(RAG_EMBEDDING_MAX_IN_FLIGHT, 10))
+)
+
+
 from typing import Any
 
 from langchain_core.callbacks import CallbackManagerForRetrieverRun
@@ -73,6 +93,30 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class BM25IndexRetriever(BaseRetriever):
+    collection_name: Any
+    top_k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        result = BM25_INDEX.search(
+            collection_name=self.collection_name,
+            query=query,
+            k=self.top_k,
+        )
+        if result is None:
+            return []
+
+        return [
+            Document(metadata=metadata, page_content=document)
+            for document, metadata in zip(result.documents[0], result.metadatas[0])
+        ]
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -107,9 +151,27 @@ def get_doc(collection_name: str, user: UserModel = None):
         raise e
 
 
+def ensure_bm25_index(
+    collection_name: str, collection_result: Optional[GetResult] = None
+) -> bool:
+    # Collections indexed before the BM25 index existed are built on first use
+    if BM25_INDEX.has_index(collection_name):
+        # Chunks added or deleted through another node leave the local index behind
+        count = VECTOR_DB_CLIENT.count(collection_name)
+        if count is None or count == BM25_INDEX.count(collection_name):
+            return True
+
+        log.info(f"Rebuilding stale BM25 index for collection {collection_name}")
+        BM25_INDEX.drop(collection_name)
+
+    if collection_result is None:
+        collection_result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+    return BM25_INDEX.build(collection_name, collection_result)
+
+
 def query_doc_with_hybrid_search(
     collection_name: str,
-    collection_result: GetResult,
+    collection_result: Optional[GetResult],
     query: str,
     embedding_function,
     k: int,
@@ -119,11 +181,24 @@ def query_doc_with_hybrid_search(
 ) -> dict:
     try:
         log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=collection_result.documents[0],
-            metadatas=collection_result.metadatas[0],
-        )
-        bm25_retriever.k = k
+        if ENABLE_RAG_BM25_INDEX and ensure_bm25_index(
+            collection_name, collection_result
+        ):
+            bm25_retriever = BM25IndexRetriever(
+                collection_name=collection_name,
+                top_k=k,
+            )
+        else:
+            if collection_result is None:
+                collection_result = VECTOR_DB_CLIENT.get(
+                    collection_name=collection_name
+                )
+
+            bm25_retriever = BM25Retriever.from_texts(
+                texts=collection_result.documents[0],
+                metadatas=collection_result.metadatas[0],
+            )
+            bm25_retriever.k = k
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
@@ -201,23 +276,23 @@ def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
     combined = dict()  # To store documents with unique document hashes
 
     for data in query_results:
-        distances = data["distances"][0]
-        documents = data["documents"][0]
-        metadatas = data["metadatas"][0]
-
-        for distance, document, metadata in zip(distances, documents, metadatas):
-            if isinstance(document, str):
-                doc_hash = hashlib.md5(
-                    document.encode()
-                ).hexdigest()  # Compute a hash for uniqueness
+        # Multi-vector searches return one row per query vector
+        for distances, documents, metadatas in zip(
+            data["distances"], data["documents"], data["metadatas"]
+        ):
+            for distance, document, metadata in zip(distances, documents, metadatas):
+                if isinstance(document, str):
+                    doc_hash = hashlib.md5(
+                        document.encode()
+                    ).hexdigest()  # Compute a hash for uniqueness
 
-                if doc_hash not in combined.keys():
-                    combined[doc_hash] = (distance, document, metadata)
-                    continue  # if doc is new, no further comparison is needed
+                    if doc_hash not in combined.keys():
+                        combined[doc_hash] = (distance, document, metadata)
+                        continue  # if doc is new, no further comparison is needed
 
-                # if doc is alredy in, but new distance is better, update
-                if distance > combined[doc_hash][0]:
-                    combined[doc_hash] = (distance, document, metadata)
+                    # if doc is alredy in, but new distance is better, update
+                    if distance > combined[doc_hash][0]:
+                        combined[doc_hash] = (distance, document, metadata)
 
     combined = list(combined.values())
     # Sort the list based on distances
@@ -260,24 +335,39 @@ def query_collection(
     k: int,
 ) -> dict:
     results = []
-    for query in queries:
-        log.debug(f"query_collection:query {query}")
-        query_embedding = embedding_function(query, prefix=RAG_EMBEDDING_QUERY_PREFIX)
-        for collection_name in collection_names:
-            if collection_name:
-                try:
-                    result = query_doc(
-                        collection_name=collection_name,
-                        k=k,
-                        query_embedding=query_embedding,
-                    )
-                    if result is not None:
-                        results.append(result.model_dump())
-                except Exception as e:
-                    log.exception(f"Error when querying the collection: {e}")
-            else:
-                pass
+    collection_names = [name for name in collection_names if name]
+    if not queries or not collection_names:
+        return merge_and_sort_query_results(results, k=k)
+
+    # All queries are embedded with one call and sent as one multi-vector search
+    # per collection, collections are searched concurrently
+    log.debug(f"query_collection:queries {queries}")
+    query_embeddings = embedding_function(queries, prefix=RAG_EMBEDDING_QUERY_PREFIX)
+    if not query_embeddings:
+        log.error("Error when embedding the queries")
+        return merge_and_sort_query_results(results, k=k)
+
+    def process_query_collection(collection_name):
+        try:
+            log.debug(f"query_collection:collection {collection_name}")
+            result = VECTOR_DB_CLIENT.search(
+                collection_name=collection_name,
+                vectors=query_embeddings,
+                limit=k,
+            )
+            return result.model_dump() if result is not None else None
+        except Exception as e:
+            log.exception(f"Error when querying the collection: {e}")
+            return None
 
+    with ThreadPoolExecutor() as executor:
+        future_results = [
+            executor.submit(process_query_collection, collection_name)
+            for collection_name in collection_names
+        ]
+        task_results = [future.result() for future in future_results]
+
+    results = [result for result in task_results if result is not None]
     return merge_and_sort_query_results(results, k=k)
 
 
@@ -295,17 +385,25 @@ def query_collection_with_hybrid_search(
     # Fetch collection data once per collection sequentially
     # Avoid fetching the same data multiple times later
     collection_results = {}
+    failed_collections = set()
     for collection_name in collection_names:
         try:
+            if ENABLE_RAG_BM25_INDEX and ensure_bm25_index(collection_name):
+                # The persistent BM25 index replaces the full collection fetch
+                collection_results[collection_name] = None
+                continue
+
             log.debug(
                 f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
             )
             collection_results[collection_name] = VECTOR_DB_CLIENT.get(
                 collection_name=collection_name
             )
+            if collection_results[collection_name] is None:
+                failed_collections.add(collection_name)
         except Exception as e:
             log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
+            failed_collections.add(collection_name)
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
@@ -329,11 +427,11 @@ def query_collection_with_hybrid_search(
             return None, e
 
     # Prepare tasks for all collections and queries
-    # Avoid running any tasks for collections that failed to fetch data (have assigned None)
+    # Avoid running any tasks for collections that failed to fetch data
     tasks = [
         (cn, q)
         for cn in collection_names
-        if collection_results[cn] is not None
+        if cn not in failed_collections
         for q in queries
     ]
 
@@ -355,6 +453,114 @@ def query_collection_with_hybrid_search(
     return merge_and_sort_query_results(results, k=k)
 
 
+def is_valid_embedding_result(batch, result) -> bool:
+    if result is None:
+        return False
+    if isinstance(batch, list):
+        return isinstance(result, list) and len(result) == len(batch)
+    return True
+
+
+def generate_embedding_batch_with_retry(func: Callable, batch):
+    """
+    Calls func(batch), retrying failed calls with exponential backoff.
+    Returns None once RAG_EMBEDDING_BATCH_MAX_RETRIES retries have failed.
+    """
+    for attempt in range(RAG_EMBEDDING_BATCH_MAX_RETRIES + 1):
+        try:
+            result = func(batch)
+            if is_valid_embedding_result(batch, result):
+                return result
+        except Exception as e:
+            log.warning(f"Error generating embeddings: {e}")
+
+        if attempt < RAG_EMBEDDING_BATCH_MAX_RETRIES:
+            log.warning(
+                f"Embedding batch failed, retrying ({attempt + 1}/{RAG_EMBEDDING_BATCH_MAX_RETRIES})"
+            )
+            time.sleep(2**attempt)
+
+    log.error("Embedding batch failed after retries")
+    return None
+
+
+def generate_embedding_batches(
+    batches: list, func: Callable, max_in_flight: int = RAG_EMBEDDING_MAX_IN_FLIGHT
+) -> Optional[list]:
+    """
+    Embeds batches with at most `max_in_flight` requests at a time.
+    Results are returned in the order of the batches, or None if a batch failed.
+    """
+    if len(batches) <= 1 or max_in_flight <= 1:
+        results = []
+        for batch in batches:
+            result = generate_embedding_batch_with_retry(func, batch)
+            if result is None:
+                return None
+            results.append(result)
+        return results
+
+    with ThreadPoolExecutor(max_workers=min(max_in_flight, len(batches))) as executor:
+        futures = [
+            executor.submit(generate_embedding_batch_with_retry, func, batch)
+            for batch in batches
+        ]
+
+        results = []
+        for future in futures:
+            result = future.result()
+            if result is None:
+                for pending in futures:
+                    pending.cancel()
+                return None
+            results.append(result)
+        return results
+
+
+async def generate_embedding_batches_async(
+    batches: list, func: Callable, max_in_flight: int = RAG_EMBEDDING_MAX_IN_FLIGHT
+) -> Optional[list]:
+    """
+    Async variant of generate_embedding_batches, the blocking calls run in
+    worker threads so the event loop is not held up. Failed batches are not
+    retried here, `func` is expected to retry them like the embedding functions.
+    """
+    semaphore = asyncio.Semaphore(max(max_in_flight, 1))
+
+    async def generate(batch):
+        async with semaphore:
+            result = await asyncio.to_thread(func, batch)
+            if not is_valid_embedding_result(batch, result):
+                raise Exception("Embedding batch failed")
+            return result
+
+    tasks = [asyncio.create_task(generate(batch)) for batch in batches]
+    try:
+        return await asyncio.gather(*tasks)
+    except Exception as e:
+        log.error(e)
+        for task in tasks:
+            task.cancel()
+        return None
+
+
+async def generate_embeddings_async(
+    embedding_function: Callable,
+    texts: list[str],
+    batch_size: int,
+    prefix: Optional[str] = None,
+    user=None,
+) -> Optional[list[list[float]]]:
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    results = await generate_embedding_batches_async(
+        batches,
+        lambda batch: embedding_function(batch, prefix=prefix, user=user),
+    )
+    if results is None:
+        return None
+    return [embedding for result in results for embedding in result]
+
+
 def get_embedding_function(
     embedding_engine,
     embedding_model,
@@ -364,9 +570,12 @@ def get_embedding_function(
     embedding_batch_size,
 ):
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
+        func = lambda query, prefix=None, user=None: embedding_function.encode(
             query, **({"prompt": prefix} if prefix else {})
         ).tolist()
+        return get_cached_embedding_function(
+            func, embedding_engine, embedding_model, EMBEDDING_CACHE
+        )
     elif embedding_engine in ["ollama", "openai"]:
         func = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
@@ -380,21 +589,28 @@ def get_embedding_function(
 
         def generate_multiple(query, prefix, user, func):
             if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    embeddings.extend(
-                        func(
-                            query[i : i + embedding_batch_size],
-                            prefix=prefix,
-                            user=user,
-                        )
-                    )
-                return embeddings
+                batches = [
+                    query[i : i + embedding_batch_size]
+                    for i in range(0, len(query), embedding_batch_size)
+                ]
+                results = generate_embedding_batches(
+                    batches, lambda batch: func(batch, prefix=prefix, user=user)
+                )
+                if results is None:
+                    return None
+                return [embedding for result in results for embedding in result]
             else:
-                return func(query, prefix, user)
+                return generate_embedding_batch_with_retry(
+                    lambda query: func(query, prefix=prefix, user=user), query
+                )
 
-        return lambda query, prefix=None, user=None: generate_multiple(
-            query, prefix, user, func
+        return get_cached_embedding_function(
+            lambda query, prefix=None, user=None: generate_multiple(
+                query, prefix, user, func
+            ),
+            embedding_engine,
+            embedding_model,
+            EMBEDDING_CACHE,
         )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
@@ -628,7 +844,7 @@ def generate_openai_batch_embeddings(
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        r = requests.post(
+        r = EMBEDDING_SESSION.post(
             f"{url}/embeddings",
             headers={
                 "Content-Type": "application/json",
@@ -673,7 +889,7 @@ def generate_ollama_batch_embeddings(
         if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
             json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
 
-        r = requests.post(
+        r = EMBEDDING_SESSION.post(
             f"{url}/api/embed",
             headers={
                 "Content-Type": "application/json",
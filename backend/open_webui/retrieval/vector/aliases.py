@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.models.knowledge_index import KnowledgeIndexes
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Seconds other nodes may keep querying a collection after it was swapped out
+ALIAS_TTL = 10
+
+
+class CollectionAliasClient:
+    """
+    Vector DB client resolving the collection names of knowledge bases to the
+    collections they are stored in, which reindexing swaps in one step once a new
+    collection is complete. Other collections are accessed under their own name.
+    """
+
+    def __init__(self, client, ttl: float = ALIAS_TTL):
+        self.client = client
+        self.ttl = ttl
+
+        self._aliases: dict[str, str] = {}
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._expires_at = 0.0
+
+    def resolve(self, collection_name: str) -> str:
+        if time.monotonic() >= self._expires_at:
+            with self._lock:
+                if time.monotonic() >= self._expires_at:
+                    try:
+                        self._aliases = KnowledgeIndexes.get_collection_names()
+                    except Exception as e:
+                        log.warning(f"Unable to load collection aliases: {e}")
+                    self._expires_at = time.monotonic() + self.ttl
+
+        return self._aliases.get(collection_name, collection_name)
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self.client.has_collection(self.resolve(collection_name))
+
+    def delete_collection(self, collection_name: str):
+        resolved = self.resolve(collection_name)
+        if resolved != collection_name:
+            KnowledgeIndexes.delete_index_by_id(collection_name)
+            self.invalidate()
+        return self.client.delete_collection(resolved)
+
+    def search(self, collection_name: str, *args, **kwargs):
+        return self.client.search(self.resolve(collection_name), *args, **kwargs)
+
+    def query(self, collection_name: str, *args, **kwargs):
+        return self.client.query(self.resolve(collection_name), *args, **kwargs)
+
+    def get(self, collection_name: str, *args, **kwargs):
+        return self.client.get(self.resolve(collection_name), *args, **kwargs)
+
+    def count(self, collection_name: str) -> Optional[int]:
+        return self.client.count(self.resolve(collection_name))
+
+    def insert(self, collection_name: str, *args, **kwargs):
+        return self.client.insert(self.resolve(collection_name), *args, **kwargs)
+
+    def upsert(self, collection_name: str, *args, **kwargs):
+        return self.client.upsert(self.resolve(collection_name), *args, **kwargs)
+
+    def delete(self, collection_name: str, *args, **kwargs):
+        return self.client.delete(self.resolve(collection_name), *args, **kwargs)
+
+    def reset(self):
+        KnowledgeIndexes.delete_all_indexes()
+        self.invalidate()
+        return self.client.reset()
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
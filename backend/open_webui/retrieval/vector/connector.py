@@ -1,4 +1,5 @@
 from open_webui.config import VECTOR_DB
+from open_webui.retrieval.vector.aliases import CollectionAliasClient
 
 if VECTOR_DB == "milvus":
     from open_webui.retrieval.vector.dbs.milvus import MilvusClient
@@ -24,3 +25,6 @@ else:
     from open_webui.retrieval.vector.dbs.chroma import ChromaClient
 
     VECTOR_DB_CLIENT = ChromaClient()
+
+# Knowledge bases are queried under their id, whichever collection holds them
+VECTOR_DB_CLIENT = CollectionAliasClient(VECTOR_DB_CLIENT)
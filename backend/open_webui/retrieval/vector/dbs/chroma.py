@@ -77,9 +77,9 @@ class ChromaClient:
 
                 # chromadb has cosine distance, 2 (worst) -> 0 (best). Re-odering to 0 -> 1
                 # https://docs.trychroma.com/docs/collections/configure cosine equation
-                distances: list = result["distances"][0]
-                distances = [2 - dist for dist in distances]
-                distances = [[dist / 2 for dist in distances]]
+                distances = [
+                    [(2 - dist) / 2 for dist in row] for row in result["distances"]
+                ]
 
                 return SearchResult(
                     **{
@@ -130,6 +130,13 @@ class ChromaClient:
             )
         return None
 
+    def count(self, collection_name: str) -> Optional[int]:
+        # Count the items in the collection.
+        try:
+            return self.client.get_collection(name=collection_name).count()
+        except Exception:
+            return None
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection = self.client.get_or_create_collection(
@@ -148,29 +148,43 @@ class ElasticsearchClient:
     def search(
         self, collection_name: str, vectors: list[list[float]], limit: int
     ) -> Optional[SearchResult]:
-        query = {
-            "size": limit,
-            "_source": ["text", "metadata"],
-            "query": {
-                "script_score": {
+        # One search per query vector, sent in a single multi-search request
+        searches = []
+        for vector in vectors:
+            searches.append({"index": self._get_index_name(len(vector))})
+            searches.append(
+                {
+                    "size": limit,
+                    "_source": ["text", "metadata"],
                     "query": {
-                        "bool": {"filter": [{"term": {"collection": collection_name}}]}
-                    },
-                    "script": {
-                        "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
-                        "params": {
-                            "vector": vectors[0]
-                        },  # Assuming single query vector
+                        "script_score": {
+                            "query": {
+                                "bool": {
+                                    "filter": [
+                                        {"term": {"collection": collection_name}}
+                                    ]
+                                }
+                            },
+                            "script": {
+                                "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
+                                "params": {"vector": vector},
+                            },
+                        }
                     },
                 }
-            },
-        }
+            )
 
-        result = self.client.search(
-            index=self._get_index_name(len(vectors[0])), body=query
-        )
+        result = self.client.msearch(body=searches)
 
-        return self._result_to_search_result(result)
+        results = [
+            self._result_to_search_result(response) for response in result["responses"]
+        ]
+        return SearchResult(
+            ids=[result.ids[0] for result in results],
+            distances=[result.distances[0] for result in results],
+            documents=[result.documents[0] for result in results],
+            metadatas=[result.metadatas[0] for result in results],
+        )
 
     # Status: only tested halfwat
     def query(
@@ -224,6 +238,16 @@ class ElasticsearchClient:
 
         return self._scan_result_to_get_result(results)
 
+    def count(self, collection_name: str) -> Optional[int]:
+        # Count the items in the collection.
+        try:
+            return self.client.count(
+                index=f"{self.index_prefix}*",
+                query={"bool": {"filter": [{"term": {"collection": collection_name}}]}},
+            )["count"]
+        except Exception:
+            return None
+
     # Status: works
     def insert(self, collection_name: str, items: list[VectorItem]):
         if not self._has_index(dimension=len(items[0]["vector"])):
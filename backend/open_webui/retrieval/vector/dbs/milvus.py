@@ -219,6 +219,18 @@ class MilvusClient:
         )
         return self._result_to_get_result([result])
 
+    def count(self, collection_name: str) -> Optional[int]:
+        # Count the items in the collection.
+        collection_name = collection_name.replace("-", "_")
+        try:
+            result = self.client.query(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                output_fields=["count(*)"],
+            )
+            return result[0]["count(*)"]
+        except Exception:
+            return None
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection_name = collection_name.replace("-", "_")
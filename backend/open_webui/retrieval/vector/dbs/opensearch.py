@@ -113,28 +113,44 @@ class OpenSearchClient:
             if not self.has_collection(collection_name):
                 return None
 
-            query = {
-                "size": limit,
-                "_source": ["text", "metadata"],
-                "query": {
-                    "script_score": {
-                        "query": {"match_all": {}},
-                        "script": {
-                            "source": "(cosineSimilarity(params.query_value, doc[params.field]) + 1.0) / 2.0",
-                            "params": {
-                                "field": "vector",
-                                "query_value": vectors[0],
-                            },  # Assuming single query vector
+            # One search per query vector, sent in a single multi-search request
+            searches = []
+            for vector in vectors:
+                searches.append({"index": self._get_index_name(collection_name)})
+                searches.append(
+                    {
+                        "size": limit,
+                        "_source": ["text", "metadata"],
+                        "query": {
+                            "script_score": {
+                                "query": {"match_all": {}},
+                                "script": {
+                                    "source": "(cosineSimilarity(params.query_value, doc[params.field]) + 1.0) / 2.0",
+                                    "params": {
+                                        "field": "vector",
+                                        "query_value": vector,
+                                    },
+                                },
+                            }
                         },
                     }
-                },
-            }
+                )
 
-            result = self.client.search(
-                index=self._get_index_name(collection_name), body=query
-            )
+            result = self.client.msearch(body=searches)
+
+            results = [
+                self._result_to_search_result(response)
+                for response in result["responses"]
+            ]
+            if not any(results):
+                return None
 
-            return self._result_to_search_result(result)
+            return SearchResult(
+                ids=[result.ids[0] if result else [] for result in results],
+                distances=[result.distances[0] if result else [] for result in results],
+                documents=[result.documents[0] if result else [] for result in results],
+                metadatas=[result.metadatas[0] if result else [] for result in results],
+            )
 
         except Exception as e:
             return None
@@ -181,6 +197,14 @@ class OpenSearchClient:
         )
         return self._result_to_get_result(result)
 
+    def count(self, collection_name: str) -> Optional[int]:
+        try:
+            return self.client.count(index=self._get_index_name(collection_name))[
+                "count"
+            ]
+        except Exception:
+            return None
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         self._create_index_if_not_exists(
             collection_name=collection_name, dimension=len(items[0]["vector"])
@@ -347,6 +347,18 @@ class PgvectorClient:
             log.exception(f"Error during get: {e}")
             return None
 
+    def count(self, collection_name: str) -> Optional[int]:
+        try:
+            return (
+                self.session.query(DocumentChunk)
+                .filter(DocumentChunk.collection_name == collection_name)
+                .count()
+            )
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during count: {e}")
+            return None
+
     def delete(
         self,
         collection_name: str,
@@ -89,18 +89,28 @@ class QdrantClient:
         if limit is None:
             limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
 
-        query_response = self.client.query_points(
+        # One request per query vector, sent as a single batch
+        query_responses = self.client.query_batch_points(
             collection_name=f"{self.collection_prefix}_{collection_name}",
-            query=vectors[0],
-            limit=limit,
+            requests=[
+                models.QueryRequest(query=vector, limit=limit, with_payload=True)
+                for vector in vectors
+            ],
         )
-        get_result = self._result_to_get_result(query_response.points)
+
+        results = [
+            self._result_to_get_result(query_response.points)
+            for query_response in query_responses
+        ]
         return SearchResult(
-            ids=get_result.ids,
-            documents=get_result.documents,
-            metadatas=get_result.metadatas,
+            ids=[result.ids[0] for result in results],
+            documents=[result.documents[0] for result in results],
+            metadatas=[result.metadatas[0] for result in results],
             # qdrant distance is [-1, 1], normalize to [0, 1]
-            distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
+            distances=[
+                [(point.score + 1.0) / 2.0 for point in query_response.points]
+                for query_response in query_responses
+            ],
         )
 
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
@@ -137,6 +147,16 @@ class QdrantClient:
         )
         return self._result_to_get_result(points.points)
 
+    def count(self, collection_name: str) -> Optional[int]:
+        # Count the items in the collection.
+        try:
+            return self.client.count(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                exact=True,
+            ).count
+        except Exception:
+            return None
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         self._create_collection_if_not_exists(collection_name, len(items[0]["vector"]))
@@ -2,11 +2,14 @@ import hashlib
 import json
 import logging
 import os
+import tempfile
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import lru_cache
 from pathlib import Path
+from typing import Callable, Optional
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
+from pydub.silence import detect_nonsilent
 
 import aiohttp
 import aiofiles
@@ -42,6 +45,8 @@ from open_webui.env import (
     SRC_LOG_LEVELS,
     DEVICE_TYPE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    AUDIO_STT_CHUNK_DURATION,
+    AUDIO_STT_CONCURRENCY,
 )
 
 
@@ -106,6 +111,8 @@ def set_faster_whisper_model(model: str, auto_update: bool = False):
             "model_size_or_path": model,
             "device": DEVICE_TYPE if DEVICE_TYPE and DEVICE_TYPE == "cuda" else "cpu",
             "compute_type": "int8",
+            # Chunks of long recordings are transcribed from several threads
+            "num_workers": max(AUDIO_STT_CONCURRENCY, 1),
             "download_root": WHISPER_MODEL_DIR,
             "local_files_only": not auto_update,
         }
@@ -484,7 +491,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         return FileResponse(file_path)
 
 
-def transcribe(request: Request, file_path):
+def transcribe_file(request: Request, file_path):
     log.info(f"transcribe: {file_path}")
     filename = os.path.basename(file_path)
     file_dir = os.path.dirname(file_path)
@@ -507,8 +514,15 @@ def transcribe(request: Request, file_path):
             % (info.language, info.language_probability)
         )
 
-        transcript = "".join([segment.text for segment in list(segments)])
-        data = {"text": transcript.strip()}
+        segments = list(segments)
+        transcript = "".join([segment.text for segment in segments])
+        data = {
+            "text": transcript.strip(),
+            "segments": [
+                {"start": segment.start, "end": segment.end, "text": segment.text}
+                for segment in segments
+            ],
+        }
 
         # save the transcript to a json file
         transcript_file = f"{file_dir}/{id}.json"
@@ -739,19 +753,153 @@ def transcribe(request: Request, file_path):
             )
 
 
+def get_audio_duration(file_path) -> Optional[float]:
+    try:
+        return float(mediainfo(file_path).get("duration"))
+    except Exception:
+        return None
+
+
+def split_audio(audio: AudioSegment, max_duration: int) -> list[tuple[int, int]]:
+    """
+    Splits the audio in chunks of at most `max_duration` milliseconds, cut in the
+    middle of the longest silences possible so words are not cut in half.
+    Returns the start and end of each chunk, in milliseconds.
+    """
+    duration = len(audio)
+    if duration <= max_duration:
+        return [(0, duration)]
+
+    cuts = []
+    previous_end = None
+    for start, end in detect_nonsilent(
+        audio,
+        min_silence_len=500,
+        silence_thresh=audio.dBFS - 16,
+        seek_step=100,
+    ):
+        if previous_end is not None:
+            cuts.append((previous_end + start) // 2)
+        previous_end = end
+
+    chunks = []
+    start = 0
+    while duration - start > max_duration:
+        # Recordings without silences are cut at the maximum duration
+        end = max(
+            (cut for cut in cuts if start < cut <= start + max_duration),
+            default=start + max_duration,
+        )
+        chunks.append((start, end))
+        start = end
+    chunks.append((start, duration))
+    return chunks
+
+
+def transcribe(
+    request: Request,
+    file_path,
+    on_progress: Optional[Callable[[int, int, str], None]] = None,
+):
+    """
+    Transcribes the file, splitting recordings longer than AUDIO_STT_CHUNK_DURATION
+    in chunks transcribed concurrently. `on_progress` is called with the number of
+    chunks transcribed, the number of chunks, and the transcript of the chunks
+    transcribed so far from the start.
+    """
+    # 16kHz mono wav chunks take 32KB per second, kept under the OpenAI limit
+    max_duration = min(AUDIO_STT_CHUNK_DURATION, MAX_FILE_SIZE // 32000 - 1) * 1000
+
+    duration = get_audio_duration(file_path)
+    if duration is None or duration * 1000 <= max_duration:
+        data = transcribe_file(request, file_path)
+        if on_progress:
+            on_progress(1, 1, data.get("text", ""))
+        return data
+
+    filename = os.path.basename(file_path)
+    file_dir = os.path.dirname(file_path)
+    id = filename.split(".")[0]
+
+    audio = AudioSegment.from_file(file_path).set_frame_rate(16000).set_channels(1)
+    chunks = split_audio(audio, max_duration)
+    log.info(f"transcribe: {file_path} in {len(chunks)} chunks")
+
+    results = [None] * len(chunks)
+    with tempfile.TemporaryDirectory(dir=file_dir) as chunk_dir:
+
+        def transcribe_chunk(index: int) -> dict:
+            start, end = chunks[index]
+            chunk_path = f"{chunk_dir}/{id}_{index}.wav"
+            audio[start:end].export(chunk_path, format="wav")
+            return transcribe_file(request, chunk_path)
+
+        executor = ThreadPoolExecutor(max_workers=max(AUDIO_STT_CONCURRENCY, 1))
+        try:
+            futures = {
+                executor.submit(transcribe_chunk, index): index
+                for index in range(len(chunks))
+            }
+
+            done = 0
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                done += 1
+
+                if on_progress:
+                    transcribed = []
+                    for result in results:
+                        if result is None:
+                            break
+                        transcribed.append(result.get("text", "").strip())
+                    on_progress(done, len(chunks), " ".join(filter(None, transcribed)))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    # Timestamps of the chunks are offset by the start of the chunk
+    segments = []
+    for (start, end), result in zip(chunks, results):
+        offset = start / 1000
+        if result.get("segments"):
+            segments.extend(
+                {
+                    "start": segment["start"] + offset,
+                    "end": segment["end"] + offset,
+                    "text": segment["text"],
+                }
+                for segment in result["segments"]
+            )
+        else:
+            segments.append(
+                {"start": offset, "end": end / 1000, "text": result.get("text", "")}
+            )
+
+    data = {
+        "text": " ".join(
+            filter(None, [result.get("text", "").strip() for result in results])
+        ),
+        "segments": segments,
+    }
+
+    # save the transcript to a json file
+    transcript_file = f"{file_dir}/{id}.json"
+    with open(transcript_file, "w") as f:
+        json.dump(data, f)
+
+    return data
+
+
 def compress_audio(file_path):
     if os.path.getsize(file_path) > MAX_FILE_SIZE:
         file_dir = os.path.dirname(file_path)
+        id = os.path.basename(file_path).split(".")[0]
         audio = AudioSegment.from_file(file_path)
         audio = audio.set_frame_rate(16000).set_channels(1)  # Compress audio
         compressed_path = f"{file_dir}/{id}_compressed.opus"
         audio.export(compressed_path, format="opus", bitrate="32k")
         log.debug(f"Compressed audio to {compressed_path}")
 
-        if (
-            os.path.getsize(compressed_path) > MAX_FILE_SIZE
-        ):  # Still larger than MAX_FILE_SIZE after compression
-            raise Exception(ERROR_MESSAGES.FILE_TOO_LARGE(size=f"{MAX_FILE_SIZE_MB}MB"))
+        # Files still larger than MAX_FILE_SIZE are transcribed in chunks
         return compressed_path
     else:
         return file_path
@@ -6,7 +6,9 @@ from typing import Optional
 from open_webui.socket.main import get_event_emitter
 from open_webui.models.chats import (
     ChatForm,
+    ChatHistoryResponse,
     ChatImportForm,
+    ChatMessageListResponse,
     ChatResponse,
     Chats,
     ChatTitleIdResponse,
@@ -353,6 +355,37 @@ async def get_chat_by_id(id: str, user=Depends(get_verified_user)):
         )
 
 
+############################
+# GetChatHistoryById
+############################
+
+
+@router.get("/{id}/history", response_model=Optional[ChatHistoryResponse])
+async def get_chat_history_by_id(id: str, user=Depends(get_verified_user)):
+    if Chats.get_chat_user_id_by_id(id) == user.id:
+        history = Chats.get_chat_history_by_id(id)
+        if history:
+            return history
+
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.NOT_FOUND
+    )
+
+
+@router.get("/{id}/history/branches", response_model=Optional[ChatMessageListResponse])
+async def get_chat_inactive_messages_by_id(
+    id: str, skip: int = 0, limit: int = 50, user=Depends(get_verified_user)
+):
+    if Chats.get_chat_user_id_by_id(id) == user.id:
+        messages = Chats.get_inactive_messages_by_id(id, skip, limit)
+        if messages:
+            return messages
+
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, detail=ERROR_MESSAGES.NOT_FOUND
+    )
+
+
 ############################
 # UpdateChatById
 ############################
@@ -9,11 +9,17 @@ from open_webui.models.functions import (
     FunctionResponse,
     Functions,
 )
-from open_webui.utils.plugin import load_function_module_by_id, replace_imports
+from open_webui.utils.plugin import (
+    PLUGINS,
+    get_function_module,
+    load_function_module_by_id,
+    replace_imports,
+)
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.model_catalog import MODEL_CATALOG
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
@@ -69,8 +75,7 @@ async def create_new_function(
             )
             form_data.meta.manifest = frontmatter
 
-            FUNCTIONS = request.app.state.FUNCTIONS
-            FUNCTIONS[form_data.id] = function_module
+            PLUGINS.set_module("function", form_data.id, function_module)
 
             function = Functions.insert_new_function(user.id, function_type, form_data)
 
@@ -78,6 +83,7 @@ async def create_new_function(
             function_cache_dir.mkdir(parents=True, exist_ok=True)
 
             if function:
+                MODEL_CATALOG.invalidate("models")
                 return function
             else:
                 raise HTTPException(
@@ -129,6 +135,7 @@ async def toggle_function_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            MODEL_CATALOG.invalidate("models")
             return function
         else:
             raise HTTPException(
@@ -156,6 +163,7 @@ async def toggle_global_by_id(id: str, user=Depends(get_admin_user)):
         )
 
         if function:
+            MODEL_CATALOG.invalidate("models")
             return function
         else:
             raise HTTPException(
@@ -185,8 +193,7 @@ async def update_function_by_id(
         )
         form_data.meta.manifest = frontmatter
 
-        FUNCTIONS = request.app.state.FUNCTIONS
-        FUNCTIONS[id] = function_module
+        PLUGINS.set_module("function", id, function_module)
 
         updated = {**form_data.model_dump(exclude={"id"}), "type": function_type}
         log.debug(updated)
@@ -194,6 +201,7 @@ async def update_function_by_id(
         function = Functions.update_function_by_id(id, updated)
 
         if function:
+            MODEL_CATALOG.invalidate("models")
             return function
         else:
             raise HTTPException(
@@ -220,9 +228,8 @@ async def delete_function_by_id(
     result = Functions.delete_function_by_id(id)
 
     if result:
-        FUNCTIONS = request.app.state.FUNCTIONS
-        if id in FUNCTIONS:
-            del FUNCTIONS[id]
+        PLUGINS.remove_module("function", id)
+        MODEL_CATALOG.invalidate("models")
 
     return result
 
@@ -262,11 +269,7 @@ async def get_function_valves_spec_by_id(
 ):
     function = Functions.get_function_by_id(id)
     if function:
-        if id in request.app.state.FUNCTIONS:
-            function_module = request.app.state.FUNCTIONS[id]
-        else:
-            function_module, function_type, frontmatter = load_function_module_by_id(id)
-            request.app.state.FUNCTIONS[id] = function_module
+        function_module = get_function_module(id)
 
         if hasattr(function_module, "Valves"):
             Valves = function_module.Valves
@@ -290,11 +293,7 @@ async def update_function_valves_by_id(
 ):
     function = Functions.get_function_by_id(id)
     if function:
-        if id in request.app.state.FUNCTIONS:
-            function_module = request.app.state.FUNCTIONS[id]
-        else:
-            function_module, function_type, frontmatter = load_function_module_by_id(id)
-            request.app.state.FUNCTIONS[id] = function_module
+        function_module = get_function_module(id)
 
         if hasattr(function_module, "Valves"):
             Valves = function_module.Valves
@@ -303,6 +302,9 @@ async def update_function_valves_by_id(
                 form_data = {k: v for k, v in form_data.items() if v is not None}
                 valves = Valves(**form_data)
                 Functions.update_function_valves_by_id(id, valves.model_dump())
+                PLUGINS.invalidate("function", id)
+                # Pipes may list their models from the valves
+                MODEL_CATALOG.invalidate("models")
                 return valves.model_dump()
             except Exception as e:
                 log.exception(f"Error updating function values by id {id}: {e}")
@@ -353,11 +355,7 @@ async def get_function_user_valves_spec_by_id(
 ):
     function = Functions.get_function_by_id(id)
     if function:
-        if id in request.app.state.FUNCTIONS:
-            function_module = request.app.state.FUNCTIONS[id]
-        else:
-            function_module, function_type, frontmatter = load_function_module_by_id(id)
-            request.app.state.FUNCTIONS[id] = function_module
+        function_module = get_function_module(id)
 
         if hasattr(function_module, "UserValves"):
             UserValves = function_module.UserValves
@@ -377,11 +375,7 @@ async def update_function_user_valves_by_id(
     function = Functions.get_function_by_id(id)
 
     if function:
-        if id in request.app.state.FUNCTIONS:
-            function_module = request.app.state.FUNCTIONS[id]
-        else:
-            function_module, function_type, frontmatter = load_function_module_by_id(id)
-            request.app.state.FUNCTIONS[id] = function_module
+        function_module = get_function_module(id)
 
         if hasattr(function_module, "UserValves"):
             UserValves = function_module.UserValves
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
+import asyncio
 import logging
 from typing import Optional
 
 from open_webui.models.memories import Memories, MemoryModel
+from open_webui.retrieval.bm25 import BM25_INDEX
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.retrieval.utils import generate_embeddings_async
 from open_webui.utils.auth import get_verified_user
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -17,7 +20,11 @@ router = APIRouter()
 
 @router.get("/ef")
 async def get_embeddings(request: Request):
-    return {"result": request.app.state.EMBEDDING_FUNCTION("hello world")}
+    return {
+        "result": await asyncio.to_thread(
+            request.app.state.EMBEDDING_FUNCTION, "hello world"
+        )
+    }
 
 
 ############################
@@ -50,6 +57,9 @@ async def add_memory(
     user=Depends(get_verified_user),
 ):
     memory = Memories.insert_new_memory(user.id, form_data.content)
+    vector = await asyncio.to_thread(
+        request.app.state.EMBEDDING_FUNCTION, memory.content, user=user
+    )
 
     VECTOR_DB_CLIENT.upsert(
         collection_name=f"user-memory-{user.id}",
@@ -57,9 +67,17 @@ async def add_memory(
             {
                 "id": memory.id,
                 "text": memory.content,
-                "vector": request.app.state.EMBEDDING_FUNCTION(
-                    memory.content, user=user
-                ),
+                "vector": vector,
+                "metadata": {"created_at": memory.created_at},
+            }
+        ],
+    )
+    BM25_INDEX.add(
+        f"user-memory-{user.id}",
+        [
+            {
+                "id": memory.id,
+                "text": memory.content,
                 "metadata": {"created_at": memory.created_at},
             }
         ],
@@ -82,9 +100,12 @@ class QueryMemoryForm(BaseModel):
 async def query_memory(
     request: Request, form_data: QueryMemoryForm, user=Depends(get_verified_user)
 ):
+    vector = await asyncio.to_thread(
+        request.app.state.EMBEDDING_FUNCTION, form_data.content, user=user
+    )
     results = VECTOR_DB_CLIENT.search(
         collection_name=f"user-memory-{user.id}",
-        vectors=[request.app.state.EMBEDDING_FUNCTION(form_data.content, user=user)],
+        vectors=[vector],
         limit=form_data.k,
     )
 
@@ -99,23 +120,31 @@ async def reset_memory_from_vector_db(
     request: Request, user=Depends(get_verified_user)
 ):
     VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
+    BM25_INDEX.drop(f"user-memory-{user.id}")
 
     memories = Memories.get_memories_by_user_id(user.id)
+    vectors = await generate_embeddings_async(
+        request.app.state.EMBEDDING_FUNCTION,
+        [memory.content for memory in memories],
+        request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+        user=user,
+    )
+    if vectors is None:
+        return False
+
     VECTOR_DB_CLIENT.upsert(
         collection_name=f"user-memory-{user.id}",
         items=[
             {
                 "id": memory.id,
                 "text": memory.content,
-                "vector": request.app.state.EMBEDDING_FUNCTION(
-                    memory.content, user=user
-                ),
+                "vector": vector,
                 "metadata": {
                     "created_at": memory.created_at,
                     "updated_at": memory.updated_at,
                 },
             }
-            for memory in memories
+            for memory, vector in zip(memories, vectors)
         ],
     )
 
@@ -134,6 +163,7 @@ async def delete_memory_by_user_id(user=Depends(get_verified_user)):
     if result:
         try:
             VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
+            BM25_INDEX.drop(f"user-memory-{user.id}")
         except Exception as e:
             log.error(e)
         return True
@@ -160,15 +190,16 @@ async def update_memory_by_id(
         raise HTTPException(status_code=404, detail="Memory not found")
 
     if form_data.content is not None:
+        vector = await asyncio.to_thread(
+            request.app.state.EMBEDDING_FUNCTION, memory.content, user=user
+        )
         VECTOR_DB_CLIENT.upsert(
             collection_name=f"user-memory-{user.id}",
             items=[
                 {
                     "id": memory.id,
                     "text": memory.content,
-                    "vector": request.app.state.EMBEDDING_FUNCTION(
-                        memory.content, user=user
-                    ),
+                    "vector": vector,
                     "metadata": {
                         "created_at": memory.created_at,
                         "updated_at": memory.updated_at,
@@ -176,6 +207,8 @@ async def update_memory_by_id(
                 }
             ],
         )
+        # Rebuilt on its next use, the index cannot replace a document in place
+        BM25_INDEX.drop(f"user-memory-{user.id}")
 
     return memory
 
@@ -193,6 +226,7 @@ async def delete_memory_by_id(memory_id: str, user=Depends(get_verified_user)):
         VECTOR_DB_CLIENT.delete(
             collection_name=f"user-memory-{user.id}", ids=[memory_id]
         )
+        BM25_INDEX.delete(f"user-memory-{user.id}", ids=[memory_id])
         return True
 
     return False
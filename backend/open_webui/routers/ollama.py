@@ -1,7 +1,3 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
@@ -12,7 +8,6 @@ import time
 from typing import Optional, Union
 from urllib.parse import urlparse
 import aiohttp
-from aiocache import cached
 import requests
 from open_webui.models.users import UserModel
 
@@ -32,7 +27,7 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict, validator
-from starlette.background import BackgroundTask
+from starlette.background import BackgroundTask, BackgroundTasks
 
 
 from open_webui.models.models import Models
@@ -45,6 +40,9 @@ from open_webui.utils.payload import (
     apply_model_system_prompt_to_body,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.session_pool import SESSION_POOL
+from open_webui.utils.model_catalog import MODEL_CATALOG
+from open_webui.utils.ollama_router import OLLAMA_ROUTER
 from open_webui.utils.access_control import has_access
 
 
@@ -74,39 +72,36 @@ log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 async def send_get_request(url, key=None, user: UserModel = None):
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    **({"Authorization": f"Bearer {key}"} if key else {}),
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": user.name,
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-            ) as response:
-                return await response.json()
+        session = SESSION_POOL.get_session(url)
+        async with session.get(
+            url,
+            timeout=timeout,
+            headers={
+                "Content-Type": "application/json",
+                **({"Authorization": f"Bearer {key}"} if key else {}),
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": user.name,
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                    else {}
+                ),
+            },
+        ) as response:
+            return await response.json()
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
         return None
 
 
-async def cleanup_response(
-    response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
-):
+async def cleanup_response(response: Optional[aiohttp.ClientResponse]):
+    # Releasing returns the connection to the pool if the body was read to the end
     if response:
-        response.close()
-    if session:
-        await session.close()
+        response.release()
 
 
 async def send_post_request(
@@ -116,17 +111,46 @@ async def send_post_request(
     key: Optional[str] = None,
     content_type: Optional[str] = None,
     user: UserModel = None,
+    model: Optional[str] = None,
+    chat_id: Optional[str] = None,
 ):
+    # In-flight count, latency and failures feed the routing between Ollama nodes
+    started_at = OLLAMA_ROUTER.start(url)
+    finished = False
+
+    def finish(success: bool):
+        nonlocal finished
+        if not finished:
+            finished = True
+            OLLAMA_ROUTER.finish(url, success, model=model, chat_id=chat_id)
+
+    async def stream_content():
+        # Background tasks are skipped when the stream raises
+        success = True
+        try:
+            async for chunk in r.content:
+                yield chunk
+        except Exception:
+            # The node failed mid-stream, unlike a client disconnecting
+            success = False
+            raise
+        finally:
+            await cleanup_response(r)
+            finish(success)
+
+    async def finish_stream():
+        # For streams closed before they were iterated
+        await cleanup_response(r)
+        finish(True)
 
     r = None
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
+        session = SESSION_POOL.get_session(url)
 
         r = await session.post(
             url,
             data=payload,
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
             headers={
                 "Content-Type": "application/json",
                 **({"Authorization": f"Bearer {key}"} if key else {}),
@@ -142,6 +166,7 @@ async def send_post_request(
                 ),
             },
         )
+        OLLAMA_ROUTER.record_latency(url, started_at)
         r.raise_for_status()
 
         if stream:
@@ -151,19 +176,20 @@ async def send_post_request(
                 response_headers["Content-Type"] = content_type
 
             return StreamingResponse(
-                r.content,
+                stream_content(),
                 status_code=r.status,
                 headers=response_headers,
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
+                background=BackgroundTask(finish_stream),
             )
         else:
             res = await r.json()
-            await cleanup_response(r, session)
+            await cleanup_response(r)
+            finish(True)
             return res
 
     except Exception as e:
+        # Client errors are not a sign of an unhealthy node
+        finish(r is not None and r.status < 500)
         detail = None
 
         if r is not None:
@@ -173,6 +199,7 @@ async def send_post_request(
                     detail = f"Ollama: {res.get('error', 'Unknown error')}"
             except Exception:
                 detail = f"Ollama: {e}"
+            await cleanup_response(r)
 
         raise HTTPException(
             status_code=r.status if r else 500,
@@ -180,6 +207,19 @@ async def send_post_request(
         )
 
 
+def invalidate_models_on_completion(response):
+    # Streamed pulls and creates only change the model list once they complete
+    if isinstance(response, StreamingResponse):
+        background = BackgroundTasks(
+            [response.background] if response.background else []
+        )
+        background.add_task(MODEL_CATALOG.invalidate, "ollama", "models")
+        response.background = background
+    else:
+        MODEL_CATALOG.invalidate("ollama", "models")
+    return response
+
+
 def get_api_key(idx, url, configs):
     parsed_url = urlparse(url)
     base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
@@ -287,6 +327,7 @@ async def update_config(
         for key, value in request.app.state.config.OLLAMA_API_CONFIGS.items()
         if key in keys
     }
+    MODEL_CATALOG.invalidate("ollama", "models")
 
     return {
         "ENABLE_OLLAMA_API": request.app.state.config.ENABLE_OLLAMA_API,
@@ -295,9 +336,14 @@ async def update_config(
     }
 
 
-@cached(ttl=1)
 async def get_all_models(request: Request, user: UserModel = None):
-    log.info("get_all_models()")
+    return await MODEL_CATALOG.get(
+        "ollama", lambda: fetch_all_models(request, user=user)
+    )
+
+
+async def fetch_all_models(request: Request, user: UserModel = None):
+    log.info("fetch_all_models()")
     if request.app.state.config.ENABLE_OLLAMA_API:
         request_tasks = []
         for idx, url in enumerate(request.app.state.config.OLLAMA_BASE_URLS):
@@ -532,32 +578,61 @@ async def get_ollama_versions(request: Request, url_idx: Optional[int] = None):
         return {"version": False}
 
 
+async def get_loaded_models(request: Request, user: UserModel = None) -> dict:
+    request_tasks = [
+        send_get_request(
+            f"{url}/api/ps",
+            request.app.state.config.OLLAMA_API_CONFIGS.get(
+                str(idx),
+                request.app.state.config.OLLAMA_API_CONFIGS.get(
+                    url, {}
+                ),  # Legacy support
+            ).get("key", None),
+            user=user,
+        )
+        for idx, url in enumerate(request.app.state.config.OLLAMA_BASE_URLS)
+    ]
+    responses = await asyncio.gather(*request_tasks)
+
+    for idx, (url, response) in enumerate(
+        zip(request.app.state.config.OLLAMA_BASE_URLS, responses)
+    ):
+        if response is None:
+            continue
+
+        prefix_id = request.app.state.config.OLLAMA_API_CONFIGS.get(
+            str(idx),
+            request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
+        ).get("prefix_id", None)
+
+        # Same model ids as in OLLAMA_MODELS, so they can be matched when routing
+        OLLAMA_ROUTER.set_loaded_models(
+            url,
+            [
+                f"{prefix_id}.{model['model']}" if prefix_id else model["model"]
+                for model in response.get("models", [])
+            ],
+        )
+
+    return dict(zip(request.app.state.config.OLLAMA_BASE_URLS, responses))
+
+
 @router.get("/api/ps")
 async def get_ollama_loaded_models(request: Request, user=Depends(get_verified_user)):
     """
     List models that are currently loaded into Ollama memory, and which node they are loaded on.
     """
     if request.app.state.config.ENABLE_OLLAMA_API:
-        request_tasks = [
-            send_get_request(
-                f"{url}/api/ps",
-                request.app.state.config.OLLAMA_API_CONFIGS.get(
-                    str(idx),
-                    request.app.state.config.OLLAMA_API_CONFIGS.get(
-                        url, {}
-                    ),  # Legacy support
-                ).get("key", None),
-                user=user,
-            )
-            for idx, url in enumerate(request.app.state.config.OLLAMA_BASE_URLS)
-        ]
-        responses = await asyncio.gather(*request_tasks)
-
-        return dict(zip(request.app.state.config.OLLAMA_BASE_URLS, responses))
+        return await get_loaded_models(request, user=user)
     else:
         return {}
 
 
+@router.get("/api/routing")
+async def get_ollama_routing_stats(user=Depends(get_admin_user)):
+    return OLLAMA_ROUTER.get_stats()
+
+
 class ModelNameForm(BaseModel):
     name: str
 
@@ -576,12 +651,13 @@ async def pull_model(
     # Admin should be able to pull models from any source
     payload = {**form_data.model_dump(exclude_none=True), "insecure": True}
 
-    return await send_post_request(
+    response = await send_post_request(
         url=f"{url}/api/pull",
         payload=json.dumps(payload),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
     )
+    return invalidate_models_on_completion(response)
 
 
 class PushModelForm(BaseModel):
@@ -640,12 +716,13 @@ async def create_model(
     log.debug(f"form_data: {form_data}")
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
 
-    return await send_post_request(
+    response = await send_post_request(
         url=f"{url}/api/create",
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
     )
+    return invalidate_models_on_completion(response)
 
 
 class CopyModelForm(BaseModel):
@@ -699,6 +776,7 @@ async def copy_model(
         r.raise_for_status()
 
         log.debug(f"r.text: {r.text}")
+        MODEL_CATALOG.invalidate("ollama", "models")
         return True
     except Exception as e:
         log.exception(e)
@@ -764,6 +842,7 @@ async def delete_model(
         r.raise_for_status()
 
         log.debug(f"r.text: {r.text}")
+        MODEL_CATALOG.invalidate("ollama", "models")
         return True
     except Exception as e:
         log.exception(e)
@@ -796,7 +875,7 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(form_data.name),
         )
 
-    url_idx = random.choice(models[form_data.name]["urls"])
+    url_idx = select_url_idx(request, form_data.name, models[form_data.name]["urls"])
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
@@ -870,7 +949,7 @@ async def embed(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -949,7 +1028,7 @@ async def embeddings(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1034,7 +1113,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1090,7 +1169,37 @@ class GenerateChatCompletionForm(BaseModel):
     tools: Optional[list[dict]] = None
 
 
-async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] = None):
+refresh_loaded_models_task: Optional[asyncio.Task] = None
+
+
+def select_url_idx(
+    request: Request, model: str, url_idxs: list[int], chat_id: Optional[str] = None
+) -> int:
+    global refresh_loaded_models_task
+
+    urls = {
+        idx: request.app.state.config.OLLAMA_BASE_URLS[idx]
+        for idx in url_idxs
+        if idx < len(request.app.state.config.OLLAMA_BASE_URLS)
+    }
+    if not urls:
+        return random.choice(url_idxs)
+
+    # Stale loaded models are refreshed in the background, routing uses what is known
+    if OLLAMA_ROUTER.needs_loaded_models(list(urls.values())) and (
+        refresh_loaded_models_task is None or refresh_loaded_models_task.done()
+    ):
+        refresh_loaded_models_task = asyncio.create_task(get_loaded_models(request))
+
+    return OLLAMA_ROUTER.select(model, urls, chat_id=chat_id)
+
+
+async def get_ollama_url(
+    request: Request,
+    model: str,
+    url_idx: Optional[int] = None,
+    chat_id: Optional[str] = None,
+):
     if url_idx is None:
         models = request.app.state.OLLAMA_MODELS
         if model not in models:
@@ -1098,7 +1207,9 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = select_url_idx(
+            request, model, models[model].get("urls", []), chat_id=chat_id
+        )
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1169,7 +1280,10 @@ async def generate_chat_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    model = payload["model"]
+    chat_id = metadata.get("chat_id") if metadata else None
+
+    url, url_idx = await get_ollama_url(request, model, url_idx, chat_id=chat_id)
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1186,6 +1300,8 @@ async def generate_chat_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         content_type="application/x-ndjson",
         user=user,
+        model=model,
+        chat_id=chat_id,
     )
 
 
@@ -1272,7 +1388,8 @@ async def generate_openai_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    model = payload["model"]
+    url, url_idx = await get_ollama_url(request, model, url_idx)
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1289,6 +1406,7 @@ async def generate_openai_completion(
         stream=payload.get("stream", False),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        model=model,
     )
 
 
@@ -1352,7 +1470,8 @@ async def generate_openai_chat_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    model = payload["model"]
+    url, url_idx = await get_ollama_url(request, model, url_idx)
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1368,6 +1487,7 @@ async def generate_openai_chat_completion(
         stream=payload.get("stream", False),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        model=model,
     )
 
 
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import mimetypes
@@ -35,6 +36,7 @@ from open_webui.storage.provider import Storage
 
 
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.retrieval.bm25 import BM25_INDEX
 
 # Document loaders
 from open_webui.retrieval.loaders.main import Loader
@@ -62,6 +64,7 @@ from open_webui.retrieval.web.exa import search_exa
 from open_webui.retrieval.web.perplexity import search_perplexity
 from open_webui.retrieval.web.sougou import search_sougou
 
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
 from open_webui.retrieval.utils import (
     get_embedding_function,
     get_model_path,
@@ -85,6 +88,7 @@ from open_webui.config import (
     DEFAULT_LOCALE,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_QUERY_PREFIX,
+    ENABLE_RAG_BM25_INDEX,
 )
 from open_webui.env import (
     SRC_LOG_LEVELS,
@@ -211,6 +215,21 @@ async def get_embedding_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/embedding/cache")
+async def get_embedding_cache_stats(user=Depends(get_admin_user)):
+    return {
+        "status": EMBEDDING_CACHE is not None,
+        **(EMBEDDING_CACHE.get_stats() if EMBEDDING_CACHE else {}),
+    }
+
+
+@router.post("/embedding/cache/reset")
+async def reset_embedding_cache(user=Depends(get_admin_user)):
+    if EMBEDDING_CACHE:
+        EMBEDDING_CACHE.clear()
+    return {"status": EMBEDDING_CACHE is not None}
+
+
 @router.get("/reranking")
 async def get_reraanking_config(request: Request, user=Depends(get_admin_user)):
     return {
@@ -889,6 +908,9 @@ def save_docs_to_vector_db(
                 metadata[key] = str(value)
 
     try:
+        # A new collection gets a complete BM25 index from the start, existing
+        # collections are only appended to if they have been indexed already
+        new_collection = True
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
             log.info(f"collection {collection_name} already exists")
 
@@ -900,6 +922,8 @@ def save_docs_to_vector_db(
                     f"collection {collection_name} already exists, overwrite is False and add is False"
                 )
                 return True
+            else:
+                new_collection = False
 
         log.info(f"adding to collection {collection_name}")
         embedding_function = get_embedding_function(
@@ -940,6 +964,16 @@ def save_docs_to_vector_db(
             items=items,
         )
 
+        if ENABLE_RAG_BM25_INDEX:
+            try:
+                if new_collection:
+                    BM25_INDEX.drop(collection_name)
+                BM25_INDEX.add(collection_name, items, create=new_collection)
+            except Exception as e:
+                # The index is rebuilt from the vector DB on the next hybrid query
+                log.exception(f"Error updating BM25 index for {collection_name}: {e}")
+                BM25_INDEX.drop(collection_name)
+
         return True
     except Exception as e:
         log.exception(e)
@@ -952,6 +986,35 @@ class ProcessFileForm(BaseModel):
     collection_name: Optional[str] = None
 
 
+def get_processed_file_docs(file) -> list[Document]:
+    """Documents of a file already processed, to add to a knowledge base."""
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=f"file-{file.id}", filter={"file_id": file.id}
+    )
+
+    if result is not None and len(result.ids[0]) > 0:
+        return [
+            Document(
+                page_content=result.documents[0][idx],
+                metadata=result.metadatas[0][idx],
+            )
+            for idx, id in enumerate(result.ids[0])
+        ]
+
+    return [
+        Document(
+            page_content=file.data.get("content", ""),
+            metadata={
+                **file.meta,
+                "name": file.filename,
+                "created_by": file.user_id,
+                "file_id": file.id,
+                "source": file.filename,
+            },
+        )
+    ]
+
+
 @router.post("/process/file")
 def process_file(
     request: Request,
@@ -973,6 +1036,7 @@ def process_file(
             try:
                 # /files/{file_id}/data/content/update
                 VECTOR_DB_CLIENT.delete_collection(collection_name=f"file-{file.id}")
+                BM25_INDEX.drop(f"file-{file.id}")
             except:
                 # Audio file upload pipeline
                 pass
@@ -995,32 +1059,7 @@ def process_file(
             # Check if the file has already been processed and save the content
             # Usage: /knowledge/{id}/file/add, /knowledge/{id}/file/update
 
-            result = VECTOR_DB_CLIENT.query(
-                collection_name=f"file-{file.id}", filter={"file_id": file.id}
-            )
-
-            if result is not None and len(result.ids[0]) > 0:
-                docs = [
-                    Document(
-                        page_content=result.documents[0][idx],
-                        metadata=result.metadatas[0][idx],
-                    )
-                    for idx, id in enumerate(result.ids[0])
-                ]
-            else:
-                docs = [
-                    Document(
-                        page_content=file.data.get("content", ""),
-                        metadata={
-                            **file.meta,
-                            "name": file.filename,
-                            "created_by": file.user_id,
-                            "file_id": file.id,
-                            "source": file.filename,
-                        },
-                    )
-                ]
-
+            docs = get_processed_file_docs(file)
             text_content = file.data.get("content", "")
         else:
             # Process the file and save the content
@@ -1566,13 +1605,13 @@ def query_doc_handler(
 ):
     try:
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH:
-            collection_results = {}
-            collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=form_data.collection_name
-            )
             return query_doc_with_hybrid_search(
                 collection_name=form_data.collection_name,
-                collection_result=collection_results[form_data.collection_name],
+                collection_result=(
+                    None
+                    if ENABLE_RAG_BM25_INDEX
+                    else VECTOR_DB_CLIENT.get(collection_name=form_data.collection_name)
+                ),
                 query=form_data.query,
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
                     query, prefix=prefix, user=user
@@ -1586,7 +1625,6 @@ def query_doc_handler(
                     if form_data.r
                     else request.app.state.config.RELEVANCE_THRESHOLD
                 ),
-                user=user,
             )
         else:
             return query_doc(
@@ -1677,7 +1715,11 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 
             VECTOR_DB_CLIENT.delete(
                 collection_name=form_data.collection_name,
-                metadata={"hash": hash},
+                filter={"hash": hash},
+            )
+            BM25_INDEX.delete(
+                collection_name=form_data.collection_name,
+                filter={"hash": hash},
             )
             return {"status": True}
         else:
@@ -1690,6 +1732,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    BM25_INDEX.reset()
     Knowledges.delete_all_knowledge()
 
 
@@ -1721,8 +1764,10 @@ if ENV == "dev":
     @router.get("/ef/{text}")
     async def get_embeddings(request: Request, text: Optional[str] = "Hello World!"):
         return {
-            "result": request.app.state.EMBEDDING_FUNCTION(
-                text, prefix=RAG_EMBEDDING_QUERY_PREFIX
+            "result": await asyncio.to_thread(
+                request.app.state.EMBEDDING_FUNCTION,
+                text,
+                prefix=RAG_EMBEDDING_QUERY_PREFIX,
             )
         }
 
@@ -10,7 +10,12 @@ from open_webui.models.tools import (
     ToolUserResponse,
     Tools,
 )
-from open_webui.utils.plugin import load_tool_module_by_id, replace_imports
+from open_webui.utils.plugin import (
+    PLUGINS,
+    get_tool_module,
+    load_tool_module_by_id,
+    replace_imports,
+)
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
 from fastapi import APIRouter, Depends, HTTPException, Request, status
@@ -142,10 +147,9 @@ async def create_new_tools(
             )
             form_data.meta.manifest = frontmatter
 
-            TOOLS = request.app.state.TOOLS
-            TOOLS[form_data.id] = tool_module
+            PLUGINS.set_module("tool", form_data.id, tool_module)
 
-            specs = get_tool_specs(TOOLS[form_data.id])
+            specs = get_tool_specs(tool_module)
             tools = Tools.insert_new_tool(user.id, form_data, specs)
 
             tool_cache_dir = CACHE_DIR / "tools" / form_data.id
@@ -229,10 +233,9 @@ async def update_tools_by_id(
         tool_module, frontmatter = load_tool_module_by_id(id, content=form_data.content)
         form_data.meta.manifest = frontmatter
 
-        TOOLS = request.app.state.TOOLS
-        TOOLS[id] = tool_module
+        PLUGINS.set_module("tool", id, tool_module)
 
-        specs = get_tool_specs(TOOLS[id])
+        specs = get_tool_specs(tool_module)
 
         updated = {
             **form_data.model_dump(exclude={"id"}),
@@ -285,9 +288,7 @@ async def delete_tools_by_id(
 
     result = Tools.delete_tool_by_id(id)
     if result:
-        TOOLS = request.app.state.TOOLS
-        if id in TOOLS:
-            del TOOLS[id]
+        PLUGINS.remove_module("tool", id)
 
     return result
 
@@ -327,11 +328,7 @@ async def get_tools_valves_spec_by_id(
 ):
     tools = Tools.get_tool_by_id(id)
     if tools:
-        if id in request.app.state.TOOLS:
-            tools_module = request.app.state.TOOLS[id]
-        else:
-            tools_module, _ = load_tool_module_by_id(id)
-            request.app.state.TOOLS[id] = tools_module
+        tools_module = get_tool_module(id)
 
         if hasattr(tools_module, "Valves"):
             Valves = tools_module.Valves
@@ -370,11 +367,7 @@ async def update_tools_valves_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    if id in request.app.state.TOOLS:
-        tools_module = request.app.state.TOOLS[id]
-    else:
-        tools_module, _ = load_tool_module_by_id(id)
-        request.app.state.TOOLS[id] = tools_module
+    tools_module = get_tool_module(id)
 
     if not hasattr(tools_module, "Valves"):
         raise HTTPException(
@@ -387,6 +380,7 @@ async def update_tools_valves_by_id(
         form_data = {k: v for k, v in form_data.items() if v is not None}
         valves = Valves(**form_data)
         Tools.update_tool_valves_by_id(id, valves.model_dump())
+        PLUGINS.invalidate("tool", id)
         return valves.model_dump()
     except Exception as e:
         log.exception(f"Failed to update tool valves by id {id}: {e}")
@@ -426,11 +420,7 @@ async def get_tools_user_valves_spec_by_id(
 ):
     tools = Tools.get_tool_by_id(id)
     if tools:
-        if id in request.app.state.TOOLS:
-            tools_module = request.app.state.TOOLS[id]
-        else:
-            tools_module, _ = load_tool_module_by_id(id)
-            request.app.state.TOOLS[id] = tools_module
+        tools_module = get_tool_module(id)
 
         if hasattr(tools_module, "UserValves"):
             UserValves = tools_module.UserValves
@@ -450,11 +440,7 @@ async def update_tools_user_valves_by_id(
     tools = Tools.get_tool_by_id(id)
 
     if tools:
-        if id in request.app.state.TOOLS:
-            tools_module = request.app.state.TOOLS[id]
-        else:
-            tools_module, _ = load_tool_module_by_id(id)
-            request.app.state.TOOLS[id] = tools_module
+        tools_module = get_tool_module(id)
 
         if hasattr(tools_module, "UserValves"):
             UserValves = tools_module.UserValves
@@ -8,6 +8,9 @@ from redis import asyncio as aioredis
 from open_webui.models.users import Users, UserNameResponse
 from open_webui.models.channels import Channels
 from open_webui.models.chats import Chats
+from open_webui.utils.message_buffer import MESSAGE_WRITE_BUFFER
+from open_webui.utils.emit_coalescer import EMIT_COALESCER
+from open_webui.utils.user_cache import USER_CACHE
 from open_webui.utils.redis import (
     get_sentinels_from_env,
     get_sentinel_url_from_env,
@@ -20,9 +23,16 @@ from open_webui.env import (
     WEBSOCKET_REDIS_LOCK_TIMEOUT,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
+    WEBSOCKET_PRESENCE_TTL,
+    WEBSOCKET_PRESENCE_BROADCAST_INTERVAL,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock
+from open_webui.socket.utils import (
+    RedisLock,
+    PresenceStore,
+    RedisPresenceStore,
+    PresenceBroadcaster,
+)
 
 from open_webui.env import (
     GLOBAL_LOG_LEVEL,
@@ -65,27 +75,18 @@ else:
 # Timeout duration in seconds
 TIMEOUT_DURATION = 3
 
-# Dictionary to maintain the user pool
+# Sessions, online users and models in use
 
 if WEBSOCKET_MANAGER == "redis":
     log.debug("Using Redis to manage websockets.")
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
     )
-    SESSION_POOL = RedisDict(
-        "open-webui:session_pool",
-        redis_url=WEBSOCKET_REDIS_URL,
-        redis_sentinels=redis_sentinels,
-    )
-    USER_POOL = RedisDict(
-        "open-webui:user_pool",
-        redis_url=WEBSOCKET_REDIS_URL,
-        redis_sentinels=redis_sentinels,
-    )
-    USAGE_POOL = RedisDict(
-        "open-webui:usage_pool",
+    PRESENCE = RedisPresenceStore(
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
+        ttl=WEBSOCKET_PRESENCE_TTL,
+        usage_timeout=TIMEOUT_DURATION,
     )
 
     clean_up_lock = RedisLock(
@@ -98,12 +99,31 @@ if WEBSOCKET_MANAGER == "redis":
     renew_func = clean_up_lock.renew_lock
     release_func = clean_up_lock.release_lock
 else:
-    SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
+    PRESENCE = PresenceStore(usage_timeout=TIMEOUT_DURATION)
     aquire_func = release_func = renew_func = lambda: True
 
 
+# Admins receive the presence changes of every user, other users those of the
+# members of their channels, and request the full list when they need it
+ADMINS_ROOM = "admins"
+
+
+async def emit_presence(room, data):
+    await sio.emit("user-presence", data, room=room)
+
+
+PRESENCE_BROADCASTER = PresenceBroadcaster(
+    WEBSOCKET_PRESENCE_BROADCAST_INTERVAL, emit_presence
+)
+
+
+async def broadcast_models_in_use(models):
+    # Clients report usage every second while generating, only changes are broadcast,
+    # compared with the last broadcast of any instance
+    if await PRESENCE.update_models_broadcast(models):
+        await sio.emit("usage", {"models": models})
+
+
 async def periodic_usage_pool_cleanup():
     if not aquire_func():
         log.debug("Usage pool cleanup lock already exists. Not running it.")
@@ -115,62 +135,69 @@ async def periodic_usage_pool_cleanup():
                 log.error(f"Unable to renew cleanup lock. Exiting usage pool cleanup.")
                 raise Exception("Unable to renew usage pool cleanup lock.")
 
-            now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
-                # Creating a list of sids to remove if they have timed out
-                expired_sids = [
-                    sid
-                    for sid, details in connections.items()
-                    if now - details["updated_at"] > TIMEOUT_DURATION
-                ]
-
-                for sid in expired_sids:
-                    del connections[sid]
-
-                if not connections:
-                    log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
-
-                send_usage = True
-
-            if send_usage:
-                # Emit updated usage information after cleaning
-                await sio.emit("usage", {"models": get_models_in_use()})
+            # Usage expires in the presence store, clients are told when it changed
+            await broadcast_models_in_use(await get_models_in_use())
 
             await asyncio.sleep(TIMEOUT_DURATION)
     finally:
         release_func()
 
 
+async def periodic_presence_refresh():
+    # Keeps the sessions connected to this instance online
+    if not isinstance(PRESENCE, RedisPresenceStore):
+        return
+
+    while True:
+        try:
+            await PRESENCE.refresh()
+        except Exception as e:
+            log.warning(f"Unable to refresh presence: {e}")
+        await asyncio.sleep(PRESENCE.ttl / 3)
+
+
 app = socketio.ASGIApp(
     sio,
     socketio_path="/ws/socket.io",
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
-    return models_in_use
+    return sorted(await PRESENCE.get_models_in_use())
 
 
 @sio.on("usage")
 async def usage(sid, data):
     model_id = data["model"]
-    # Record the timestamp for the last update
-    current_time = int(time.time())
-
-    # Store the new usage data and task
-    USAGE_POOL[model_id] = {
-        **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-        sid: {"updated_at": current_time},
-    }
+    models_in_use = await PRESENCE.record_usage(model_id)
 
     # Broadcast the usage data to all clients
-    await sio.emit("usage", {"models": get_models_in_use()})
+    await broadcast_models_in_use(sorted(models_in_use))
+
+
+async def enter_presence_rooms(sid, user):
+    # Returns the rooms the presence of the user is broadcast to
+    channels = Channels.get_channels_by_user_id(user.id)
+    log.debug(f"{channels=}")
+
+    rooms = [f"channel:{channel.id}" for channel in channels]
+    for room in rooms:
+        await sio.enter_room(sid, room)
+
+    if user.role == "admin":
+        await sio.enter_room(sid, ADMINS_ROOM)
+
+    return rooms + [ADMINS_ROOM]
+
+
+async def join_presence(sid, user):
+    rooms = await enter_presence_rooms(sid, user)
+    if await PRESENCE.add_session(sid, user.model_dump()):
+        await PRESENCE_BROADCASTER.update(user.id, True, rooms)
+
+    # The full list is only sent to the new session
+    await sio.emit("user-list", {"user_ids": await PRESENCE.get_user_ids()}, to=sid)
 
 
 @sio.event
@@ -180,18 +207,13 @@ async def connect(sid, environ, auth):
         data = decode_token(auth["token"])
 
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = USER_CACHE.get_user(data["id"], Users.get_user_by_id)
 
         if user:
-            SESSION_POOL[sid] = user.model_dump()
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await join_presence(sid, user)
 
             # print(f"user {user.name}({user.id}) connected with session ID {sid}")
-            await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
-            await sio.emit("usage", {"models": get_models_in_use()})
+            await sio.emit("usage", {"models": await get_models_in_use()}, to=sid)
 
 
 @sio.on("user-join")
@@ -205,25 +227,15 @@ async def user_join(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = USER_CACHE.get_user(data["id"], Users.get_user_by_id)
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump()
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
-
     # Join all the channels
-    channels = Channels.get_channels_by_user_id(user.id)
-    log.debug(f"{channels=}")
-    for channel in channels:
-        await sio.enter_room(sid, f"channel:{channel.id}")
+    await join_presence(sid, user)
 
     # print(f"user {user.name}({user.id}) connected with session ID {sid}")
 
-    await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
     return {"id": user.id, "name": user.name}
 
 
@@ -237,7 +249,7 @@ async def join_channel(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = USER_CACHE.get_user(data["id"], Users.get_user_by_id)
     if not user:
         return
 
@@ -264,13 +276,17 @@ async def channel_events(sid, data):
     event_type = event_data["type"]
 
     if event_type == "typing":
+        user = await PRESENCE.get_session(sid)
+        if user is None:
+            return
+
         await sio.emit(
             "channel-events",
             {
                 "channel_id": data["channel_id"],
                 "message_id": data.get("message_id", None),
                 "data": event_data,
-                "user": UserNameResponse(**SESSION_POOL[sid]).model_dump(),
+                "user": UserNameResponse(**user).model_dump(),
             },
             room=room,
         )
@@ -278,34 +294,33 @@ async def channel_events(sid, data):
 
 @sio.on("user-list")
 async def user_list(sid):
-    await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    await sio.emit("user-list", {"user_ids": await PRESENCE.get_user_ids()}, to=sid)
 
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
-
-        user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
-
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
-
-        await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    user, offline = await PRESENCE.remove_session(sid)
+    if user:
+        if offline:
+            rooms = [room for room in sio.rooms(sid) if room.startswith("channel:")]
+            await PRESENCE_BROADCASTER.update(user["id"], False, rooms + [ADMINS_ROOM])
     else:
         pass
         # print(f"Unknown session ID {sid} disconnected")
 
 
+async def emit_to_user(user_id: str, event: str, data: dict):
+    for session_id in await PRESENCE.get_session_ids(user_id):
+        await sio.emit(event, data, to=session_id)
+
+
 def get_event_emitter(request_info, update_db=True):
-    async def __event_emitter__(event_data):
+    async def emit_to_sessions(event_data):
         user_id = request_info["user_id"]
 
         session_ids = list(
             set(
-                USER_POOL.get(user_id, [])
+                await PRESENCE.get_session_ids(user_id)
                 + (
                     [request_info.get("session_id")]
                     if request_info.get("session_id")
@@ -324,6 +339,16 @@ def get_event_emitter(request_info, update_db=True):
                 },
                 to=session_id,
             )
+        return len(session_ids)
+
+    async def __event_emitter__(event_data, coalesce=False):
+        # Streamed chat:completion events are emitted in batches
+        await EMIT_COALESCER.emit(
+            (request_info.get("chat_id"), request_info.get("message_id")),
+            event_data,
+            emit_to_sessions,
+            coalesce=coalesce,
+        )
 
         if update_db:
             if "type" in event_data and event_data["type"] == "status":
@@ -334,7 +359,7 @@ def get_event_emitter(request_info, update_db=True):
                 )
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
+                message = MESSAGE_WRITE_BUFFER.get_message(
                     request_info["chat_id"],
                     request_info["message_id"],
                 )
@@ -343,7 +368,7 @@ def get_event_emitter(request_info, update_db=True):
                     content = message.get("content", "")
                     content += event_data.get("data", {}).get("content", "")
 
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MESSAGE_WRITE_BUFFER.update(
                         request_info["chat_id"],
                         request_info["message_id"],
                         {
@@ -354,7 +379,7 @@ def get_event_emitter(request_info, update_db=True):
             if "type" in event_data and event_data["type"] == "replace":
                 content = event_data.get("data", {}).get("content", "")
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await MESSAGE_WRITE_BUFFER.update(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
@@ -384,28 +409,26 @@ def get_event_call(request_info):
 get_event_caller = get_event_call
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await PRESENCE.get_session(sid)
     if user:
         return user["id"]
     return None
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = sio.manager.get_participants(
         namespace="/",
         room=room,
     )
 
-    active_user_ids = list(
-        set(
-            [SESSION_POOL.get(session_id[0])["id"] for session_id in active_session_ids]
-        )
+    # Users of all the sessions are read in a single round trip
+    users = await PRESENCE.get_sessions(
+        [session_id[0] for session_id in active_session_ids]
     )
+    active_user_ids = list(set([user["id"] for user in users if user]))
     return active_user_ids
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
-        return True
-    return False
+async def get_active_status_by_user_id(user_id):
+    return await PRESENCE.is_user_active(user_id)
@@ -1,6 +1,15 @@
+import asyncio
 import json
+import logging
+import time
 import uuid
+from typing import Awaitable, Callable, Optional
+
 from open_webui.utils.redis import get_redis_connection
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
 
 
 class RedisLock:
@@ -89,3 +98,301 @@ class RedisDict:
         if key not in self:
             self[key] = default
         return self[key]
+
+
+class PresenceStore:
+    """
+    Connected sessions, online users and models in use, for a single instance.
+    Models in use expire `usage_timeout` seconds after they were last reported.
+    """
+
+    def __init__(self, usage_timeout: float):
+        self.usage_timeout = usage_timeout
+
+        self._sessions: dict[str, dict] = {}
+        self._user_sessions: dict[str, set[str]] = {}
+        self._usage: dict[str, float] = {}
+        self._models_broadcast: list[str] = []
+
+    async def add_session(self, sid: str, user: dict) -> bool:
+        """Returns True when the user was offline."""
+        self._sessions[sid] = user
+        online = user["id"] in self._user_sessions
+        self._user_sessions.setdefault(user["id"], set()).add(sid)
+        return not online
+
+    async def remove_session(self, sid: str) -> tuple[Optional[dict], bool]:
+        """
+        Returns the user of the session, None for unknown sessions, and whether it
+        was the last session of the user.
+        """
+        user = self._sessions.pop(sid, None)
+        if user is None:
+            return None, False
+
+        session_ids = self._user_sessions.get(user["id"], set())
+        session_ids.discard(sid)
+        if not session_ids:
+            self._user_sessions.pop(user["id"], None)
+            return user, True
+        return user, False
+
+    async def get_session(self, sid: str) -> Optional[dict]:
+        return self._sessions.get(sid)
+
+    async def get_sessions(self, sids: list[str]) -> list[Optional[dict]]:
+        return [self._sessions.get(sid) for sid in sids]
+
+    async def get_session_ids(self, user_id: str) -> list[str]:
+        return list(self._user_sessions.get(user_id, []))
+
+    async def get_user_ids(self) -> list[str]:
+        return list(self._user_sessions.keys())
+
+    async def is_user_active(self, user_id: str) -> bool:
+        return user_id in self._user_sessions
+
+    async def record_usage(self, model_id: str) -> list[str]:
+        """Returns the models in use."""
+        self._usage[model_id] = time.time() + self.usage_timeout
+        return await self.get_models_in_use()
+
+    async def get_models_in_use(self) -> list[str]:
+        now = time.time()
+        self._usage = {
+            model_id: expires_at
+            for model_id, expires_at in self._usage.items()
+            if expires_at > now
+        }
+        return list(self._usage.keys())
+
+    async def update_models_broadcast(self, model_ids: list[str]) -> bool:
+        """
+        Records the models in use broadcast to clients, returns False if they were
+        already the last ones broadcast.
+        """
+        changed = model_ids != self._models_broadcast
+        self._models_broadcast = model_ids
+        return changed
+
+    async def refresh(self):
+        pass
+
+
+# Removes a session and, when it was the last one of the user, the user from the
+# online users, atomically so a concurrent connect of the same user is not lost
+REMOVE_SESSION_SCRIPT = """
+local user = redis.call('GET', KEYS[1])
+local offline = 0
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[2], ARGV[1])
+if redis.call('SCARD', KEYS[2]) == 0 then
+    offline = redis.call('ZREM', KEYS[3], ARGV[2])
+end
+return {user, offline}
+"""
+
+
+class RedisPresenceStore(PresenceStore):
+    """
+    Presence shared between instances, with the asyncio Redis client:
+        {prefix}session:{sid}  user of the session, expiring after `ttl` seconds
+        {prefix}user:{user_id} set of the session ids of the user
+        {prefix}users          online user ids, sorted by expiry
+        {prefix}usage          models in use, sorted by expiry
+        {prefix}usage:broadcast models in use last broadcast by any instance
+
+    Every instance refreshes the expiry of its own sessions with refresh(), so the
+    sessions of an instance that stopped go offline instead of staying online.
+    """
+
+    def __init__(
+        self,
+        redis_url,
+        redis_sentinels=[],
+        ttl: int = 60,
+        usage_timeout: float = 3,
+        prefix: str = "open-webui:presence:",
+    ):
+        super().__init__(usage_timeout)
+        self.ttl = ttl
+        self.prefix = prefix
+
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True, async_mode=True
+        )
+        self._remove_session_script = self.redis.register_script(REMOVE_SESSION_SCRIPT)
+
+        # User ids of the sessions connected to this instance
+        self._local: dict[str, str] = {}
+
+    def _session_key(self, sid: str) -> str:
+        return f"{self.prefix}session:{sid}"
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self.prefix}user:{user_id}"
+
+    async def add_session(self, sid: str, user: dict) -> bool:
+        user_id = user["id"]
+        self._local[sid] = user_id
+
+        now = time.time()
+        async with self.redis.pipeline() as pipe:
+            pipe.zscore(f"{self.prefix}users", user_id)
+            pipe.set(self._session_key(sid), json.dumps(user), ex=self.ttl)
+            pipe.sadd(self._user_key(user_id), sid)
+            pipe.expire(self._user_key(user_id), self.ttl)
+            pipe.zadd(f"{self.prefix}users", {user_id: now + self.ttl})
+            pipe.smembers(self._user_key(user_id))
+            expires_at, *_, session_ids = await pipe.execute()
+
+        # Drop the sessions of instances that stopped without removing them
+        session_ids = list(session_ids)
+        sessions = await self.get_sessions(session_ids)
+        expired_session_ids = [
+            session_id
+            for session_id, session in zip(session_ids, sessions)
+            if session is None
+        ]
+        if expired_session_ids:
+            await self.redis.srem(self._user_key(user_id), *expired_session_ids)
+
+        return expires_at is None or expires_at <= now
+
+    async def remove_session(self, sid: str) -> tuple[Optional[dict], bool]:
+        user_id = self._local.pop(sid, None)
+        if user_id is None:
+            user = await self.get_session(sid)
+            if user is None:
+                return None, False
+            user_id = user["id"]
+
+        user, offline = await self._remove_session_script(
+            keys=[
+                self._session_key(sid),
+                self._user_key(user_id),
+                f"{self.prefix}users",
+            ],
+            args=[sid, user_id],
+        )
+        if not user:
+            return None, False
+        return json.loads(user), offline == 1
+
+    async def get_session(self, sid: str) -> Optional[dict]:
+        user = await self.redis.get(self._session_key(sid))
+        return json.loads(user) if user else None
+
+    async def get_sessions(self, sids: list[str]) -> list[Optional[dict]]:
+        if not sids:
+            return []
+        users = await self.redis.mget([self._session_key(sid) for sid in sids])
+        return [json.loads(user) if user else None for user in users]
+
+    async def get_session_ids(self, user_id: str) -> list[str]:
+        return list(await self.redis.smembers(self._user_key(user_id)))
+
+    async def get_user_ids(self) -> list[str]:
+        async with self.redis.pipeline() as pipe:
+            pipe.zremrangebyscore(f"{self.prefix}users", "-inf", time.time())
+            pipe.zrange(f"{self.prefix}users", 0, -1)
+            _, user_ids = await pipe.execute()
+        return user_ids
+
+    async def is_user_active(self, user_id: str) -> bool:
+        expires_at = await self.redis.zscore(f"{self.prefix}users", user_id)
+        return expires_at is not None and expires_at > time.time()
+
+    async def record_usage(self, model_id: str) -> list[str]:
+        now = time.time()
+        async with self.redis.pipeline() as pipe:
+            pipe.zadd(
+                f"{self.prefix}usage", {model_id: now + self.usage_timeout}, gt=True
+            )
+            pipe.zremrangebyscore(f"{self.prefix}usage", "-inf", now)
+            pipe.zrange(f"{self.prefix}usage", 0, -1)
+            *_, model_ids = await pipe.execute()
+        return model_ids
+
+    async def get_models_in_use(self) -> list[str]:
+        async with self.redis.pipeline() as pipe:
+            pipe.zremrangebyscore(f"{self.prefix}usage", "-inf", time.time())
+            pipe.zrange(f"{self.prefix}usage", 0, -1)
+            _, model_ids = await pipe.execute()
+        return model_ids
+
+    async def update_models_broadcast(self, model_ids: list[str]) -> bool:
+        # Swapped atomically, so only one instance broadcasts each change
+        previous = await self.redis.set(
+            f"{self.prefix}usage:broadcast",
+            json.dumps(model_ids),
+            ex=self.ttl,
+            get=True,
+        )
+        return previous is None or json.loads(previous) != model_ids
+
+    async def refresh(self):
+        if not self._local:
+            return
+
+        expires_at = time.time() + self.ttl
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for sid, user_id in list(self._local.items()):
+                pipe.expire(self._session_key(sid), self.ttl)
+                pipe.expire(self._user_key(user_id), self.ttl)
+            pipe.zadd(
+                f"{self.prefix}users",
+                {user_id: expires_at for user_id in set(self._local.values())},
+                gt=True,
+            )
+            await pipe.execute()
+
+
+class PresenceBroadcaster:
+    """
+    Batches users going online or offline per room, and emits them with
+    `emit(room, {"joined": [...], "left": [...]})` once per `interval` seconds,
+    rather than the full list of online users to every client on each change.
+    The last change of a user within the interval wins.
+    """
+
+    def __init__(self, interval: float, emit: Callable[[str, dict], Awaitable]):
+        self.interval = interval
+        self.emit = emit
+
+        self._pending: dict[str, dict[str, bool]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {"changes": 0, "broadcasts": 0}
+
+    async def update(self, user_id: str, online: bool, rooms: list[str]):
+        for room in rooms:
+            self._pending.setdefault(room, {})[user_id] = online
+        self.stats["changes"] += 1
+
+        if self.interval <= 0:
+            await self.flush()
+        elif self._task is None:
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def flush(self):
+        pending, self._pending = self._pending, {}
+        for room, users in pending.items():
+            await self.emit(
+                room,
+                {
+                    "joined": [user_id for user_id, online in users.items() if online],
+                    "left": [
+                        user_id for user_id, online in users.items() if not online
+                    ],
+                },
+            )
+            self.stats["broadcasts"] += 1
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            log.exception(f"Error broadcasting presence: {e}")
@@ -0,0 +1,209 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+from uuid import uuid4
+
+from open_webui.config import STORAGE_CACHE_MAX_SIZE, STORAGE_CACHE_VALIDATE_INTERVAL
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class CacheEntry:
+    def __init__(self, etag: Optional[str], size: int):
+        self.etag = etag
+        self.size = size
+        self.validated_at = time.monotonic()
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class StorageCache:
+    """
+    Local copies of the files of a remote storage, by local path.
+
+    A copy is used as long as the ETag and size of the remote object match those it
+    was downloaded with, checked at most every `validate_interval` seconds.
+    Concurrent requests for a missing file share a single download, and the least
+    recently used copies are removed once they take more than `max_size` bytes.
+
+    Only the files downloaded or uploaded through the cache are tracked, and so
+    ever removed.
+    """
+
+    def __init__(
+        self,
+        max_size: int = STORAGE_CACHE_MAX_SIZE,
+        validate_interval: float = STORAGE_CACHE_VALIDATE_INTERVAL,
+    ):
+        self.max_size = max_size
+        self.validate_interval = validate_interval
+
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._flights: dict[str, Flight] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "validations": 0,
+            "shared": 0,
+            "evictions": 0,
+            "downloaded_bytes": 0,
+        }
+
+    def _touch(self, path: str, entry: CacheEntry):
+        # Called with the lock held
+        previous = self._entries.pop(path, None)
+        if previous is not None:
+            self._size -= previous.size
+        self._entries[path] = entry
+        self._size += entry.size
+
+    def _is_fresh(self, path: str, entry: Optional[CacheEntry]) -> bool:
+        return (
+            entry is not None
+            and time.monotonic() - entry.validated_at < self.validate_interval
+            and os.path.isfile(path)
+        )
+
+    def get(
+        self,
+        path: str,
+        get_version: Callable[[], Tuple[Optional[str], int]],
+        download: Callable[[str], None],
+    ) -> str:
+        """
+        Returns `path` once it holds the current remote file. `get_version` returns
+        the ETag and size of the remote file, `download` writes it to a given path.
+        """
+        with self._lock:
+            entry = self._entries.get(path)
+            if self._is_fresh(path, entry):
+                self.stats["hits"] += 1
+                self._entries.move_to_end(path)
+                return path
+
+            flight = self._flights.get(path)
+            leader = flight is None
+            if leader:
+                flight = self._flights[path] = Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            with self._lock:
+                self.stats["shared"] += 1
+            return path
+
+        try:
+            self._fetch(path, entry, get_version, download)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(path, None)
+            flight.done.set()
+
+        self._evict(keep=path)
+        return path
+
+    def _fetch(
+        self,
+        path: str,
+        entry: Optional[CacheEntry],
+        get_version: Callable[[], Tuple[Optional[str], int]],
+        download: Callable[[str], None],
+    ):
+        etag, size = get_version()
+
+        local_size = os.path.getsize(path) if os.path.isfile(path) else None
+        if local_size == size and (entry is None or entry.etag in (None, etag)):
+            # Still current, or a copy left by an earlier upload or process
+            with self._lock:
+                self.stats["hits"] += 1
+                self.stats["validations"] += 1
+                self._touch(path, CacheEntry(etag, size))
+            return
+
+        # Downloaded aside, so readers never see a partial file
+        tmp_path = f"{path}.{uuid4().hex[:8]}.part"
+        try:
+            download(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self._lock:
+            self.stats["misses"] += 1
+            self.stats["downloaded_bytes"] += size
+            self._touch(path, CacheEntry(etag, os.path.getsize(path)))
+
+    def put(self, path: str, etag: Optional[str], size: int):
+        """Tracks a file written locally, such as the copy kept of an upload."""
+        with self._lock:
+            self._touch(path, CacheEntry(etag, size))
+        self._evict(keep=path)
+
+    def remove(self, path: str):
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._size -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _evict(self, keep: Optional[str] = None):
+        if self.max_size <= 0:
+            return
+
+        evicted = []
+        with self._lock:
+            for path in list(self._entries.keys()):
+                if self._size <= self.max_size:
+                    break
+                if path == keep or path in self._flights:
+                    continue
+
+                entry = self._entries.pop(path)
+                self._size -= entry.size
+                self.stats["evictions"] += 1
+                evicted.append(path)
+
+        for path in evicted:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get_stats(self) -> dict:
+        requests = self.stats["hits"] + self.stats["misses"] + self.stats["shared"]
+        return {
+            **self.stats,
+            "hit_ratio": (
+                (self.stats["hits"] + self.stats["shared"]) / requests
+                if requests
+                else None
+            ),
+            "entries": len(self._entries),
+            "size": self._size,
+            "max_size": self.max_size,
+        }
+
+
+STORAGE_CACHE = StorageCache()
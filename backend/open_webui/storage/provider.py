@@ -2,10 +2,13 @@ import os
 import shutil
 import json
 import logging
+import hashlib
+import io
 from abc import ABC, abstractmethod
 from typing import BinaryIO, Tuple
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from open_webui.config import (
@@ -32,11 +35,82 @@ from azure.identity import DefaultAzureCredential
 from azure.storage.blob import BlobServiceClient
 from azure.core.exceptions import ResourceNotFoundError
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.storage.cache import STORAGE_CACHE
 
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+# Uploads are read, and sent to remote storage, in parts of this size. A multiple
+# of 256 KiB as GCS requires, and above the 5 MiB minimum of S3.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class UploadStream(io.RawIOBase):
+    """
+    Reads an uploaded file, hashing and counting it and copying it to `local_path`
+    along the way, so it is never held in memory whole. Raises a ValueError if the
+    file is empty.
+    """
+
+    def __init__(self, file: BinaryIO, local_path: str):
+        self.file = file
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+        # Read ahead, so empty files are rejected before anything is uploaded
+        self._pending = file.read(UPLOAD_CHUNK_SIZE)
+        if not self._pending:
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+        self._local_file = open(local_path, "wb")
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.size
+
+    def read(self, size: int = -1) -> bytes:
+        if self._pending:
+            if size is None or size < 0:
+                data = self._pending + self.file.read()
+                self._pending = b""
+            else:
+                data, self._pending = self._pending[:size], self._pending[size:]
+        else:
+            data = self.file.read(size)
+
+        if data:
+            self.sha256.update(data)
+            self.size += len(data)
+            self._local_file.write(data)
+        return data
+
+    def readall(self) -> bytes:
+        return self.read(-1)
+
+    def drain(self):
+        while self.read(UPLOAD_CHUNK_SIZE):
+            pass
+
+    def check_eof(self):
+        """
+        Raises a RuntimeError if the file was not read to the end, as what was
+        uploaded, counted and hashed would only be part of it.
+        """
+        if self._pending or self.file.read(1):
+            raise RuntimeError(
+                f"Upload stopped after {self.size} bytes, before the end of the file"
+            )
+
+    def close(self):
+        if not self.closed:
+            self._local_file.close()
+        super().close()
+
+    def get_info(self) -> dict:
+        return {"size": self.size, "sha256": self.sha256.hexdigest()}
+
 
 class StorageProvider(ABC):
     @abstractmethod
@@ -44,7 +118,10 @@ class StorageProvider(ABC):
         pass
 
     @abstractmethod
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[dict, str]:
+        """
+        Stores the file, returning its size and SHA-256 hash, and its path.
+        """
         pass
 
     @abstractmethod
@@ -58,14 +135,11 @@ class StorageProvider(ABC):
 
 class LocalStorageProvider(StorageProvider):
     @staticmethod
-    def upload_file(file: BinaryIO, filename: str) -> Tuple[bytes, str]:
-        contents = file.read()
-        if not contents:
-            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    def upload_file(file: BinaryIO, filename: str) -> Tuple[dict, str]:
         file_path = f"{UPLOAD_DIR}/{filename}"
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        return contents, file_path
+        with UploadStream(file, file_path) as stream:
+            stream.drain()
+        return stream.get_info(), file_path
 
     @staticmethod
     def get_file(file_path: str) -> str:
@@ -131,26 +205,43 @@ class S3StorageProvider(StorageProvider):
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[dict, str]:
         """Handles uploading of the file to S3 storage."""
-        _, file_path = LocalStorageProvider.upload_file(file, filename)
-        try:
-            s3_key = os.path.join(self.key_prefix, filename)
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
-            return (
-                open(file_path, "rb").read(),
-                "s3://" + self.bucket_name + "/" + s3_key,
-            )
-        except ClientError as e:
-            raise RuntimeError(f"Error uploading file to S3: {e}")
+        s3_key = os.path.join(self.key_prefix, filename)
+        # Sent in parts while it is read, kept locally as well
+        with UploadStream(file, f"{UPLOAD_DIR}/{filename}") as stream:
+            try:
+                self.s3_client.upload_fileobj(
+                    stream,
+                    self.bucket_name,
+                    s3_key,
+                    Config=TransferConfig(
+                        multipart_threshold=UPLOAD_CHUNK_SIZE,
+                        multipart_chunksize=UPLOAD_CHUNK_SIZE,
+                    ),
+                )
+            except ClientError as e:
+                raise RuntimeError(f"Error uploading file to S3: {e}")
+            stream.check_eof()
+        STORAGE_CACHE.put(f"{UPLOAD_DIR}/{filename}", None, stream.size)
+        return stream.get_info(), "s3://" + self.bucket_name + "/" + s3_key
 
     def get_file(self, file_path: str) -> str:
         """Handles downloading of the file from S3 storage."""
         try:
             s3_key = self._extract_s3_key(file_path)
-            local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+
+            def get_version():
+                head = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+                return head["ETag"], head["ContentLength"]
+
+            return STORAGE_CACHE.get(
+                self._get_local_file_path(s3_key),
+                get_version,
+                lambda path: self.s3_client.download_file(
+                    self.bucket_name, s3_key, path
+                ),
+            )
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
@@ -163,6 +254,7 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from S3: {e}")
 
         # Always delete from local storage
+        STORAGE_CACHE.remove(self._get_local_file_path(s3_key))
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -182,6 +274,7 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from S3: {e}")
 
         # Always delete from local storage
+        STORAGE_CACHE.clear()
         LocalStorageProvider.delete_all_files()
 
     # The s3 key is the name assigned to an object. It excludes the bucket name, but includes the internal path and the file name.
@@ -207,25 +300,37 @@ class GCSStorageProvider(StorageProvider):
             self.gcs_client = storage.Client()
         self.bucket = self.gcs_client.bucket(GCS_BUCKET_NAME)
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[dict, str]:
         """Handles uploading of the file to GCS storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename)
-        try:
-            blob = self.bucket.blob(filename)
-            blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
-        except GoogleCloudError as e:
-            raise RuntimeError(f"Error uploading file to GCS: {e}")
+        # Sent as a resumable upload while it is read, kept locally as well
+        with UploadStream(file, f"{UPLOAD_DIR}/{filename}") as stream:
+            try:
+                blob = self.bucket.blob(filename, chunk_size=UPLOAD_CHUNK_SIZE)
+                blob.upload_from_file(stream)
+            except GoogleCloudError as e:
+                raise RuntimeError(f"Error uploading file to GCS: {e}")
+            stream.check_eof()
+        STORAGE_CACHE.put(f"{UPLOAD_DIR}/{filename}", None, stream.size)
+        return stream.get_info(), "gs://" + self.bucket_name + "/" + filename
 
     def get_file(self, file_path: str) -> str:
         """Handles downloading of the file from GCS storage."""
         try:
             filename = file_path.removeprefix("gs://").split("/")[1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
-            blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
-
-            return local_file_path
+            blob = None
+
+            def get_version():
+                nonlocal blob
+                blob = self.bucket.get_blob(filename)
+                if blob is None:
+                    raise NotFound(f"{filename} not found")
+                return blob.etag, blob.size
+
+            return STORAGE_CACHE.get(
+                f"{UPLOAD_DIR}/{filename}",
+                get_version,
+                lambda path: blob.download_to_filename(path),
+            )
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
@@ -239,6 +344,7 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from GCS: {e}")
 
         # Always delete from local storage
+        STORAGE_CACHE.remove(f"{UPLOAD_DIR}/{filename}")
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -253,6 +359,7 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from GCS: {e}")
 
         # Always delete from local storage
+        STORAGE_CACHE.clear()
         LocalStorageProvider.delete_all_files()
 
 
@@ -277,25 +384,34 @@ class AzureStorageProvider(StorageProvider):
             self.container_name
         )
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[dict, str]:
         """Handles uploading of the file to Azure Blob Storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename)
-        try:
-            blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
-            return contents, f"{self.endpoint}/{self.container_name}/{filename}"
-        except Exception as e:
-            raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
+        # Sent in blocks while it is read, kept locally as well
+        with UploadStream(file, f"{UPLOAD_DIR}/{filename}") as stream:
+            try:
+                blob_client = self.container_client.get_blob_client(filename)
+                blob_client.upload_blob(stream, overwrite=True)
+            except Exception as e:
+                raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
+            stream.check_eof()
+        STORAGE_CACHE.put(f"{UPLOAD_DIR}/{filename}", None, stream.size)
+        return stream.get_info(), f"{self.endpoint}/{self.container_name}/{filename}"
 
     def get_file(self, file_path: str) -> str:
         """Handles downloading of the file from Azure Blob Storage."""
         try:
             filename = file_path.split("/")[-1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+
+            def get_version():
+                properties = blob_client.get_blob_properties()
+                return properties.etag, properties.size
+
+            def download(path: str):
+                with open(path, "wb") as download_file:
+                    blob_client.download_blob().readinto(download_file)
+
+            return STORAGE_CACHE.get(f"{UPLOAD_DIR}/{filename}", get_version, download)
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
@@ -309,6 +425,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        STORAGE_CACHE.remove(f"{UPLOAD_DIR}/{filename}")
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -321,6 +438,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        STORAGE_CACHE.clear()
         LocalStorageProvider.delete_all_files()
 
 
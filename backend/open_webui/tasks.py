@@ -1,12 +1,148 @@
 # tasks.py
 import asyncio
-from typing import Dict
+import json
+import logging
+import time
+from typing import Dict, Optional
 from uuid import uuid4
 
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    TASKS_MAX_CONCURRENT_PER_NODE,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
 # A dictionary to keep track of active tasks
 tasks: Dict[str, asyncio.Task] = {}
 chat_tasks = {}
 
+# Tasks of this node waiting for a free slot
+queued_task_ids = set()
+
+# Identifies this node in the task registry shared through Redis
+NODE_ID = str(uuid4())
+
+# Seconds a task stays registered after its node stopped refreshing it
+TASK_TTL = 60
+
+# With Redis, tasks are registered under:
+#   open-webui:tasks                set of the ids of all the tasks
+#   open-webui:tasks:{task_id}      node and chat of the task, expiring after TASK_TTL
+#   open-webui:tasks:chat:{chat_id} set of the ids of the tasks of a chat
+#   open-webui:tasks:nodes          running and queued tasks of each node
+# and cancelled through the open-webui:tasks:cancel channel
+REDIS_KEY_PREFIX = "open-webui:tasks"
+REDIS_CANCEL_CHANNEL = f"{REDIS_KEY_PREFIX}:cancel"
+
+redis = (
+    get_redis_connection(
+        REDIS_URL,
+        get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+        async_mode=True,
+    )
+    if REDIS_URL
+    else None
+)
+
+task_semaphore = (
+    asyncio.Semaphore(TASKS_MAX_CONCURRENT_PER_NODE)
+    if TASKS_MAX_CONCURRENT_PER_NODE > 0
+    else None
+)
+
+
+def get_task_key(task_id: str) -> str:
+    return f"{REDIS_KEY_PREFIX}:{task_id}"
+
+
+def get_chat_tasks_key(id: str) -> str:
+    return f"{REDIS_KEY_PREFIX}:chat:{id}"
+
+
+async def register_task(task_id: str, id=None):
+    """
+    Add the task to the shared registry, so it can be listed and stopped from any node.
+    """
+    if redis is None:
+        return
+
+    try:
+        async with redis.pipeline() as pipe:
+            pipe.set(
+                get_task_key(task_id),
+                json.dumps(
+                    {
+                        "id": task_id,
+                        "chat_id": id,
+                        "node_id": NODE_ID,
+                        "created_at": int(time.time()),
+                    }
+                ),
+                ex=TASK_TTL,
+            )
+            pipe.sadd(REDIS_KEY_PREFIX, task_id)
+            if id:
+                pipe.sadd(get_chat_tasks_key(id), task_id)
+                pipe.expire(get_chat_tasks_key(id), TASK_TTL)
+            await pipe.execute()
+    except Exception as e:
+        log.error(f"Error registering task {task_id}: {e}")
+
+
+async def unregister_task(task_id: str, id=None):
+    if redis is None:
+        return
+
+    try:
+        async with redis.pipeline() as pipe:
+            pipe.delete(get_task_key(task_id))
+            pipe.srem(REDIS_KEY_PREFIX, task_id)
+            if id:
+                pipe.srem(get_chat_tasks_key(id), task_id)
+            await pipe.execute()
+    except Exception as e:
+        log.error(f"Error unregistering task {task_id}: {e}")
+
+
+async def run_task(task_id: str, coroutine, id=None):
+    """
+    Run the coroutine once a slot of the node is free, registered for its whole duration.
+    """
+    semaphore = task_semaphore
+    try:
+        try:
+            await register_task(task_id, id)
+
+            if semaphore is not None:
+                if semaphore.locked():
+                    log.info(
+                        f"Task {task_id} queued, {len(queued_task_ids)} tasks waiting"
+                    )
+
+                queued_task_ids.add(task_id)
+                try:
+                    await semaphore.acquire()
+                finally:
+                    queued_task_ids.discard(task_id)
+        except asyncio.CancelledError:
+            # Stopped before the coroutine started
+            coroutine.close()
+            raise
+
+        try:
+            return await coroutine
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+    finally:
+        await unregister_task(task_id, id)
+
 
 def cleanup_task(task_id: str, id=None):
     """
@@ -26,7 +162,7 @@ def create_task(coroutine, id=None):
     Create a new asyncio task and add it to the global task dictionary.
     """
     task_id = str(uuid4())  # Generate a unique ID for the task
-    task = asyncio.create_task(coroutine)  # Create the task
+    task = asyncio.create_task(run_task(task_id, coroutine, id))  # Create the task
 
     # Add a done callback for cleanup
     task.add_done_callback(lambda t: cleanup_task(task_id, id))
@@ -48,27 +184,56 @@ def get_task(task_id: str):
     return tasks.get(task_id)
 
 
-def list_tasks():
+async def get_registered_task_ids(key: str) -> list[str]:
+    # Ids of tasks whose node stopped without unregistering them are dropped
+    task_ids = list(await redis.smembers(key))
+    if not task_ids:
+        return []
+
+    values = await redis.mget([get_task_key(task_id) for task_id in task_ids])
+    expired_task_ids = [
+        task_id for task_id, value in zip(task_ids, values) if value is None
+    ]
+    if expired_task_ids:
+        await redis.srem(key, *expired_task_ids)
+
+    return [task_id for task_id, value in zip(task_ids, values) if value is not None]
+
+
+async def list_tasks():
     """
     List all currently active task IDs.
     """
+    if redis is not None:
+        try:
+            return await get_registered_task_ids(REDIS_KEY_PREFIX)
+        except Exception as e:
+            log.error(f"Error listing tasks: {e}")
     return list(tasks.keys())
 
 
-def list_task_ids_by_chat_id(id):
+async def list_task_ids_by_chat_id(id):
     """
     List all tasks associated with a specific ID.
     """
+    if redis is not None:
+        try:
+            return await get_registered_task_ids(get_chat_tasks_key(id))
+        except Exception as e:
+            log.error(f"Error listing tasks of {id}: {e}")
     return chat_tasks.get(id, [])
 
 
 async def stop_task(task_id: str):
     """
     Cancel a running task and remove it from the global task list.
+    Tasks of other nodes are cancelled by their node.
     """
     task = tasks.get(task_id)
     if not task:
-        raise ValueError(f"Task with ID {task_id} not found.")
+        if redis is None or not await redis.exists(get_task_key(task_id)):
+            raise ValueError(f"Task with ID {task_id} not found.")
+        return await stop_remote_task(task_id)
 
     task.cancel()  # Request task cancellation
     try:
@@ -79,3 +244,93 @@ async def stop_task(task_id: str):
         return {"status": True, "message": f"Task {task_id} successfully stopped."}
 
     return {"status": False, "message": f"Failed to stop task {task_id}."}
+
+
+async def stop_remote_task(task_id: str, timeout: float = 5):
+    await redis.publish(REDIS_CANCEL_CHANNEL, task_id)
+
+    # The node running the task unregisters it once cancelled
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        if not await redis.exists(get_task_key(task_id)):
+            return {"status": True, "message": f"Task {task_id} successfully stopped."}
+
+    return {"status": False, "message": f"Failed to stop task {task_id}."}
+
+
+def get_node_stats() -> dict:
+    return {
+        "node_id": NODE_ID,
+        "running": len(tasks) - len(queued_task_ids),
+        "queued": len(queued_task_ids),
+        "limit": TASKS_MAX_CONCURRENT_PER_NODE,
+        "updated_at": int(time.time()),
+    }
+
+
+async def list_node_stats() -> list[dict]:
+    """
+    Running and queued tasks of each node.
+    """
+    if redis is None:
+        return [get_node_stats()]
+
+    now = time.time()
+    nodes = [
+        json.loads(value)
+        for value in (await redis.hgetall(f"{REDIS_KEY_PREFIX}:nodes")).values()
+    ]
+    return [node for node in nodes if now - node["updated_at"] < TASK_TTL]
+
+
+async def periodic_task_refresh():
+    """
+    Keep the tasks of this node registered and publish its load.
+    """
+    if redis is None:
+        return
+
+    while True:
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for task_id in list(tasks.keys()):
+                    pipe.expire(get_task_key(task_id), TASK_TTL)
+                for id in list(chat_tasks.keys()):
+                    if id:
+                        pipe.expire(get_chat_tasks_key(id), TASK_TTL)
+                pipe.hset(
+                    f"{REDIS_KEY_PREFIX}:nodes", NODE_ID, json.dumps(get_node_stats())
+                )
+                await pipe.execute()
+        except Exception as e:
+            log.warning(f"Unable to refresh tasks: {e}")
+
+        await asyncio.sleep(TASK_TTL / 3)
+
+
+async def listen_for_task_cancellations():
+    """
+    Cancel the tasks of this node stopped from other nodes.
+    """
+    if redis is None:
+        return
+
+    while True:
+        try:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(REDIS_CANCEL_CHANNEL)
+
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+
+                task = tasks.get(message["data"])
+                if task:
+                    log.info(f"Cancelling task {message['data']}")
+                    task.cancel()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning(f"Task cancellation subscription lost, retrying: {e}")
+            await asyncio.sleep(1)
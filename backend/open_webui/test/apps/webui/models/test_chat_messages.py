@@ -0,0 +1,93 @@
+from uuid import uuid4
+
+from open_webui.internal.db import get_db
+from open_webui.models import chats
+from open_webui.models.chats import ChatForm, ChatMessage, Chats
+
+
+def get_message(id, parent_id, role, timestamp):
+    return {
+        "id": id,
+        "parentId": parent_id,
+        "role": role,
+        "content": f"{role} {id}",
+        "timestamp": timestamp,
+    }
+
+
+def get_chat():
+    # m1 -> m2 -> m3 is the active branch, m2b an earlier regenerated answer
+    messages = [
+        get_message("m1", None, "user", 1),
+        get_message("m2b", "m1", "assistant", 2),
+        get_message("m2", "m1", "assistant", 3),
+        get_message("m3", "m2", "user", 4),
+    ]
+    return {
+        "title": "Branches",
+        "history": {
+            "currentId": "m3",
+            "messages": {message["id"]: message for message in messages},
+        },
+    }
+
+
+def get_message_ids(id):
+    with get_db() as db:
+        return sorted(
+            row.id for row in db.query(ChatMessage).filter_by(chat_id=id).all()
+        )
+
+
+def test_backfilled_on_first_read(monkeypatch):
+    chat = Chats.insert_new_chat(str(uuid4()), ChatForm(chat=get_chat()))
+    assert get_message_ids(chat.id) == []
+
+    monkeypatch.setattr(chats, "ENABLE_CHAT_MESSAGE_TABLE", True)
+    messages = Chats.get_message_list_by_id_and_message_id(chat.id, "m3")
+    assert [message["id"] for message in messages] == ["m1", "m2", "m3"]
+    assert get_message_ids(chat.id) == ["m1", "m2", "m2b", "m3"]
+
+    assert Chats.get_message_list_by_id_and_message_id("missing", "m3") is None
+
+
+def test_branches(monkeypatch):
+    monkeypatch.setattr(chats, "ENABLE_CHAT_MESSAGE_TABLE", True)
+    chat = Chats.insert_new_chat(str(uuid4()), ChatForm(chat=get_chat()))
+
+    messages = Chats.get_message_list_by_id_and_message_id(chat.id, "m2b")
+    assert [message["id"] for message in messages] == ["m1", "m2b"]
+    assert messages[1]["content"] == "assistant m2b"
+    assert Chats.get_message_list_by_id_and_message_id(chat.id, "unknown") is None
+
+    history = Chats.get_chat_history_by_id(chat.id)
+    assert history.currentId == "m3"
+    assert [message["id"] for message in history.messages] == ["m1", "m2", "m3"]
+
+    inactive = Chats.get_inactive_messages_by_id(chat.id)
+    assert inactive.total == 1
+    assert [message["id"] for message in inactive.messages] == ["m2b"]
+    assert Chats.get_inactive_messages_by_id(chat.id, skip=1).messages == []
+
+
+def test_synced_on_update(monkeypatch):
+    monkeypatch.setattr(chats, "ENABLE_CHAT_MESSAGE_TABLE", True)
+    data = get_chat()
+    chat = Chats.insert_new_chat(str(uuid4()), ChatForm(chat=data))
+
+    # Only the given messages are written
+    messages = data["history"]["messages"]
+    messages["m3"]["content"] = "edited"
+    messages["m4"] = get_message("m4", "m3", "assistant", 5)
+    data["history"]["currentId"] = "m4"
+    Chats.update_chat_by_id(chat.id, data, message_ids=["m3", "m4"])
+
+    messages = Chats.get_message_list_by_id_and_message_id(chat.id, "m4")
+    assert [message["id"] for message in messages] == ["m1", "m2", "m3", "m4"]
+    assert messages[2]["content"] == "edited"
+
+    # And messages removed from the chat are deleted on a full sync
+    del data["history"]["messages"]["m2b"]
+    Chats.update_chat_by_id(chat.id, data)
+    assert get_message_ids(chat.id) == ["m1", "m2", "m3", "m4"]
+    assert Chats.get_inactive_messages_by_id(chat.id).total == 0
@@ -0,0 +1,141 @@
+import os
+from types import SimpleNamespace
+
+from open_webui.retrieval import bm25, utils
+from open_webui.retrieval.bm25 import SEGMENT_SUFFIX, TOMBSTONE_SUFFIX, BM25Index
+from open_webui.retrieval.vector.main import GetResult
+
+
+def get_items(file_id, texts):
+    return [
+        {
+            "id": f"{file_id}-{idx}",
+            "text": text,
+            "metadata": {"file_id": file_id, "hash": f"hash-{file_id}"},
+        }
+        for idx, text in enumerate(texts)
+    ]
+
+
+def get_files(index, suffix):
+    return [
+        name
+        for name in os.listdir(index._get_collection_path("kb"))
+        if name.endswith(suffix)
+    ]
+
+
+def test_add_and_search(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.add("kb", get_items("a", ["the quick brown fox"]))
+    # Collections that were never built are left to be built from the vector DB
+    assert not index.has_index("kb")
+    assert index.search("kb", "fox", 3) is None
+
+    index.add(
+        "kb",
+        get_items("a", ["the quick brown fox", "a lazy dog sleeps"]),
+        create=True,
+    )
+    index.add("kb", get_items("b", ["the fox and the dog", "nothing here"]))
+
+    result = index.search("kb", "fox", 3)
+    assert sorted(result.ids[0]) == ["a-0", "b-0"]
+    assert result.metadatas[0][0]["file_id"] in ["a", "b"]
+    assert result.distances[0][0] >= result.distances[0][1] > 0
+
+    assert index.search("kb", "dog", 1).ids[0] in [["a-1"], ["b-0"]]
+    assert index.search("kb", "missing", 3).ids == [[]]
+
+
+def test_delete_by_ids_and_filter(tmp_path):
+    index = BM25Index(str(tmp_path))
+    index.add("kb", get_items("a", ["red apple", "green apple"]), create=True)
+    index.add("kb", get_items("b", ["apple pie"]))
+    index.add("kb", get_items("c", ["apple juice"]))
+
+    index.delete("kb", ids=["a-0"])
+    assert sorted(index.search("kb", "apple", 10).ids[0]) == ["a-1", "b-0", "c-0"]
+
+    # Indexed fields, and other metadata read from the documents
+    index.delete("kb", filter={"file_id": "b"})
+    index.delete("kb", filter={"hash": "hash-c", "file_id": "c"})
+    assert index.search("kb", "apple", 10).ids[0] == ["a-1"]
+
+    index.add("kb", [{"id": "d-0", "text": "apple", "metadata": {"name": "d"}}])
+    index.delete("kb", filter={"name": "d"})
+    assert index.search("kb", "apple", 10).ids[0] == ["a-1"]
+
+
+def test_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25, "MAX_SEGMENTS", 2)
+    monkeypatch.setattr(bm25, "MAX_DELETED_RATIO", 0.5)
+    index = BM25Index(str(tmp_path))
+    index.add("kb", get_items("a", ["one fish"]), create=True)
+    index.add("kb", get_items("b", ["two fish"]))
+    assert len(get_files(index, SEGMENT_SUFFIX)) == 2
+
+    # Merged into one segment past MAX_SEGMENTS
+    index.add("kb", get_items("c", ["red fish"]))
+    assert len(get_files(index, SEGMENT_SUFFIX)) == 1
+    assert sorted(index.search("kb", "fish", 10).ids[0]) == ["a-0", "b-0", "c-0"]
+
+    # And once too many documents are deleted, dropping them for good
+    index.delete("kb", ids=["a-0"])
+    assert len(get_files(index, TOMBSTONE_SUFFIX)) == 1
+    index.delete("kb", filter={"file_id": "b"})
+    assert get_files(index, TOMBSTONE_SUFFIX) == []
+    assert len(get_files(index, SEGMENT_SUFFIX)) == 1
+    assert index.search("kb", "fish", 10).ids[0] == ["c-0"]
+
+
+def test_reload_and_build(tmp_path):
+    index = BM25Index(str(tmp_path))
+    assert not index.build("kb", None)
+
+    assert index.build(
+        "kb",
+        GetResult(
+            ids=[["a-0", "b-0"]],
+            documents=[["hello world", "goodbye world"]],
+            metadatas=[[{"file_id": "a"}, {"file_id": "b"}]],
+        ),
+    )
+    index.delete("kb", filter={"file_id": "b"})
+
+    # Another worker sharing the directory sees the same index
+    other = BM25Index(str(tmp_path))
+    assert other.has_index("kb")
+    assert other.search("kb", "world", 10).ids[0] == ["a-0"]
+
+    other.add("kb", get_items("c", ["world peace"]))
+    assert sorted(index.search("kb", "world", 10).ids[0]) == ["a-0", "c-0"]
+
+    other.drop("kb")
+    assert index.search("kb", "world", 10) is None
+
+
+def test_stale_index_rebuilt(tmp_path, monkeypatch):
+    index = BM25Index(str(tmp_path))
+    index.add("kb", get_items("a", ["hello world"]), create=True)
+    assert index.count("kb") == 1
+
+    # Chunks added through another node, with its own index directory
+    result = GetResult(
+        ids=[["a-0", "b-0"]],
+        documents=[["hello world", "goodbye world"]],
+        metadatas=[[{"file_id": "a"}, {"file_id": "b"}]],
+    )
+    client = SimpleNamespace(count=lambda name: 2, get=lambda collection_name: result)
+    monkeypatch.setattr(utils, "BM25_INDEX", index)
+    monkeypatch.setattr(utils, "VECTOR_DB_CLIENT", client)
+
+    assert utils.ensure_bm25_index("kb")
+    assert index.count("kb") == 2
+    assert sorted(index.search("kb", "world", 10).ids[0]) == ["a-0", "b-0"]
+
+    # Vector DBs that cannot count their collections keep the index
+    client.count = lambda name: None
+    index.add("kb", get_items("c", ["world peace"]))
+    assert utils.ensure_bm25_index("kb")
+    assert index.count("kb") == 3
@@ -0,0 +1,41 @@
+from uuid import uuid4
+
+from open_webui.models.knowledge_index import KnowledgeIndexes
+from open_webui.retrieval.vector.aliases import CollectionAliasClient
+
+
+class Client:
+    def __init__(self):
+        self.calls = []
+
+    def search(self, collection_name, vectors, limit):
+        self.calls.append(("search", collection_name))
+
+    def delete_collection(self, collection_name):
+        self.calls.append(("delete_collection", collection_name))
+
+
+def test_knowledge_bases_resolved_to_their_collection():
+    client = Client()
+    aliases = CollectionAliasClient(client, ttl=60)
+    id = str(uuid4())
+
+    aliases.search(collection_name=id, vectors=[[0.0]], limit=1)
+    assert client.calls[-1] == ("search", id)
+
+    KnowledgeIndexes.upsert_index_by_id(id, {"collection_name": f"{id}-new"})
+    # Cached until invalidated
+    aliases.search(collection_name=id, vectors=[[0.0]], limit=1)
+    assert client.calls[-1] == ("search", id)
+
+    aliases.invalidate()
+    aliases.search(collection_name=id, vectors=[[0.0]], limit=1)
+    assert client.calls[-1] == ("search", f"{id}-new")
+    aliases.search(collection_name="file-1", vectors=[[0.0]], limit=1)
+    assert client.calls[-1] == ("search", "file-1")
+
+    # Deleting the knowledge base collection forgets the alias
+    aliases.delete_collection(collection_name=id)
+    assert client.calls[-1] == ("delete_collection", f"{id}-new")
+    assert KnowledgeIndexes.get_index_by_id(id) is None
+    assert aliases.resolve(id) == id
@@ -0,0 +1,39 @@
+import asyncio
+
+from open_webui.retrieval import utils
+from open_webui.retrieval.utils import (
+    generate_embedding_batches,
+    generate_embeddings_async,
+)
+
+
+def test_batches_are_retried(monkeypatch):
+    monkeypatch.setattr(utils.time, "sleep", lambda seconds: None)
+    calls = []
+
+    def func(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise ConnectionError("Upstream unavailable")
+        return [[float(len(text))] for text in batch]
+
+    assert generate_embedding_batches([["a", "bb"]], func) == [[[1.0], [2.0]]]
+    assert len(calls) == 2
+
+
+def test_async_batches_are_retried_once(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(utils.time, "sleep", sleeps.append)
+    calls = []
+
+    def func(batch):
+        calls.append(batch)
+        raise ConnectionError("Upstream unavailable")
+
+    def embedding_function(texts, prefix=None, user=None):
+        return generate_embedding_batches([texts], func)
+
+    assert asyncio.run(generate_embeddings_async(embedding_function, ["a"], 1)) is None
+    # Only the retries of the embedding function, run off the event loop
+    assert len(calls) == utils.RAG_EMBEDDING_BATCH_MAX_RETRIES + 1
+    assert len(sleeps) == utils.RAG_EMBEDDING_BATCH_MAX_RETRIES
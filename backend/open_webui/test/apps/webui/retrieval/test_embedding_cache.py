@@ -0,0 +1,52 @@
+import pytest
+
+from open_webui.retrieval.embedding_cache import (
+    DiskEmbeddingCache,
+    EmbeddingCache,
+    MemoryEmbeddingCache,
+    get_cached_embedding_function,
+)
+
+
+@pytest.fixture(params=["memory", "disk"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryEmbeddingCache(max_entries=3)
+    return DiskEmbeddingCache(str(tmp_path / "embeddings.db"), max_entries=3)
+
+
+def test_class_instantiation():
+    with pytest.raises(TypeError):
+        EmbeddingCache(max_entries=3)
+    with pytest.raises(TypeError):
+
+        class Test(EmbeddingCache):
+            def _get_many(self, keys):
+                return [None] * len(keys)
+
+        Test(max_entries=3)
+    MemoryEmbeddingCache(max_entries=3)
+
+
+def test_cached_embedding_function(cache):
+    calls = []
+
+    def embedding_function(texts, prefix=None, user=None):
+        calls.append(texts)
+        return [[float(len(text)), 0.5] for text in texts]
+
+    func = get_cached_embedding_function(embedding_function, "openai", "m", cache)
+
+    assert func(["a", "bb", "a"]) == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    assert func("bb") == [2.0, 0.5]
+    assert calls == [["a", "bb"]]
+
+    # The prefix is part of the key
+    func("bb", prefix="query: ")
+    assert calls[-1] == ["bb"]
+
+    # "a" is the least recently used entry and was evicted
+    func(["ccc"])
+    func(["a"])
+    assert calls[-1] == ["a"]
+    assert cache.stats["evictions"] == 2
@@ -178,6 +178,46 @@ class TestChats(AbstractPostgresTest):
         assert data["title"] == "Just another title"
         assert data["user_id"] == "2"
 
+    def test_get_chat_history_by_id(self):
+        from open_webui.models.chats import ChatForm
+
+        chat = self.chats.insert_new_chat(
+            "2",
+            ChatForm(
+                **{
+                    "chat": {
+                        "history": {
+                            "currentId": "3",
+                            "messages": {
+                                "1": {"id": "1", "parentId": None, "timestamp": 1},
+                                "2": {"id": "2", "parentId": "1", "timestamp": 2},
+                                "3": {"id": "3", "parentId": "1", "timestamp": 3},
+                            },
+                        }
+                    }
+                }
+            ),
+        )
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url(f"/{chat.id}/history"))
+        assert response.status_code == 200
+        data = response.json()
+        assert data["currentId"] == "3"
+        assert [message["id"] for message in data["messages"]] == ["1", "3"]
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url(f"/{chat.id}/history/branches?skip=0&limit=10")
+            )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert [message["id"] for message in data["messages"]] == ["2"]
+
+        with mock_webui_user(id="3"):
+            response = self.fast_api_client.get(self.create_url(f"/{chat.id}/history"))
+        assert response.status_code == 401
+
     def test_delete_chat_by_id(self):
         chat_id = self.chats.get_chats()[0].id
         with mock_webui_user(id="2"):
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from open_webui.socket.utils import PresenceStore, PresenceBroadcaster
+
+
+def test_sessions():
+    async def main():
+        presence = PresenceStore(usage_timeout=3)
+        user = {"id": "user", "name": "User"}
+
+        assert await presence.add_session("sid1", user)
+        assert not await presence.add_session("sid2", user)
+        assert sorted(await presence.get_session_ids("user")) == ["sid1", "sid2"]
+        assert await presence.get_sessions(["sid1", "unknown"]) == [user, None]
+
+        assert await presence.remove_session("sid1") == (user, False)
+        assert await presence.is_user_active("user")
+
+        assert await presence.remove_session("sid2") == (user, True)
+        assert not await presence.is_user_active("user")
+        assert await presence.get_user_ids() == []
+        assert await presence.remove_session("sid2") == (None, False)
+
+    asyncio.run(main())
+
+
+def test_usage_expires():
+    async def main():
+        presence = PresenceStore(usage_timeout=3)
+
+        assert await presence.record_usage("llama3") == ["llama3"]
+
+        presence._usage["llama3"] = time.time() - 1
+        assert await presence.get_models_in_use() == []
+
+    asyncio.run(main())
+
+
+def test_models_broadcast_on_change():
+    async def main():
+        presence = PresenceStore(usage_timeout=3)
+
+        assert not await presence.update_models_broadcast([])
+        assert await presence.update_models_broadcast(["llama3"])
+        assert not await presence.update_models_broadcast(["llama3"])
+        assert await presence.update_models_broadcast([])
+
+    asyncio.run(main())
+
+
+def test_broadcaster_batches_changes():
+    emitted = []
+
+    async def emit(room, data):
+        emitted.append((room, data))
+
+    async def main():
+        broadcaster = PresenceBroadcaster(0.05, emit)
+        await broadcaster.update("a", True, ["admins", "channel:1"])
+        await broadcaster.update("b", True, ["admins"])
+        await broadcaster.update("c", True, ["admins"])
+        await broadcaster.update("c", False, ["admins"])
+        assert emitted == []
+
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    assert emitted == [
+        ("admins", {"joined": ["a", "b"], "left": ["c"]}),
+        ("channel:1", {"joined": ["a"], "left": []}),
+    ]
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+from open_webui.storage.cache import StorageCache
+
+
+class FakeRemote:
+    def __init__(self, content: bytes, etag: str = "v1"):
+        self.content = content
+        self.etag = etag
+        self.downloads = 0
+        self.versions = 0
+
+    def get_version(self):
+        self.versions += 1
+        return self.etag, len(self.content)
+
+    def download(self, path):
+        self.downloads += 1
+        time.sleep(0.05)
+        with open(path, "wb") as f:
+            f.write(self.content)
+
+
+def test_get_downloads_once(tmp_path):
+    cache = StorageCache(max_size=0, validate_interval=60)
+    remote = FakeRemote(b"hello")
+    path = str(tmp_path / "file")
+
+    assert cache.get(path, remote.get_version, remote.download) == path
+    assert cache.get(path, remote.get_version, remote.download) == path
+    assert open(path, "rb").read() == b"hello"
+    assert remote.downloads == 1
+    assert remote.versions == 1
+
+    stats = cache.get_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["downloaded_bytes"] == 5
+
+
+def test_get_concurrent_downloads_are_shared(tmp_path):
+    cache = StorageCache(max_size=0, validate_interval=60)
+    remote = FakeRemote(b"hello")
+    path = str(tmp_path / "file")
+
+    threads = [
+        threading.Thread(
+            target=cache.get, args=(path, remote.get_version, remote.download)
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert remote.downloads == 1
+    assert cache.get_stats()["shared"] + cache.get_stats()["hits"] == 7
+
+
+def test_get_download_error_is_shared(tmp_path):
+    cache = StorageCache(max_size=0, validate_interval=60)
+    path = str(tmp_path / "file")
+
+    def download(path):
+        raise RuntimeError("not found")
+
+    with pytest.raises(RuntimeError):
+        cache.get(path, lambda: ("v1", 5), download)
+    assert not list(tmp_path.iterdir())
+
+
+def test_get_revalidates_changed_files(tmp_path):
+    cache = StorageCache(max_size=0, validate_interval=0)
+    remote = FakeRemote(b"hello")
+    path = str(tmp_path / "file")
+
+    cache.get(path, remote.get_version, remote.download)
+    cache.get(path, remote.get_version, remote.download)
+    assert remote.downloads == 1
+    assert cache.get_stats()["validations"] == 1
+
+    remote.content, remote.etag = b"world", "v2"
+    cache.get(path, remote.get_version, remote.download)
+    assert remote.downloads == 2
+    assert open(path, "rb").read() == b"world"
+
+
+def test_put_seeds_uploaded_files(tmp_path):
+    cache = StorageCache(max_size=0, validate_interval=0)
+    remote = FakeRemote(b"hello")
+    path = tmp_path / "file"
+    path.write_bytes(b"hello")
+
+    cache.put(str(path), None, 5)
+    cache.get(str(path), remote.get_version, remote.download)
+    assert remote.downloads == 0
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = StorageCache(max_size=10, validate_interval=60)
+    remotes = {name: FakeRemote(b"12345") for name in ["a", "b", "c"]}
+    paths = {name: str(tmp_path / name) for name in remotes}
+
+    cache.get(paths["a"], remotes["a"].get_version, remotes["a"].download)
+    cache.get(paths["b"], remotes["b"].get_version, remotes["b"].download)
+    cache.get(paths["a"], remotes["a"].get_version, remotes["a"].download)
+    cache.get(paths["c"], remotes["c"].get_version, remotes["c"].download)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a", "c"]
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["size"] == 10
+    assert stats["entries"] == 2
+
+    cache.remove(paths["a"])
+    assert cache.get_stats()["size"] == 5
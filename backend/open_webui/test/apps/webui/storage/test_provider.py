@@ -1,3 +1,4 @@
+import hashlib
 import io
 import os
 import boto3
@@ -8,6 +9,7 @@ from open_webui.storage import provider
 from gcp_storage_emulator.server import create_server
 from google.cloud import storage
 from azure.storage.blob import BlobServiceClient, ContainerClient, BlobClient
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
 
@@ -66,14 +68,35 @@ class TestLocalStorageProvider:
 
     def test_upload_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, file_path = self.Storage.upload_file(self.file_bytesio, self.filename)
+        upload, file_path = self.Storage.upload_file(self.file_bytesio, self.filename)
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert upload == {
+            "size": len(self.file_content),
+            "sha256": hashlib.sha256(self.file_content).hexdigest(),
+        }
         assert file_path == str(upload_dir / self.filename)
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
 
+    def test_upload_file_in_chunks(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        monkeypatch.setattr(provider, "UPLOAD_CHUNK_SIZE", 4)
+
+        class Reader(io.BytesIO):
+            sizes = []
+
+            def read(self, size=-1):
+                self.sizes.append(size)
+                return super().read(size)
+
+        file = Reader(self.file_content)
+        upload, file_path = self.Storage.upload_file(file, self.filename)
+        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        assert upload["size"] == len(self.file_content)
+        # Never read whole
+        assert all(0 < size <= 4 for size in file.sizes)
+
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         file_path = str(upload_dir / self.filename)
@@ -100,7 +123,7 @@ class TestLocalStorageProvider:
 @mock_aws
 class TestS3StorageProvider:
 
-    def __init__(self):
+    def setup_method(self, method):
         self.Storage = provider.S3StorageProvider()
         self.Storage.bucket_name = "my-bucket"
         self.s3_client = boto3.resource("s3", region_name="us-east-1")
@@ -108,7 +131,6 @@ class TestS3StorageProvider:
         self.filename = "test.txt"
         self.filename_extra = "test_exyta.txt"
         self.file_bytesio_empty = io.BytesIO()
-        super().__init__()
 
     def test_upload_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
@@ -116,7 +138,7 @@ class TestS3StorageProvider:
         with pytest.raises(Exception):
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        upload, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         object = self.s3_client.Object(self.Storage.bucket_name, self.filename)
@@ -124,7 +146,7 @@ class TestS3StorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert upload["size"] == len(self.file_content)
         assert s3_file_path == "s3://" + self.Storage.bucket_name + "/" + self.filename
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -132,7 +154,7 @@ class TestS3StorageProvider:
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        upload, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         file_path = self.Storage.get_file(s3_file_path)
@@ -142,7 +164,7 @@ class TestS3StorageProvider:
     def test_delete_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        upload, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         assert (upload_dir / self.filename).exists()
@@ -229,7 +251,7 @@ class TestGCSStorageProvider:
         with pytest.raises(Exception):
             self.Storage.bucket = monkeypatch(self.Storage, "bucket", None)
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
-        contents, gcs_file_path = self.Storage.upload_file(
+        upload, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         object = self.Storage.bucket.get_blob(self.filename)
@@ -237,7 +259,7 @@ class TestGCSStorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert upload["size"] == len(self.file_content)
         assert gcs_file_path == "gs://" + self.Storage.bucket_name + "/" + self.filename
         # test error if file is empty
         with pytest.raises(ValueError):
@@ -245,7 +267,7 @@ class TestGCSStorageProvider:
 
     def test_get_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
+        upload, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         file_path = self.Storage.get_file(gcs_file_path)
@@ -254,7 +276,7 @@ class TestGCSStorageProvider:
 
     def test_delete_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
+        upload, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         # ensure that local directory has the uploaded file as well
@@ -292,10 +314,7 @@ class TestGCSStorageProvider:
 
 
 class TestAzureStorageProvider:
-    def __init__(self):
-        super().__init__()
-
-    @pytest.fixture(scope="class")
+    @pytest.fixture(autouse=True)
     def setup_storage(self, monkeypatch):
         # Create mock Blob Service Client and related clients
         mock_blob_service_client = MagicMock()
@@ -307,21 +326,16 @@ class TestAzureStorageProvider:
             mock_container_client
         )
         mock_container_client.get_blob_client.return_value = mock_blob_client
+        # Read the stream like the SDK does
+        mock_blob_client.upload_blob.side_effect = lambda data, **kwargs: data.read()
 
         # Monkeypatch the Azure classes to return our mocks
         monkeypatch.setattr(
-            azure.storage.blob,
+            provider,
             "BlobServiceClient",
             lambda *args, **kwargs: mock_blob_service_client,
         )
-        monkeypatch.setattr(
-            azure.storage.blob,
-            "ContainerClient",
-            lambda *args, **kwargs: mock_container_client,
-        )
-        monkeypatch.setattr(
-            azure.storage.blob, "BlobClient", lambda *args, **kwargs: mock_blob_client
-        )
+        monkeypatch.setattr(provider, "DefaultAzureCredential", MagicMock())
 
         self.Storage = provider.AzureStorageProvider()
         self.Storage.endpoint = "https://myaccount.blob.core.windows.net"
@@ -347,17 +361,14 @@ class TestAzureStorageProvider:
 
         # Reset side effect and create container
         self.Storage.container_client.get_blob_client.side_effect = None
-        self.Storage.create_container()
-        contents, azure_file_path = self.Storage.upload_file(
+        upload, azure_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
 
         # Assertions
         self.Storage.container_client.get_blob_client.assert_called_with(self.filename)
-        self.Storage.container_client.get_blob_client().upload_blob.assert_called_once_with(
-            self.file_content, overwrite=True
-        )
-        assert contents == self.file_content
+        self.Storage.container_client.get_blob_client().upload_blob.assert_called_once()
+        assert upload["size"] == len(self.file_content)
         assert (
             azure_file_path
             == f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
@@ -368,9 +379,15 @@ class TestAzureStorageProvider:
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
 
+        # Uploads that stop before the end of the file are not reported as complete
+        self.Storage.container_client.get_blob_client().upload_blob.side_effect = (
+            lambda data, **kwargs: data.read(4)
+        )
+        with pytest.raises(RuntimeError):
+            self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
+
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        self.Storage.create_container()
 
         # Mock upload behavior
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
@@ -388,7 +405,6 @@ class TestAzureStorageProvider:
 
     def test_delete_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        self.Storage.create_container()
 
         # Mock file upload
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
@@ -403,7 +419,6 @@ class TestAzureStorageProvider:
 
     def test_delete_all_files(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        self.Storage.create_container()
 
         # Mock file uploads
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
@@ -411,20 +426,20 @@ class TestAzureStorageProvider:
 
         # Mock listing and deletion behavior
         self.Storage.container_client.list_blobs.return_value = [
-            {"name": self.filename},
-            {"name": self.filename_extra},
+            SimpleNamespace(name=self.filename),
+            SimpleNamespace(name=self.filename_extra),
         ]
         self.Storage.container_client.get_blob_client().delete_blob.return_value = None
 
         self.Storage.delete_all_files()
 
         self.Storage.container_client.list_blobs.assert_called_once()
-        self.Storage.container_client.get_blob_client().delete_blob.assert_any_call()
+        self.Storage.container_client.delete_blob.assert_any_call(self.filename)
+        self.Storage.container_client.delete_blob.assert_any_call(self.filename_extra)
         assert not (upload_dir / self.filename).exists()
         assert not (upload_dir / self.filename_extra).exists()
 
     def test_get_file_not_found(self, monkeypatch):
-        self.Storage.create_container()
 
         file_url = f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
         # Mock behavior to raise an error for missing blobs
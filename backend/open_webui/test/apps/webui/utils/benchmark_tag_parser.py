@@ -0,0 +1,236 @@
+"""
+Compares StreamTagParser with the regex tag_content_handler it replaced in
+process_chat_response, on long synthetic reasoning streams.
+
+    cd backend && PYTHONPATH=. python open_webui/test/apps/webui/utils/benchmark_tag_parser.py
+"""
+
+import random
+import re
+import time
+
+from open_webui.utils.tag_parser import StreamTagParser
+
+
+REASONING_TAGS = [
+    ("think", "/think"),
+    ("thinking", "/thinking"),
+    ("reason", "/reason"),
+    ("reasoning", "/reasoning"),
+    ("thought", "/thought"),
+    ("Thought", "/Thought"),
+    ("|begin_of_thought|", "|end_of_thought|"),
+]
+SOLUTION_TAGS = [("|begin_of_solution|", "|end_of_solution|")]
+
+
+# Previous implementation, kept for comparison
+def tag_content_handler(content_type, tags, content, content_blocks):
+    end_flag = False
+
+    def extract_attributes(tag_content):
+        """Extract attributes from a tag if they exist."""
+        attributes = {}
+        if not tag_content:  # Ensure tag_content is not None
+            return attributes
+        # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+        matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
+        for key, value in matches:
+            attributes[key] = value
+        return attributes
+
+    if content_blocks[-1]["type"] == "text":
+        for start_tag, end_tag in tags:
+            # Match start tag e.g., <tag> or <tag attr="value">
+            start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
+            match = re.search(start_tag_pattern, content)
+            if match:
+                attr_content = (
+                    match.group(1) if match.group(1) else ""
+                )  # Ensure it's not None
+                attributes = extract_attributes(
+                    attr_content
+                )  # Extract attributes safely
+
+                # Capture everything before and after the matched tag
+                before_tag = content[: match.start()]  # Content before opening tag
+                after_tag = content[match.end() :]  # Content after opening tag
+
+                # Remove the start tag and after from the currently handling text block
+                content_blocks[-1]["content"] = content_blocks[-1]["content"].replace(
+                    match.group(0) + after_tag, ""
+                )
+
+                if before_tag:
+                    content_blocks[-1]["content"] = before_tag
+
+                if not content_blocks[-1]["content"]:
+                    content_blocks.pop()
+
+                # Append the new block
+                content_blocks.append(
+                    {
+                        "type": content_type,
+                        "start_tag": start_tag,
+                        "end_tag": end_tag,
+                        "attributes": attributes,
+                        "content": "",
+                        "started_at": time.time(),
+                    }
+                )
+
+                if after_tag:
+                    content_blocks[-1]["content"] = after_tag
+
+                break
+    elif content_blocks[-1]["type"] == content_type:
+        start_tag = content_blocks[-1]["start_tag"]
+        end_tag = content_blocks[-1]["end_tag"]
+        # Match end tag e.g., </tag>
+        end_tag_pattern = rf"<{re.escape(end_tag)}>"
+
+        # Check if the content has the end tag
+        if re.search(end_tag_pattern, content):
+            end_flag = True
+
+            block_content = content_blocks[-1]["content"]
+            # Strip start and end tags from the content
+            start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
+            block_content = re.sub(start_tag_pattern, "", block_content).strip()
+
+            end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
+            split_content = end_tag_regex.split(block_content, maxsplit=1)
+
+            # Content inside the tag
+            block_content = split_content[0].strip() if split_content else ""
+
+            # Leftover content (everything after `</tag>`)
+            leftover_content = (
+                split_content[1].strip() if len(split_content) > 1 else ""
+            )
+
+            if block_content:
+                content_blocks[-1]["content"] = block_content
+                content_blocks[-1]["ended_at"] = time.time()
+                content_blocks[-1]["duration"] = int(
+                    content_blocks[-1]["ended_at"] - content_blocks[-1]["started_at"]
+                )
+
+                # Reset the content_blocks by appending a new text block
+                if content_type != "code_interpreter":
+                    if leftover_content:
+
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": leftover_content,
+                            }
+                        )
+                    else:
+                        content_blocks.append(
+                            {
+                                "type": "text",
+                                "content": "",
+                            }
+                        )
+
+            else:
+                # Remove the block if content is empty
+                content_blocks.pop()
+
+                if leftover_content:
+                    content_blocks.append(
+                        {
+                            "type": "text",
+                            "content": leftover_content,
+                        }
+                    )
+                else:
+                    content_blocks.append(
+                        {
+                            "type": "text",
+                            "content": "",
+                        }
+                    )
+
+            # Clean processed content
+            content = re.sub(
+                rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
+                "",
+                content,
+                flags=re.DOTALL,
+            )
+
+    return content, content_blocks, end_flag
+
+
+def generate_stream(tokens: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    words = ["the", "model", "a < b", "considers", "value", "\n", "step", "<b>x</b>"]
+    reasoning = [f"{rng.choice(words)} " for _ in range(tokens * 9 // 10)]
+    answer = [f"{rng.choice(words)} " for _ in range(tokens // 10)]
+    text = "<think>" + "".join(reasoning) + "</think>\n\n" + "".join(answer)
+
+    # Deltas of 1 to 8 characters, splitting tags at arbitrary points
+    chunks = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 8)
+        chunks.append(text[i : i + size])
+        i += size
+    return chunks
+
+
+def run_legacy(chunks):
+    content = ""
+    content_blocks = [{"type": "text", "content": ""}]
+    for value in chunks:
+        content = f"{content}{value}"
+        content_blocks[-1]["content"] = content_blocks[-1]["content"] + value
+        content, content_blocks, _ = tag_content_handler(
+            "reasoning", REASONING_TAGS, content, content_blocks
+        )
+        content, content_blocks, _ = tag_content_handler(
+            "solution", SOLUTION_TAGS, content, content_blocks
+        )
+    return content_blocks
+
+
+def run_parser(chunks):
+    content_blocks = [{"type": "text", "content": ""}]
+    parser = StreamTagParser(
+        content_blocks, [("reasoning", REASONING_TAGS), ("solution", SOLUTION_TAGS)]
+    )
+    for value in chunks:
+        parser.feed(value)
+    parser.flush()
+    return content_blocks
+
+
+def summarize(content_blocks):
+    return [
+        (block["type"], block["content"].strip())
+        for block in content_blocks
+        if block["content"].strip()
+    ]
+
+
+if __name__ == "__main__":
+    for tokens in [1000, 5000, 10000, 30000]:
+        chunks = generate_stream(tokens)
+
+        start = time.perf_counter()
+        legacy_blocks = run_legacy(chunks)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parser_blocks = run_parser(chunks)
+        parser_time = time.perf_counter() - start
+
+        assert summarize(legacy_blocks) == summarize(parser_blocks)
+        print(
+            f"{tokens:>6} tokens, {len(chunks):>6} deltas: "
+            f"regex {legacy_time * 1000:9.1f} ms, "
+            f"parser {parser_time * 1000:7.1f} ms, "
+            f"{legacy_time / parser_time:6.1f}x"
+        )
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from starlette.responses import StreamingResponse
+
+from open_webui.utils.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    release_on_completion,
+)
+
+
+def test_users_take_turns():
+    async def main():
+        admission = AdmissionController(0, 1, 0, 0, queue_timeout=10)
+        order = []
+
+        async def generate(user_id, name):
+            release = await admission.acquire(user_id, model_id="llama3")
+            order.append(name)
+            await asyncio.sleep(0)
+            release()
+
+        release = await admission.acquire("a", model_id="llama3")
+        generations = [
+            asyncio.create_task(generate("a", "a1")),
+            asyncio.create_task(generate("a", "a2")),
+            asyncio.create_task(generate("a", "a3")),
+            asyncio.create_task(generate("b", "b1")),
+        ]
+        await asyncio.sleep(0)
+        assert admission.get_stats()["waiting"] == 4
+
+        release()
+        await asyncio.gather(*generations)
+        assert order == ["a1", "b1", "a2", "a3"]
+
+    asyncio.run(main())
+
+
+def test_queue_position_and_limits():
+    async def main():
+        admission = AdmissionController(1, 0, 0, 1, queue_timeout=0.05)
+        positions = []
+
+        async def on_queued(position):
+            positions.append(position)
+
+        await admission.acquire("a", upstreams=["http://ollama:11434"])
+        await admission.acquire("b", on_queued=on_queued)
+
+        queued = asyncio.create_task(admission.acquire("a", on_queued=on_queued))
+        await asyncio.sleep(0)
+        assert positions == [1]
+
+        # Over the queue depth of the user
+        with pytest.raises(AdmissionRejected):
+            await admission.acquire("a")
+
+        with pytest.raises(AdmissionRejected):
+            await queued
+        assert admission.get_stats()["waiting"] == 0
+
+    asyncio.run(main())
+
+
+def test_release_when_stream_fails():
+    async def main():
+        admission = AdmissionController(1, 0, 0, 0, queue_timeout=0.05)
+
+        async def stream():
+            yield b"data: {}\n\n"
+            raise ConnectionError("Upstream closed the connection")
+
+        release = await admission.acquire("a", model_id="llama3")
+        response = release_on_completion(StreamingResponse(stream()), release)
+
+        with pytest.raises(ConnectionError):
+            async for _ in response.body_iterator:
+                pass
+        assert admission.get_stats()["in_flight"] == {}
+
+        # The slot of the user is free again
+        release = await admission.acquire("a", model_id="llama3")
+        release()
+
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+import json
+
+from open_webui.config import AppConfig, PersistentConfig
+
+
+class Redis:
+    def __init__(self):
+        self.values = {}
+        self.version = 0
+        self.syncs = 0
+
+    def pipeline(self):
+        return Pipeline(self)
+
+
+class Pipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.keys = []
+
+    def get(self, key):
+        pass
+
+    def mget(self, keys):
+        self.keys = keys
+
+    def execute(self):
+        self.redis.syncs += 1
+        return [self.redis.version, [self.redis.values.get(key) for key in self.keys]]
+
+
+def get_config():
+    config = AppConfig()
+    redis = Redis()
+    object.__setattr__(config, "_redis", redis)
+
+    config.TEST_NAME = PersistentConfig("TEST_NAME", "test.name", "Open WebUI")
+    config.TEST_LIMIT = PersistentConfig("TEST_LIMIT", "test.limit", 10)
+    return config, redis
+
+
+def get_message(key, value, version):
+    return {"data": json.dumps({"key": key, "value": value, "version": version})}
+
+
+def test_updates_applied_in_sequence():
+    config, redis = get_config()
+
+    # Keys registered since the last sync are read once
+    assert config.TEST_NAME == "Open WebUI"
+    assert config.TEST_LIMIT == 10
+    assert redis.syncs == 1
+
+    config._handle_message(get_message("TEST_NAME", "Chat", 1))
+    assert config.TEST_NAME == "Chat"
+    assert config._version == 1
+
+    # Already applied
+    config._handle_message(get_message("TEST_NAME", "Old", 1))
+    assert config.TEST_NAME == "Chat"
+    assert redis.syncs == 1
+
+
+def test_missed_update_reads_everything():
+    config, redis = get_config()
+    config._handle_message(get_message("TEST_NAME", "Chat", 1))
+
+    redis.values = {
+        "open-webui:config:TEST_NAME": json.dumps("Chat"),
+        "open-webui:config:TEST_LIMIT": json.dumps(20),
+    }
+    redis.version = 3
+    config._handle_message(get_message("TEST_NAME", "Chat", 3))
+
+    assert config._version == 3
+    assert config.TEST_LIMIT == 20
+
+
+def test_invalid_messages_ignored():
+    config, redis = get_config()
+    config.TEST_NAME
+
+    config._handle_message({"data": "not json"})
+    config._handle_message(get_message("UNKNOWN", "value", 1))
+    assert config.TEST_NAME == "Open WebUI"
+    assert config._version == 1
+
+    config._set_value("TEST_LIMIT", 5)
+    assert config.TEST_LIMIT == 5
+    assert redis.syncs == 1
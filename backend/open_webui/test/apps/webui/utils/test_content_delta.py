@@ -0,0 +1,83 @@
+from open_webui.utils.content_delta import ContentDeltaTracker
+from open_webui.utils.middleware import serialize_content_blocks
+
+
+def render(snapshot):
+    """Content rebuilt by clients, like getContentFromDeltaEvent."""
+    block = snapshot["block"]
+    if block["type"] == "reasoning":
+        content = "\n".join(
+            line if line.startswith(">") else f"> {line}"
+            for line in block["content"].splitlines()
+        )
+        if "duration" in block:
+            rendered = f'\n<details type="reasoning" done="true" duration="{block["duration"]}">\n<summary>Thought for {block["duration"]} seconds</summary>\n{content}\n</details>\n'
+        else:
+            rendered = f'\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{content}\n</details>\n'
+    else:
+        rendered = f"{block['content'].strip()}\n"
+    return (snapshot["prefix"] + rendered).strip()
+
+
+def test_deltas_between_snapshots():
+    tracker = ContentDeltaTracker(serialize_content_blocks, snapshot_interval=60)
+    content_blocks = [{"type": "text", "content": "Hel"}]
+
+    snapshot = tracker.get_data(content_blocks)["snapshot"]
+    assert snapshot["seq"] == 1
+    assert snapshot["prefix"] == ""
+    assert snapshot["block"] == {"index": 0, "type": "text", "content": "Hel"}
+
+    assert tracker.get_data(content_blocks) is None
+
+    content_blocks[0]["content"] += "lo"
+    assert tracker.get_data(content_blocks) == {
+        "delta": {"seq": 2, "index": 0, "content": "lo"}
+    }
+    # Saved content is only updated on snapshots
+    assert tracker.content == "Hel"
+
+
+def test_snapshot_on_new_block():
+    tracker = ContentDeltaTracker(serialize_content_blocks, snapshot_interval=60)
+    content_blocks = [{"type": "reasoning", "content": "hmm", "duration": None}]
+    snapshot = tracker.get_data(content_blocks)["snapshot"]
+    assert render(snapshot) == tracker.content
+
+    content_blocks[0]["duration"] = 2
+    content_blocks.append({"type": "text", "content": ""})
+    snapshot = tracker.get_data(content_blocks)["snapshot"]
+
+    assert snapshot["block"]["index"] == 1
+    assert tracker.content == serialize_content_blocks(content_blocks)
+    assert render(snapshot) == tracker.content
+
+    # Text streamed after the reasoning stays on its own line
+    content_blocks[1]["content"] += "Answer"
+    snapshot["block"]["content"] += tracker.get_data(content_blocks)["delta"]["content"]
+    assert render(snapshot) == serialize_content_blocks(content_blocks)
+    assert render(snapshot).endswith("</details>\nAnswer")
+
+
+def test_full_content_for_other_blocks():
+    tracker = ContentDeltaTracker(serialize_content_blocks, snapshot_interval=60)
+    content_blocks = [{"type": "text", "content": "a"}]
+    tracker.get_data(content_blocks)
+
+    content_blocks.append({"type": "source", "content": "b"})
+    assert tracker.get_data(content_blocks) == {"content": "a\nsource: b"}
+
+    # The next text block starts from a snapshot
+    content_blocks.append({"type": "text", "content": "c"})
+    snapshot = tracker.get_data(content_blocks)["snapshot"]
+    assert render(snapshot) == "a\nsource: b\nc"
+
+
+def test_periodic_snapshot():
+    tracker = ContentDeltaTracker(serialize_content_blocks, snapshot_interval=0)
+    content_blocks = [{"type": "text", "content": "a"}]
+    tracker.get_data(content_blocks)
+
+    tracker._snapshot_at -= 1
+    content_blocks[0]["content"] += "b"
+    assert "snapshot" in tracker.get_data(content_blocks)
@@ -0,0 +1,112 @@
+import asyncio
+
+from open_webui.utils.emit_coalescer import EmitCoalescer, merge_completion_data
+
+
+KEY = ("chat", "message")
+
+
+def chunk(text):
+    return {"id": "1", "choices": [{"index": 0, "delta": {"content": text}}]}
+
+
+def run(coalescer, events, sessions=2):
+    sent = []
+
+    async def send(event_data):
+        sent.append(event_data)
+        return sessions
+
+    async def main():
+        for event_data, coalesce in events:
+            await coalescer.emit(KEY, event_data, send, coalesce=coalesce)
+        await asyncio.sleep(coalescer.interval * 2)
+
+    asyncio.run(main())
+    return sent
+
+
+def test_batches_until_interval():
+    coalescer = EmitCoalescer(interval=0.05, max_events=0)
+    events = [
+        ({"type": "chat:completion", "data": chunk(text)}, True)
+        for text in ["Hel", "lo", " world"]
+    ]
+
+    sent = run(coalescer, events)
+
+    assert sent == [{"type": "chat:completion", "data": chunk("Hello world")}]
+    assert coalescer.stats["session_emits"] == 2
+    assert coalescer.stats["session_emits_saved"] == 4
+
+
+def test_other_events_flush_in_order():
+    coalescer = EmitCoalescer(interval=10, max_events=0)
+    events = [
+        ({"type": "chat:completion", "data": {"content": "a"}}, True),
+        ({"type": "chat:completion", "data": {"content": "ab"}}, True),
+        ({"type": "status", "data": {"description": "Searching"}}, False),
+        ({"type": "chat:completion", "data": {"content": "abc"}}, True),
+        ({"type": "chat:completion", "data": {"done": True, "content": "abc"}}, False),
+    ]
+
+    sent = run(coalescer, events)
+
+    assert [event_data["data"] for event_data in sent] == [
+        {"content": "ab"},
+        {"description": "Searching"},
+        {"content": "abc"},
+        {"done": True, "content": "abc"},
+    ]
+
+
+def test_max_events():
+    coalescer = EmitCoalescer(interval=10, max_events=2)
+    events = [
+        ({"type": "chat:completion", "data": chunk(text)}, True)
+        for text in ["a", "b", "c"]
+    ]
+
+    async def main():
+        sent = []
+
+        async def send(event_data):
+            sent.append(event_data)
+            return 1
+
+        for event_data, coalesce in events:
+            await coalescer.emit(KEY, event_data, send, coalesce=coalesce)
+        return sent
+
+    assert asyncio.run(main()) == [{"type": "chat:completion", "data": chunk("ab")}]
+
+
+def test_merge_deltas():
+    snapshot = {
+        "snapshot": {
+            "seq": 1,
+            "prefix": "",
+            "block": {"index": 0, "type": "text", "content": "a"},
+        }
+    }
+    merged = merge_completion_data(
+        snapshot, {"delta": {"seq": 2, "index": 0, "content": "b"}}
+    )
+    assert merged["snapshot"]["seq"] == 2
+    assert merged["snapshot"]["block"]["content"] == "ab"
+
+    merged = merge_completion_data(
+        {"delta": {"seq": 3, "index": 0, "content": "c"}},
+        {"delta": {"seq": 4, "index": 0, "content": "d"}},
+    )
+    assert merged == {"delta": {"seq": 4, "first_seq": 3, "index": 0, "content": "cd"}}
+
+    # Deltas of another block or with a gap are not merged
+    assert (
+        merge_completion_data(
+            {"delta": {"seq": 3, "index": 0, "content": "c"}},
+            {"delta": {"seq": 5, "index": 0, "content": "d"}},
+        )
+        is None
+    )
+    assert merge_completion_data({"content": "a"}, chunk("b")) is None
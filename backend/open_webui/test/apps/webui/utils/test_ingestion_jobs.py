@@ -0,0 +1,57 @@
+from uuid import uuid4
+
+from open_webui.internal.db import get_db
+from open_webui.models.jobs import IngestionJob, IngestionJobs
+
+
+def claim_all(worker_id):
+    jobs = []
+    while job := IngestionJobs.claim_next_job(worker_id, lease=60, max_attempts=3):
+        jobs.append(job)
+    return jobs
+
+
+def test_users_take_turns():
+    with get_db() as db:
+        db.query(IngestionJob).delete()
+        db.commit()
+
+    busy, other = str(uuid4()), str(uuid4())
+    for i in range(3):
+        IngestionJobs.insert_new_job(busy, f"busy-{i}", "process")
+    IngestionJobs.insert_new_job(other, "other", "process")
+
+    first = IngestionJobs.claim_next_job("worker", lease=60, max_attempts=3)
+    second = IngestionJobs.claim_next_job("worker", lease=60, max_attempts=3)
+    # The other user goes before the remaining files of the busy user
+    assert {first.user_id, second.user_id} == {busy, other}
+    assert first.attempts == 1 and first.status == "processing"
+
+    assert len(claim_all("worker")) == 2
+    assert IngestionJobs.get_job_stats() == {"processing": 4}
+
+
+def test_expired_lease_reclaimed():
+    with get_db() as db:
+        db.query(IngestionJob).delete()
+        db.commit()
+
+    job = IngestionJobs.insert_new_job(str(uuid4()), "file", "transcribe")
+    claimed = IngestionJobs.claim_next_job("crashed", lease=-1, max_attempts=3)
+    assert claimed.id == job.id
+
+    # Only the worker holding the job updates it
+    assert IngestionJobs.update_job_by_id(job.id, {"progress": 0.5}, "other") is None
+
+    job = IngestionJobs.claim_next_job("crashed", lease=-1, max_attempts=3)
+    assert job.worker_id == "crashed" and job.attempts == 2
+    assert IngestionJobs.get_latest_job_by_file_id("file").id == job.id
+
+    job = IngestionJobs.claim_next_job("crashed", lease=-1, max_attempts=3)
+    assert job.attempts == 3
+
+    # Jobs crashing their worker on every attempt are not claimed again
+    assert IngestionJobs.claim_next_job("worker", lease=60, max_attempts=3) is None
+    job = IngestionJobs.get_job_by_id(job.id)
+    assert job.status == "failed" and job.error
+    assert job.worker_id is None and job.locked_until is None
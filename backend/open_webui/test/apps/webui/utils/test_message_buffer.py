@@ -0,0 +1,95 @@
+import asyncio
+
+from sqlalchemy import event
+
+from open_webui.internal.db import engine
+from open_webui.models.chats import ChatForm, Chats
+from open_webui.utils.message_buffer import MessageWriteBuffer
+
+
+HISTORY_SIZE = 200
+TOKENS = 500
+
+
+class WrittenBytes:
+    """Counts the bytes of the statement parameters sent to the database."""
+
+    def __init__(self):
+        self.total = 0
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self.count)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(engine, "before_cursor_execute", self.count)
+
+    def count(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE"):
+            self.total += len(statement) + len(str(parameters))
+
+
+def create_chat():
+    messages = {
+        f"m{idx}": {
+            "id": f"m{idx}",
+            "parentId": f"m{idx - 1}" if idx else None,
+            "role": "user" if idx % 2 else "assistant",
+            "content": "lorem ipsum dolor sit amet " * 40,
+        }
+        for idx in range(HISTORY_SIZE)
+    }
+    messages["answer"] = {"id": "answer", "role": "assistant", "content": ""}
+
+    return Chats.insert_new_chat(
+        "benchmark",
+        ChatForm(
+            chat={
+                "title": "benchmark",
+                "history": {"messages": messages, "currentId": "answer"},
+            }
+        ),
+    )
+
+
+def test_message_buffer_bytes_per_token():
+    # Before: every streamed token rewrites the whole chat
+    chat = create_chat()
+    content = ""
+    with WrittenBytes() as before:
+        for idx in range(TOKENS):
+            content += f"token{idx} "
+            Chats.upsert_message_to_chat_by_id_and_message_id(
+                chat.id, "answer", {"content": content}
+            )
+
+    # After: tokens are coalesced and written as a message-level update
+    chat = create_chat()
+    buffer = MessageWriteBuffer(interval=0.05)
+
+    async def stream():
+        content = ""
+        for idx in range(TOKENS):
+            content += f"token{idx} "
+            await buffer.update(chat.id, "answer", {"content": content})
+            if idx % 50 == 0:
+                await asyncio.sleep(0.06)
+        await buffer.flush(chat.id, "answer")
+
+    with WrittenBytes() as after:
+        asyncio.run(stream())
+
+    print(
+        f"bytes written per token: before={before.total / TOKENS:.0f} "
+        f"after={after.total / TOKENS:.0f} "
+        f"(writes: before={TOKENS} after={buffer.stats['writes']})"
+    )
+
+    assert Chats.get_message_by_id_and_message_id(chat.id, "answer") == {
+        "id": "answer",
+        "role": "assistant",
+        "content": content,
+    }
+    assert buffer.stats["updates"] == TOKENS
+    assert buffer.stats["writes"] < TOKENS / 10
+    assert after.total * 10 < before.total
@@ -0,0 +1,35 @@
+import asyncio
+
+from open_webui.utils.model_catalog import ModelCatalog
+
+
+def test_model_catalog():
+    catalog = ModelCatalog(ttl=60)
+    loads = []
+
+    async def loader():
+        loads.append(len(loads))
+        await asyncio.sleep(0.01)
+        return len(loads)
+
+    async def run():
+        # Concurrent callers share a single load
+        results = await asyncio.gather(
+            *[catalog.get("models", loader) for _ in range(5)]
+        )
+        assert results == [1] * 5
+
+        assert await catalog.get("models", loader) == 1
+
+        # Invalidated entries are loaded again before being served
+        catalog.invalidate("models")
+        assert await catalog.get("models", loader) == 2
+
+        # Stale entries are served while loading in the background
+        catalog._entries["models"].updated_at = 0.0
+        assert await catalog.get("models", loader) == 2
+        await asyncio.sleep(0.02)
+        assert await catalog.get("models", loader) == 3
+
+    asyncio.run(run())
+    assert len(loads) == 3
@@ -0,0 +1,130 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from open_webui.routers import ollama
+from open_webui.utils.ollama_router import OllamaRouter
+
+
+URLS = {0: "http://node-a:11434", 1: "http://node-b:11434"}
+
+
+def test_least_in_flight():
+    router = OllamaRouter("least_in_flight", 3, 30.0, 60.0)
+
+    router.start(URLS[0])
+    assert router.select("llama3:latest", URLS) == 1
+
+    router.start(URLS[1])
+    router.start(URLS[1])
+    assert router.select("llama3:latest", URLS) == 0
+
+
+def test_ejection():
+    router = OllamaRouter("least_in_flight", 2, 30.0, 60.0)
+
+    router.start(URLS[1])
+    for _ in range(2):
+        router.start(URLS[0])
+        router.finish(URLS[0], False)
+
+    # node-a is ejected even though node-b is busier
+    assert router.is_ejected(URLS[0])
+    assert router.select("llama3:latest", URLS) == 1
+
+    # Every node ejected, fail open
+    for _ in range(2):
+        router.start(URLS[1])
+        router.finish(URLS[1], False)
+    assert router.select("llama3:latest", URLS) in URLS
+
+
+def test_sticky_and_affinity():
+    router = OllamaRouter("sticky", 3, 30.0, 60.0)
+    router.set_loaded_models(URLS[1], ["llama3:latest"])
+
+    assert router.select("llama3:latest", URLS) == 1
+
+    started_at = router.start(URLS[0])
+    router.record_latency(URLS[0], started_at)
+    router.finish(URLS[0], True, model="mistral:latest", chat_id="chat")
+
+    router.start(URLS[0])
+    assert router.select("mistral:latest", URLS, chat_id="chat") == 0
+    assert router.select("mistral:latest", URLS) == 0
+
+
+class Response:
+    status = 200
+    headers = {}
+
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+        self.released = False
+
+    @property
+    def content(self):
+        async def read():
+            for chunk in self.chunks:
+                yield chunk
+            if self.error:
+                raise self.error
+
+        return read()
+
+    def raise_for_status(self):
+        pass
+
+    def release(self):
+        self.released = True
+
+
+def send_streamed_request(monkeypatch, router, response):
+    class Session:
+        async def post(self, url, **kwargs):
+            return response
+
+    monkeypatch.setattr(ollama, "OLLAMA_ROUTER", router)
+    monkeypatch.setattr(ollama.SESSION_POOL, "get_session", lambda url: Session())
+
+    async def main():
+        streaming_response = await ollama.send_post_request(
+            f"{URLS[0]}/api/chat", "{}", model="llama3:latest"
+        )
+        assert router.get_stats()["nodes"][URLS[0]]["in_flight"] == 1
+
+        chunks = []
+        try:
+            async for chunk in streaming_response.body_iterator:
+                chunks.append(chunk)
+        finally:
+            # Run by Starlette only when the stream did not raise
+            if response.error is None:
+                await streaming_response.background()
+        return chunks
+
+    return asyncio.run(main())
+
+
+def test_stream_released(monkeypatch):
+    router = OllamaRouter("affinity", 1, 30.0, 60.0)
+    response = Response([b"a", b"b"])
+
+    assert send_streamed_request(monkeypatch, router, response) == [b"a", b"b"]
+    assert response.released
+    node = router.get_stats()["nodes"][URLS[0]]
+    assert node["in_flight"] == 0 and node["errors"] == 0
+    assert node["loaded_models"] == ["llama3:latest"]
+
+
+def test_stream_failure_recorded(monkeypatch):
+    router = OllamaRouter("least_in_flight", 1, 30.0, 60.0)
+    response = Response([b"a"], aiohttp.ClientPayloadError("Connection lost"))
+
+    with pytest.raises(aiohttp.ClientPayloadError):
+        send_streamed_request(monkeypatch, router, response)
+    assert response.released
+    assert router.get_stats()["nodes"][URLS[0]]["in_flight"] == 0
+    assert router.is_ejected(URLS[0])
@@ -0,0 +1,47 @@
+from open_webui.utils.plugin import PLUGINS, PluginRegistry, load_function_module_by_id
+
+FILTER = """
+class Filter:
+    def inlet(self, body):
+        return body
+"""
+
+
+def test_instances_reused_per_content():
+    compiled = PLUGINS.stats["compiled"]
+
+    filter, function_type, _ = load_function_module_by_id("cached", content=FILTER)
+    assert function_type == "filter"
+    assert load_function_module_by_id("cached", content=FILTER)[0] is filter
+
+    # A copy of the function reuses the code object
+    copy, _, _ = load_function_module_by_id("copy", content=FILTER)
+    assert copy is not filter
+    assert PLUGINS.stats["compiled"] == compiled + 1
+
+    updated, _, _ = load_function_module_by_id("cached", content=FILTER + "\n")
+    assert updated is not filter
+
+
+def test_versions():
+    registry = PluginRegistry()
+    loads = []
+
+    def loader(id):
+        loads.append(id)
+        return {"priority": len(loads)}
+
+    module = object()
+    assert registry.get_module("function", "filter", lambda id: module) is module
+    assert registry.get_module("function", "filter", loader) is module
+    assert registry.get_valves("function", "filter", loader) == {"priority": 1}
+    assert registry.get_valves("function", "filter", loader) == {"priority": 1}
+
+    # Valves updated on another node
+    registry._handle_message({"data": '{"kind": "function", "id": "filter"}'})
+    assert registry.get_valves("function", "filter", loader) == {"priority": 2}
+    assert registry.get_module("function", "filter", loader) == {"priority": 3}
+
+    registry.set_module("function", "filter", module)
+    assert registry.get_module("function", "filter", loader) is module
+    assert len(loads) == 3
@@ -0,0 +1,34 @@
+import asyncio
+
+import aiohttp
+
+from open_webui.utils.session_pool import ClientSessionPool
+
+
+def test_sessions_are_shared_per_upstream():
+    async def main():
+        pool = ClientSessionPool(10, 10, 10)
+        session = pool.get_session("http://localhost:11434/api/chat")
+
+        assert pool.get_session("http://localhost:11434/api/tags") is session
+        assert pool.get_session("http://localhost:8080/v1/models") is not session
+        assert pool.get_stats()["http://localhost:11434"]["requests"] == 2
+
+        await pool.close()
+        assert session.closed
+
+    asyncio.run(main())
+
+
+def test_sessions_do_not_keep_cookies():
+    async def main():
+        pool = ClientSessionPool(10, 10, 10)
+        session = pool.get_session("http://localhost:11434")
+
+        session.cookie_jar.update_cookies({"session": "user-a"})
+        assert len(session.cookie_jar) == 0
+        assert isinstance(session.cookie_jar, aiohttp.DummyCookieJar)
+
+        await pool.close()
+
+    asyncio.run(main())
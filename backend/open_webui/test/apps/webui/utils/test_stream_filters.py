@@ -0,0 +1,49 @@
+import asyncio
+import types
+
+from open_webui.utils.filter import StreamFilterPipeline, stream_filter_stats
+from open_webui.utils.plugin import PLUGINS
+
+
+class Upper:
+    def stream(self, event):
+        return event.upper()
+
+
+class Batched:
+    def __init__(self):
+        self.batches = []
+
+    async def stream_batch(self, events, __id__):
+        self.batches.append(len(events))
+        return [event for event in events if event != "DROP"]
+
+
+async def items(values):
+    for value in values:
+        yield value
+
+
+def get_pipeline(*filters):
+    functions = []
+    for id, module in filters:
+        PLUGINS.set_module("function", id, module)
+        functions.append(types.SimpleNamespace(id=id))
+    return StreamFilterPipeline(functions, {}, max_batch=8)
+
+
+def test_no_filters_pass_through():
+    source = items(["a"])
+    assert get_pipeline().apply(source) is source
+
+
+def test_filters_run_on_batches():
+    batched = Batched()
+    pipeline = get_pipeline(("upper", Upper()), ("batched", batched))
+
+    async def main():
+        return [item async for item in pipeline.apply(items(["a", "drop", "b"] * 4))]
+
+    assert asyncio.run(main()) == ["A", "B"] * 4
+    assert sum(batched.batches) == 12
+    assert stream_filter_stats["upper"]["events"] >= 12
@@ -0,0 +1,69 @@
+from open_webui.utils.tag_parser import StreamTagParser
+
+
+REASONING_TAGS = [("think", "/think"), ("thinking", "/thinking")]
+CODE_INTERPRETER_TAGS = [("code_interpreter", "/code_interpreter")]
+
+
+def parse(chunks, tags=None):
+    content_blocks = [{"type": "text", "content": ""}]
+    parser = StreamTagParser(content_blocks, tags or [("reasoning", REASONING_TAGS)])
+    for chunk in chunks:
+        if parser.feed(chunk):
+            break
+    parser.flush()
+    return [
+        {key: block[key] for key in ("type", "content", "attributes") if key in block}
+        for block in content_blocks
+    ]
+
+
+def test_reasoning_split_across_chunks():
+    expected = [
+        {"type": "text", "content": "Hi "},
+        {"type": "reasoning", "content": "a < b", "attributes": {}},
+        {"type": "text", "content": "Answer"},
+    ]
+    text = "Hi <think>a < b</think>\n\nAnswer"
+
+    assert parse([text]) == expected
+    # Every chunk boundary, including inside the tags
+    for i in range(1, len(text)):
+        assert parse([text[:i], text[i:]]) == expected
+    assert parse(list(text)) == expected
+
+
+def test_attributes_and_other_tags():
+    assert parse(['<thinking level="2">x', "</thinking>", "<b>y</b>"]) == [
+        {"type": "reasoning", "content": "x", "attributes": {"level": "2"}},
+        {"type": "text", "content": "<b>y</b>"},
+    ]
+
+    # Start tags with attributes end on the same line
+    assert parse(["<think about\nit"]) == [
+        {"type": "text", "content": "<think about\nit"}
+    ]
+
+    # Unterminated tags are kept as text at the end of the stream
+    assert parse(["x <thi"]) == [{"type": "text", "content": "x <thi"}]
+
+
+def test_code_interpreter_stops_stream():
+    tags = [
+        ("reasoning", REASONING_TAGS),
+        ("code_interpreter", CODE_INTERPRETER_TAGS),
+    ]
+    assert parse(
+        [
+            '<code_interpreter type="code">print(1)',
+            "</code_interpreter>ignored",
+            "more",
+        ],
+        tags,
+    ) == [
+        {
+            "type": "code_interpreter",
+            "content": "print(1)",
+            "attributes": {"type": "code"},
+        }
+    ]
@@ -0,0 +1,78 @@
+import asyncio
+import inspect
+
+from open_webui import tasks
+
+
+def test_stop_task():
+    async def main():
+        cancelled = asyncio.Event()
+
+        async def generate():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        task_id, _ = tasks.create_task(generate(), id="chat")
+        await asyncio.sleep(0)
+        assert await tasks.list_task_ids_by_chat_id("chat") == [task_id]
+
+        result = await tasks.stop_task(task_id)
+        assert result["status"] and cancelled.is_set()
+        assert await tasks.list_tasks() == []
+        assert await tasks.list_task_ids_by_chat_id("chat") == []
+
+    asyncio.run(main())
+
+
+def test_tasks_queue_over_limit(monkeypatch):
+    async def main():
+        monkeypatch.setattr(tasks, "task_semaphore", asyncio.Semaphore(1))
+        release = asyncio.Event()
+        started = []
+
+        async def generate(name):
+            started.append(name)
+            await release.wait()
+
+        _, first = tasks.create_task(generate("first"))
+        second_id, second = tasks.create_task(generate("second"))
+        third_id, _ = tasks.create_task(generate("third"))
+        await asyncio.sleep(0.01)
+
+        assert started == ["first"]
+        assert tasks.get_node_stats()["queued"] == 2
+
+        # Stopped while queued
+        await tasks.stop_task(third_id)
+        release.set()
+        await asyncio.gather(first, second)
+
+        assert started == ["first", "second"]
+        assert tasks.get_node_stats()["queued"] == 0
+
+    asyncio.run(main())
+
+
+def test_stopped_while_registering(monkeypatch):
+    async def main():
+        async def register_task(task_id, id=None):
+            await asyncio.sleep(10)
+
+        monkeypatch.setattr(tasks, "register_task", register_task)
+
+        async def generate():
+            pass
+
+        coroutine = generate()
+        task_id, task = tasks.create_task(coroutine)
+        await asyncio.sleep(0)
+
+        await tasks.stop_task(task_id)
+        assert task.cancelled()
+        # Closed, rather than left to be garbage collected as never awaited
+        assert inspect.getcoroutinestate(coroutine) == inspect.CORO_CLOSED
+
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from open_webui.routers import audio
+
+
+def get_speech(*durations: int) -> AudioSegment:
+    """Tones of the given durations separated by one second silences."""
+    speech = AudioSegment.silent(duration=0, frame_rate=16000)
+    for index, duration in enumerate(durations):
+        if index:
+            speech += AudioSegment.silent(duration=1000, frame_rate=16000)
+        speech += Sine(440, sample_rate=16000).to_audio_segment(duration=duration)
+    return speech.set_channels(1)
+
+
+def test_split_audio_short():
+    speech = get_speech(2000)
+    assert audio.split_audio(speech, 5000) == [(0, 2000)]
+
+
+def test_split_audio_on_silences():
+    speech = get_speech(3000, 3000, 3000)
+    chunks = audio.split_audio(speech, 5000)
+
+    assert len(chunks) == 3
+    assert chunks[0][0] == 0
+    assert chunks[-1][1] == len(speech)
+    for (_, end), (start, _) in zip(chunks, chunks[1:]):
+        assert end == start
+    # Cut in the silences
+    assert 3000 <= chunks[0][1] <= 4000
+    assert 7000 <= chunks[1][1] <= 8000
+
+
+def test_split_audio_without_silences():
+    speech = get_speech(12000)
+    assert audio.split_audio(speech, 5000) == [(0, 5000), (5000, 10000), (10000, 12000)]
+
+
+def test_transcribe_in_chunks(monkeypatch, tmp_path):
+    speech = get_speech(3000, 3000, 3000)
+    file_path = tmp_path / "recording.wav"
+    speech.export(file_path, format="wav")
+
+    def transcribe_file(request, chunk_path):
+        chunk = AudioSegment.from_wav(chunk_path)
+        return {
+            "text": f" {len(chunk) // 1000}s",
+            "segments": [{"start": 0.5, "end": 1.0, "text": "word"}],
+        }
+
+    monkeypatch.setattr(audio, "AUDIO_STT_CHUNK_DURATION", 5)
+    monkeypatch.setattr(audio, "get_audio_duration", lambda path: len(speech) / 1000)
+    monkeypatch.setattr(audio, "transcribe_file", transcribe_file)
+
+    progress = []
+    data = audio.transcribe(None, str(file_path), lambda *args: progress.append(args))
+
+    assert data["text"] == "3s 4s 3s"
+    assert [segment["start"] for segment in data["segments"]] == [
+        0.5,
+        3.5 + 0.5,
+        7.5 + 0.5,
+    ]
+    assert len(progress) == 3
+    assert progress[-1] == (3, 3, "3s 4s 3s")
+    assert (tmp_path / "recording.json").exists()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "recording.json",
+        "recording.wav",
+    ]
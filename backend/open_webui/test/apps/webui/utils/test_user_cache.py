@@ -0,0 +1,62 @@
+from open_webui.utils.user_cache import UserCache
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        return self.value
+
+
+def test_users_cached_until_invalidated():
+    cache = UserCache(ttl=60)
+    loader = Loader({"id": "user"})
+
+    assert cache.get_user("user", loader) == {"id": "user"}
+    assert cache.get_user("user", loader) == {"id": "user"}
+    assert loader.calls == 1
+
+    cache.invalidate_user("user")
+    cache.get_user("user", loader)
+    assert loader.calls == 2
+
+    # Unknown users are not cached
+    missing = Loader(None)
+    cache.get_user("missing", missing)
+    cache.get_user("missing", missing)
+    assert missing.calls == 2
+
+
+def test_group_version():
+    cache = UserCache(ttl=60)
+    groups = Loader(["group"])
+    permissions = Loader({"chat": True})
+    defaults = {"chat": False}
+
+    cache.get_groups("user", groups)
+    cache.get_permissions("user", defaults, permissions)
+    cache.get_groups("user", groups)
+    cache.get_permissions("user", defaults, permissions)
+    assert (groups.calls, permissions.calls) == (1, 1)
+
+    # Group changes from another node
+    cache._handle_message({"data": '{"groups": true}'})
+    cache.get_groups("user", groups)
+    cache.get_permissions("user", defaults, permissions)
+    assert (groups.calls, permissions.calls) == (2, 2)
+
+    # Updated default permissions
+    cache.get_permissions("user", {"chat": True}, permissions)
+    assert permissions.calls == 3
+
+
+def test_disabled():
+    cache = UserCache(ttl=0)
+    loader = Loader({"id": "user"})
+
+    cache.get_user("user", loader)
+    cache.get_user("user", loader)
+    assert loader.calls == 2
@@ -1,12 +1,18 @@
 from typing import Optional, Union, List, Dict, Any
 from open_webui.models.users import Users, UserModel
 from open_webui.models.groups import Groups
+from open_webui.utils.user_cache import USER_CACHE
 
 
 from open_webui.config import DEFAULT_USER_PERMISSIONS
 import json
 
 
+def get_user_groups(user_id: str) -> list:
+    """Groups the user is a member of, cached for the permission checks."""
+    return USER_CACHE.get_groups(user_id, Groups.get_groups_by_member_id)
+
+
 def fill_missing_permissions(
     permissions: Dict[str, Any], default_permissions: Dict[str, Any]
 ) -> Dict[str, Any]:
@@ -33,6 +39,7 @@ def get_permissions(
     Get all permissions for a user by combining the permissions of all groups the user is a member of.
     If a permission is defined in multiple groups, the most permissive value is used (True > False).
     Permissions are nested in a dict with the permission key as the key and a boolean as the value.
+    The result is cached and must not be modified.
     """
 
     def combine_permissions(
@@ -53,20 +60,21 @@ def get_permissions(
                     )  # Use the most permissive value (True > False)
         return permissions
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
+    def compute_permissions() -> Dict[str, Any]:
+        user_groups = get_user_groups(user_id)
 
-    # Deep copy default permissions to avoid modifying the original dict
-    permissions = json.loads(json.dumps(default_permissions))
+        # Deep copy default permissions to avoid modifying the original dict
+        permissions = json.loads(json.dumps(default_permissions))
 
-    # Combine permissions from all user groups
-    for group in user_groups:
-        group_permissions = group.permissions
-        permissions = combine_permissions(permissions, group_permissions)
+        # Combine permissions from all user groups
+        for group in user_groups:
+            group_permissions = group.permissions
+            permissions = combine_permissions(permissions, group_permissions)
 
-    # Ensure all fields from default_permissions are present and filled in
-    permissions = fill_missing_permissions(permissions, default_permissions)
+        # Ensure all fields from default_permissions are present and filled in
+        return fill_missing_permissions(permissions, default_permissions)
 
-    return permissions
+    return USER_CACHE.get_permissions(user_id, default_permissions, compute_permissions)
 
 
 def has_permission(
@@ -93,7 +101,7 @@ def has_permission(
     permission_hierarchy = permission_key.split(".")
 
     # Retrieve user group permissions
-    user_groups = Groups.get_groups_by_member_id(user_id)
+    user_groups = get_user_groups(user_id)
 
     for group in user_groups:
         group_permissions = group.permissions
@@ -115,7 +123,7 @@ def has_access(
     if access_control is None:
         return type == "read"
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
+    user_groups = get_user_groups(user_id)
     user_group_ids = [group.id for group in user_groups]
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
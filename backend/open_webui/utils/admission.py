@@ -0,0 +1,308 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    CHAT_ADMISSION_MAX_PER_USER,
+    CHAT_ADMISSION_MAX_PER_MODEL,
+    CHAT_ADMISSION_MAX_PER_UPSTREAM,
+    CHAT_ADMISSION_MAX_QUEUE_PER_USER,
+    CHAT_ADMISSION_QUEUE_TIMEOUT,
+)
+from open_webui.tasks import get_task
+from open_webui.utils.session_pool import get_base_url
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class AdmissionRejected(Exception):
+    pass
+
+
+class Waiter:
+    def __init__(self, user_id: str, keys: list[tuple[str, str]]):
+        self.user_id = user_id
+        self.keys = keys
+        self.admitted = False
+        # Set on admission and whenever the queue moves
+        self.event = asyncio.Event()
+
+
+class AdmissionController:
+    """
+    Limits the chat completions in progress per user, per model and per upstream, 0
+    meaning no limit. Requests over a limit wait in a queue of their user, and users
+    take turns when slots free up, so a user with many queued requests does not
+    starve the others. Requests are rejected once their user has `max_queue_per_user`
+    queued requests, or after waiting `queue_timeout` seconds.
+
+    `acquire` returns a function releasing the slots, to call once the generation
+    is over.
+    """
+
+    def __init__(
+        self,
+        max_per_user: int,
+        max_per_model: int,
+        max_per_upstream: int,
+        max_queue_per_user: int,
+        queue_timeout: float,
+    ):
+        self.limits = {
+            "user": max_per_user,
+            "model": max_per_model,
+            "upstream": max_per_upstream,
+        }
+        self.max_queue_per_user = max_queue_per_user
+        self.queue_timeout = queue_timeout
+
+        self._in_flight: dict[tuple[str, str], int] = {}
+        # Upstreams served by several nodes get a slot per node
+        self._capacity: dict[tuple[str, str], int] = {}
+        # Queued requests of each user, in the order users take turns
+        self._queues: OrderedDict[str, deque[Waiter]] = OrderedDict()
+
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return any(limit > 0 for limit in self.limits.values())
+
+    def _get_limit(self, key: tuple[str, str]) -> int:
+        return self.limits[key[0]] * self._capacity.get(key, 1)
+
+    def _can_admit(self, waiter: Waiter) -> bool:
+        return all(
+            self._get_limit(key) <= 0
+            or self._in_flight.get(key, 0) < self._get_limit(key)
+            for key in waiter.keys
+        )
+
+    def _admit(self, waiter: Waiter):
+        for key in waiter.keys:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        waiter.admitted = True
+        waiter.event.set()
+        self.stats["admitted"] += 1
+
+    def _dispatch(self):
+        # Admit the first request of each user in turn, until none fits
+        moved = False
+        admitted = True
+        while admitted:
+            admitted = False
+            for user_id in list(self._queues.keys()):
+                queue = self._queues[user_id]
+                if not self._can_admit(queue[0]):
+                    continue
+
+                self._admit(queue.popleft())
+                admitted = moved = True
+
+                self._queues.move_to_end(user_id)
+                if not queue:
+                    del self._queues[user_id]
+
+        if moved:
+            for queue in self._queues.values():
+                for waiter in queue:
+                    waiter.event.set()
+
+    def _remove(self, waiter: Waiter):
+        queue = self._queues.get(waiter.user_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[waiter.user_id]
+            # Requests queued behind it may fit now
+            self._dispatch()
+
+    def get_position(self, waiter: Waiter) -> int:
+        """Requests admitted before `waiter` if users keep taking turns, plus one."""
+        position = 0
+        index = None
+        for user_id, queue in self._queues.items():
+            if user_id == waiter.user_id:
+                index = queue.index(waiter)
+                break
+
+        passed = False
+        for user_id, queue in self._queues.items():
+            if user_id == waiter.user_id:
+                passed = True
+                position += index + 1
+            else:
+                position += min(len(queue), index if passed else index + 1)
+        return position
+
+    def _release(self, keys: list[tuple[str, str]]):
+        for key in keys:
+            self._in_flight[key] -= 1
+            if self._in_flight[key] <= 0:
+                del self._in_flight[key]
+        self._dispatch()
+
+    async def acquire(
+        self,
+        user_id: str,
+        model_id: Optional[str] = None,
+        upstreams: list[str] = [],
+        on_queued: Optional[Callable[[int], Awaitable]] = None,
+    ) -> Callable[[], None]:
+        """
+        Waits for a slot for the user, model and upstream, calling `on_queued` with
+        the queue position whenever it changes, and returns the release function.
+        """
+        if not self.enabled:
+            return lambda: None
+
+        keys = [("user", user_id)]
+        if model_id:
+            keys.append(("model", model_id))
+        if upstreams:
+            key = ("upstream", ";".join(sorted(upstreams)))
+            self._capacity[key] = len(upstreams)
+            keys.append(key)
+
+        queue = self._queues.get(user_id)
+        if (
+            self.max_queue_per_user > 0
+            and queue is not None
+            and len(queue) >= self.max_queue_per_user
+        ):
+            self.stats["rejected"] += 1
+            raise AdmissionRejected("Too many requests queued, try again later.")
+
+        waiter = Waiter(user_id, keys)
+        self._queues.setdefault(user_id, deque()).append(waiter)
+        self._dispatch()
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self._release(keys)
+
+        if waiter.admitted:
+            return release
+
+        self.stats["queued"] += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        position = None
+        try:
+            while not waiter.admitted:
+                if on_queued and self.get_position(waiter) != position:
+                    position = self.get_position(waiter)
+                    await on_queued(position)
+                    continue
+
+                waiter.event.clear()
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    raise asyncio.TimeoutError()
+                await asyncio.wait_for(waiter.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            if not waiter.admitted:
+                self._remove(waiter)
+                self.stats["timed_out"] += 1
+                raise AdmissionRejected("Timed out waiting in the queue.")
+        except BaseException:
+            if waiter.admitted:
+                release()
+            else:
+                self._remove(waiter)
+            raise
+
+        return release
+
+    def get_stats(self) -> dict:
+        return {
+            "limits": self.limits,
+            **self.stats,
+            "in_flight": {
+                f"{kind}:{key}": count for (kind, key), count in self._in_flight.items()
+            },
+            "waiting": sum(len(queue) for queue in self._queues.values()),
+        }
+
+
+def get_model_upstreams(request: Request, model: dict) -> list[str]:
+    """Base URLs of the nodes serving the model, empty for pipes and direct models."""
+    models = request.app.state.MODELS
+    base_model_id = (model.get("info") or {}).get("base_model_id")
+    if base_model_id in models:
+        model = models[base_model_id]
+
+    if model.get("pipe") or model.get("owned_by") == "arena":
+        return []
+
+    if model.get("owned_by") == "ollama":
+        base_urls = request.app.state.config.OLLAMA_BASE_URLS
+        url_idxs = (model.get("ollama") or {}).get("urls", [])
+    else:
+        base_urls = request.app.state.config.OPENAI_API_BASE_URLS
+        url_idxs = [model["urlIdx"]] if "urlIdx" in model else []
+
+    return sorted(
+        {get_base_url(base_urls[idx]) for idx in url_idxs if idx < len(base_urls)}
+    )
+
+
+def release_on_completion(response, release: Callable[[], None]):
+    """
+    Releases the admission slots once the generation of `response` is over: after
+    the stream for streamed responses, with the task for background generations.
+    """
+    if isinstance(response, StreamingResponse):
+        body_iterator = response.body_iterator
+        background = response.background
+
+        async def release_after_stream():
+            # Background tasks are skipped when the stream raises
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                release()
+
+        async def release_after_background():
+            # For streams closed before they were iterated
+            try:
+                if background is not None:
+                    await background()
+            finally:
+                release()
+
+        response.body_iterator = release_after_stream()
+        response.background = BackgroundTask(release_after_background)
+        return response
+
+    task = (
+        get_task(response.get("task_id"))
+        if isinstance(response, dict) and response.get("task_id")
+        else None
+    )
+    if task is not None:
+        task.add_done_callback(lambda _: release())
+    else:
+        release()
+    return response
+
+
+CHAT_ADMISSION = AdmissionController(
+    CHAT_ADMISSION_MAX_PER_USER,
+    CHAT_ADMISSION_MAX_PER_MODEL,
+    CHAT_ADMISSION_MAX_PER_UPSTREAM,
+    CHAT_ADMISSION_MAX_QUEUE_PER_USER,
+    CHAT_ADMISSION_QUEUE_TIMEOUT,
+)
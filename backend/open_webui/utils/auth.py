@@ -14,6 +14,7 @@ from pytz import UTC
 from typing import Optional, Union, List, Dict
 
 from open_webui.models.users import Users
+from open_webui.utils.user_cache import USER_CACHE
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import (
@@ -206,7 +207,7 @@ def get_current_user(
         )
 
     if data is not None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = USER_CACHE.get_user(data["id"], Users.get_user_by_id)
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
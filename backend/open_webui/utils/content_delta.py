@@ -0,0 +1,96 @@
+import time
+from typing import Callable, Optional
+
+
+class ContentDeltaTracker:
+    """
+    Builds chat:completion payloads for clients that opted into delta events,
+    so content is only serialized on block transitions instead of on every delta:
+
+        {"snapshot": {"seq": n, "prefix": <serialized blocks before the last one>,
+                      "block": {"index": i, "type": ..., "content": ..., ...}}}
+        {"delta": {"seq": n, "index": i, "content": <text appended to the block>}}
+
+    Clients render the last block after the prefix, which is not stripped so the
+    separator between blocks is kept, strip the result, and append deltas to the
+    block. `serialize` takes `strip=False` for the prefix.
+    A snapshot is also sent every `snapshot_interval` seconds, so clients that
+    missed events resync. Blocks other than text and reasoning are sent as
+    {"content": ...}, like for other clients.
+    """
+
+    DELTA_BLOCK_TYPES = ["text", "reasoning"]
+
+    def __init__(self, serialize: Callable[[list], str], snapshot_interval: float):
+        self.serialize = serialize
+        self.snapshot_interval = snapshot_interval
+
+        self.seq = 0
+        # Serialized content as of the last snapshot, for saving
+        self.content: Optional[str] = None
+
+        self._block: Optional[dict] = None
+        self._count = 0
+        self._length = 0
+        self._snapshot_at = 0.0
+
+    def get_data(self, content_blocks: list[dict]) -> Optional[dict]:
+        """Returns the payload to emit, None when nothing changed."""
+        block = content_blocks[-1] if content_blocks else None
+
+        if block is None or block["type"] not in self.DELTA_BLOCK_TYPES:
+            self._block = None
+            self.seq += 1
+            self.content = self.serialize(content_blocks)
+            return {"content": self.content}
+
+        if (
+            block is not self._block
+            or len(content_blocks) != self._count
+            or len(block["content"]) < self._length
+            or time.time() - self._snapshot_at > self.snapshot_interval
+        ):
+            return self._get_snapshot(content_blocks)
+
+        if len(block["content"]) == self._length:
+            return None
+
+        self.seq += 1
+        delta = block["content"][self._length :]
+        self._length = len(block["content"])
+        return {
+            "delta": {
+                "seq": self.seq,
+                "index": len(content_blocks) - 1,
+                "content": delta,
+            }
+        }
+
+    def _get_snapshot(self, content_blocks: list[dict]) -> dict:
+        block = content_blocks[-1]
+        prefix = self.serialize(content_blocks[:-1], strip=False)
+
+        self.seq += 1
+        self.content = self.serialize(content_blocks)
+
+        self._block = block
+        self._count = len(content_blocks)
+        self._length = len(block["content"])
+        self._snapshot_at = time.time()
+
+        return {
+            "snapshot": {
+                "seq": self.seq,
+                "prefix": prefix,
+                "block": {
+                    "index": len(content_blocks) - 1,
+                    "type": block["type"],
+                    "content": block["content"],
+                    **(
+                        {"duration": block["duration"]}
+                        if block.get("duration") is not None
+                        else {}
+                    ),
+                },
+            }
+        }
@@ -0,0 +1,235 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    CHAT_COMPLETION_EMIT_COALESCE_INTERVAL,
+    CHAT_COMPLETION_EMIT_COALESCE_MAX_EVENTS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
+
+
+# Keys of streamed OpenAI chunks that only carry text
+CHUNK_KEYS = {"id", "object", "created", "model", "system_fingerprint", "choices"}
+
+
+def get_chunk_text(data: dict) -> Optional[str]:
+    """Returns the text of a streamed chunk carrying only text, None otherwise."""
+    if not set(data) <= CHUNK_KEYS:
+        return None
+
+    choices = data.get("choices") or []
+    if len(choices) != 1 or choices[0].get("finish_reason"):
+        return None
+
+    delta = choices[0].get("delta") or {}
+    if not set(delta) <= {"content", "role"} or not isinstance(
+        delta.get("content"), str
+    ):
+        return None
+    return delta["content"]
+
+
+def is_mergeable(data: dict) -> bool:
+    return set(data) in [{"content"}, {"snapshot"}, {"delta"}] or (
+        get_chunk_text(data) is not None
+    )
+
+
+def merge_completion_data(pending: dict, data: dict) -> Optional[dict]:
+    """
+    Merges chat:completion data into the pending data, with the same result on the
+    client as applying both in order. Returns None when they can not be merged.
+    """
+    if set(data) in [{"content"}, {"snapshot"}]:
+        # Replaces the message on the client
+        return data
+
+    if set(data) == {"delta"}:
+        delta = data["delta"]
+
+        if set(pending) == {"delta"}:
+            pending_delta = pending["delta"]
+            if (
+                pending_delta["index"] == delta["index"]
+                and pending_delta["seq"] + 1 == delta["seq"]
+            ):
+                return {
+                    "delta": {
+                        "seq": delta["seq"],
+                        # Clients check the merged deltas follow their last event
+                        "first_seq": pending_delta.get(
+                            "first_seq", pending_delta["seq"]
+                        ),
+                        "index": delta["index"],
+                        "content": pending_delta["content"] + delta["content"],
+                    }
+                }
+
+        if set(pending) == {"snapshot"}:
+            snapshot = pending["snapshot"]
+            if (
+                snapshot["block"]["index"] == delta["index"]
+                and snapshot["seq"] + 1 == delta["seq"]
+            ):
+                return {
+                    "snapshot": {
+                        **snapshot,
+                        "seq": delta["seq"],
+                        "block": {
+                            **snapshot["block"],
+                            "content": snapshot["block"]["content"] + delta["content"],
+                        },
+                    }
+                }
+        return None
+
+    text = get_chunk_text(data)
+    pending_text = get_chunk_text(pending)
+    if text is not None and pending_text is not None:
+        choice = data["choices"][0]
+        return {
+            **data,
+            "choices": [
+                {
+                    **choice,
+                    "delta": {
+                        **pending["choices"][0]["delta"],
+                        **choice["delta"],
+                        "content": pending_text + text,
+                    },
+                }
+            ],
+        }
+    return None
+
+
+class EmitCoalescer:
+    """
+    Batches consecutive chat:completion events of the same (chat_id, message_id), so
+    a stream is emitted to each session, and published to Redis when the Redis
+    manager is used, once per batch rather than once per chunk.
+
+    Only events emitted with coalesce=True are batched. A batch is emitted `interval`
+    seconds after its first event, or once it holds `max_events` events. Any other
+    event of the message (status, tool calls, completion, errors) emits the pending
+    batch first and is sent right away, so clients receive events in order.
+    """
+
+    def __init__(self, interval: float, max_events: int):
+        self.interval = interval
+        self.max_events = max_events
+
+        self._batches: dict[tuple[str, str], dict] = {}
+        # Lock and number of sends in progress, so batches are sent in order
+        self._locks: dict[tuple[str, str], list] = {}
+
+        self.stats = {
+            "events": 0,
+            "coalesced": 0,
+            "batches": 0,
+            "session_emits": 0,
+            "session_emits_saved": 0,
+        }
+
+    async def emit(
+        self,
+        key: tuple[str, str],
+        event_data: dict,
+        send: Callable[[dict], Awaitable[int]],
+        coalesce: bool = False,
+    ):
+        """`send(event_data)` emits to the sessions and returns their number."""
+        if None in key:
+            await send(event_data)
+            return
+
+        data = event_data.get("data")
+        if (
+            coalesce
+            and self.interval > 0
+            and event_data.get("type") == "chat:completion"
+            and isinstance(data, dict)
+            and is_mergeable(data)
+        ):
+            self.stats["events"] += 1
+
+            batch = self._batches.get(key)
+            if batch:
+                merged = merge_completion_data(batch["data"], data)
+                if merged is not None:
+                    batch["data"] = merged
+                    batch["count"] += 1
+                    self.stats["coalesced"] += 1
+
+                    if self.max_events and batch["count"] >= self.max_events:
+                        await self.flush(key)
+                    return
+
+                await self.flush(key)
+
+            self._batches[key] = {
+                "data": data,
+                "count": 1,
+                "send": send,
+                "task": asyncio.create_task(self._flush_later(key)),
+            }
+            return
+
+        await self.flush(key)
+        await self._send(key, send, event_data)
+
+    async def flush(self, key: tuple[str, str]):
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+
+        if batch["task"] is not asyncio.current_task():
+            batch["task"].cancel()
+
+        sessions = await self._send(
+            key, batch["send"], {"type": "chat:completion", "data": batch["data"]}
+        )
+        self.stats["batches"] += 1
+        self.stats["session_emits"] += sessions
+        self.stats["session_emits_saved"] += (batch["count"] - 1) * sessions
+
+    async def _flush_later(self, key: tuple[str, str]):
+        await asyncio.sleep(self.interval)
+        try:
+            await self.flush(key)
+        except Exception as e:
+            log.exception(f"Error emitting chat:completion events of {key}: {e}")
+
+    async def _send(
+        self,
+        key: tuple[str, str],
+        send: Callable[[dict], Awaitable[int]],
+        event_data: dict,
+    ) -> int:
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await send(event_data)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._locks.pop(key, None)
+
+    def get_stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "max_events": self.max_events,
+            **self.stats,
+            "pending": len(self._batches),
+        }
+
+
+EMIT_COALESCER = EmitCoalescer(
+    CHAT_COMPLETION_EMIT_COALESCE_INTERVAL,
+    CHAT_COMPLETION_EMIT_COALESCE_MAX_EVENTS,
+)
@@ -1,21 +1,24 @@
+import asyncio
 import inspect
 import logging
+import time
+from typing import Any, AsyncIterator
 
-from open_webui.utils.plugin import load_function_module_by_id
+from open_webui.utils.plugin import get_function_module, get_function_valves
 from open_webui.models.functions import Functions
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, STREAM_FILTER_MAX_BATCH
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+# Time spent in the stream handler of each filter, by filter id
+stream_filter_stats: dict[str, dict] = {}
+
 
 def get_sorted_filter_ids(model: dict):
     def get_priority(function_id):
-        function = Functions.get_function_by_id(function_id)
-        if function is not None:
-            valves = Functions.get_function_valves_by_id(function_id)
-            return valves.get("priority", 0) if valves else 0
-        return 0
+        valves = get_function_valves(function_id)
+        return valves.get("priority", 0) if valves else 0
 
     filter_ids = [function.id for function in Functions.get_global_filter_functions()]
     if "info" in model and "meta" in model["info"]:
@@ -32,6 +35,42 @@ def get_sorted_filter_ids(model: dict):
     return filter_ids
 
 
+def apply_valves(function_module, filter_id: str):
+    if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
+        valves = get_function_valves(filter_id)
+        function_module.valves = function_module.Valves(**(valves if valves else {}))
+
+
+def get_handler_params(function_module, handler, filter_id: str, extra_params: dict):
+    """The extra parameters the handler of the filter accepts."""
+    sig = inspect.signature(handler)
+    params = {
+        k: v
+        for k, v in {
+            **extra_params,
+            "__id__": filter_id,
+        }.items()
+        if k in sig.parameters
+    }
+
+    # Handle user parameters
+    if "__user__" in sig.parameters:
+        if hasattr(function_module, "UserValves"):
+            try:
+                params["__user__"] = {
+                    **params["__user__"],
+                    "valves": function_module.UserValves(
+                        **Functions.get_user_valves_by_id_and_user_id(
+                            filter_id, params["__user__"]["id"]
+                        )
+                    ),
+                }
+            except Exception as e:
+                log.exception(f"Failed to get user values: {e}")
+
+    return params
+
+
 async def process_filter_functions(
     request, filter_functions, filter_type, form_data, extra_params
 ):
@@ -43,11 +82,8 @@ async def process_filter_functions(
         if not filter:
             continue
 
-        if filter_id in request.app.state.FUNCTIONS:
-            function_module = request.app.state.FUNCTIONS[filter_id]
-        else:
-            function_module, _, _ = load_function_module_by_id(filter_id)
-            request.app.state.FUNCTIONS[filter_id] = function_module
+        # Cached, stream filters run per chunk without reading the database
+        function_module = get_function_module(filter_id)
 
         # Prepare handler function
         handler = getattr(function_module, filter_type, None)
@@ -58,41 +94,16 @@ async def process_filter_functions(
         if filter_type == "inlet" and hasattr(function_module, "file_handler"):
             skip_files = function_module.file_handler
 
-        # Apply valves to the function
-        if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
-            function_module.valves = function_module.Valves(
-                **(valves if valves else {})
-            )
+        apply_valves(function_module, filter_id)
 
         try:
-            # Prepare parameters
-            sig = inspect.signature(handler)
-
             params = {"body": form_data}
             if filter_type == "stream":
                 params = {"event": form_data}
 
-            params = params | {
-                k: v
-                for k, v in {
-                    **extra_params,
-                    "__id__": filter_id,
-                }.items()
-                if k in sig.parameters
-            }
-
-            # Handle user parameters
-            if "__user__" in sig.parameters:
-                if hasattr(function_module, "UserValves"):
-                    try:
-                        params["__user__"]["valves"] = function_module.UserValves(
-                            **Functions.get_user_valves_by_id_and_user_id(
-                                filter_id, params["__user__"]["id"]
-                            )
-                        )
-                    except Exception as e:
-                        log.exception(f"Failed to get user values: {e}")
+            params = params | get_handler_params(
+                function_module, handler, filter_id, extra_params
+            )
 
             # Execute handler
             if inspect.iscoroutinefunction(handler):
@@ -110,3 +121,183 @@ async def process_filter_functions(
         del form_data["metadata"]["files"]
 
     return form_data, {}
+
+
+def record_stream_filter_time(filter_id: str, events: int, duration: float):
+    stats = stream_filter_stats.setdefault(
+        filter_id, {"calls": 0, "events": 0, "total_time": 0.0, "max_time": 0.0}
+    )
+    stats["calls"] += 1
+    stats["events"] += events
+    stats["total_time"] += duration
+    stats["max_time"] = max(stats["max_time"], duration)
+
+
+def get_stream_filter_stats() -> dict:
+    return {
+        filter_id: {
+            **stats,
+            "avg_time_per_event": (
+                stats["total_time"] / stats["events"] if stats["events"] else 0.0
+            ),
+        }
+        for filter_id, stats in stream_filter_stats.items()
+    }
+
+
+class StreamFilter:
+    def __init__(self, id: str, handler, params: dict, batch: bool):
+        self.id = id
+        self.handler = handler
+        self.params = params
+        self.batch = batch
+        self.is_async = inspect.iscoroutinefunction(handler)
+
+
+class StreamFilterPipeline:
+    """
+    The stream handlers of the filters of a request, resolved once with their
+    valves and parameters rather than for every chunk.
+
+    Chunks read from the upstream while the filters run are processed together, up
+    to `max_batch` at a time: filters defining `stream_batch(events)` receive them
+    as a list and return the list to pass on, the others get their `stream`
+    handler called for each chunk. Synchronous handlers run in a thread so they do
+    not block the event loop. Chunks a handler fails on or returns nothing for are
+    dropped, as before.
+    """
+
+    def __init__(
+        self,
+        filter_functions: list,
+        extra_params: dict,
+        max_batch: int = STREAM_FILTER_MAX_BATCH,
+    ):
+        self.max_batch = max(max_batch, 1)
+        self.filters: list[StreamFilter] = []
+
+        for function in filter_functions:
+            if not function:
+                continue
+
+            try:
+                function_module = get_function_module(function.id)
+            except Exception as e:
+                log.exception(f"Error loading stream filter {function.id}: {e}")
+                continue
+
+            batch = hasattr(function_module, "stream_batch")
+            handler = getattr(
+                function_module, "stream_batch" if batch else "stream", None
+            )
+            if not handler:
+                continue
+
+            apply_valves(function_module, function.id)
+            self.filters.append(
+                StreamFilter(
+                    function.id,
+                    handler,
+                    get_handler_params(
+                        function_module, handler, function.id, extra_params
+                    ),
+                    batch,
+                )
+            )
+
+    @staticmethod
+    def _run_each(filter: StreamFilter, events: list) -> list:
+        results = []
+        for event in events:
+            try:
+                event = filter.handler(event=event, **filter.params)
+            except Exception as e:
+                log.debug(f"Error in stream handler {filter.id}: {e}")
+                continue
+            if event:
+                results.append(event)
+        return results
+
+    async def _run_each_async(self, filter: StreamFilter, events: list) -> list:
+        results = []
+        for event in events:
+            try:
+                event = await filter.handler(event=event, **filter.params)
+            except Exception as e:
+                log.debug(f"Error in stream handler {filter.id}: {e}")
+                continue
+            if event:
+                results.append(event)
+        return results
+
+    async def process_batch(self, events: list) -> list:
+        for filter in self.filters:
+            if not events:
+                break
+
+            started_at = time.perf_counter()
+            count = len(events)
+            try:
+                if filter.batch:
+                    if filter.is_async:
+                        events = await filter.handler(events=events, **filter.params)
+                    else:
+                        events = await asyncio.to_thread(
+                            filter.handler, events=events, **filter.params
+                        )
+                    events = [event for event in events or [] if event]
+                elif filter.is_async:
+                    events = await self._run_each_async(filter, events)
+                else:
+                    events = await asyncio.to_thread(self._run_each, filter, events)
+            except Exception as e:
+                log.debug(f"Error in stream_batch handler {filter.id}: {e}")
+                events = []
+            finally:
+                record_stream_filter_time(
+                    filter.id, count, time.perf_counter() - started_at
+                )
+
+        return events
+
+    def apply(self, items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        """Filtered `items`, or `items` themselves without stream filters."""
+        if not self.filters:
+            return items
+        return self._apply(items)
+
+    async def _apply(self, items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        # The upstream is read in the background, what arrives while the filters
+        # run makes up the next batch
+        queue = asyncio.Queue(maxsize=self.max_batch)
+        end = object()
+        error = None
+
+        async def read():
+            nonlocal error
+            try:
+                async for item in items:
+                    await queue.put(item)
+            except Exception as e:
+                error = e
+            await queue.put(end)
+
+        reader = asyncio.create_task(read())
+        try:
+            done = False
+            while not done:
+                batch = [await queue.get()]
+                while len(batch) < self.max_batch and not queue.empty():
+                    batch.append(queue.get_nowait())
+
+                if batch[-1] is end:
+                    batch.pop()
+                    done = True
+
+                for item in await self.process_batch(batch):
+                    yield item
+
+            if error is not None:
+                raise error
+        finally:
+            reader.cancel()
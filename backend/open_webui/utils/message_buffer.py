@@ -0,0 +1,82 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import SRC_LOG_LEVELS, CHAT_MESSAGE_WRITE_BUFFER_INTERVAL
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind buffer for messages that are updated while they are being streamed.
+
+    Updates to the same (chat_id, message_id) are merged in memory and written with
+    a single message-level update once `interval` seconds have passed since the
+    first pending update, or earlier when flush() is called at completion or cancel.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+        self._pending: dict[tuple[str, str], dict] = {}
+        self._tasks: dict[tuple[str, str], asyncio.Task] = {}
+
+        self.stats = {
+            "updates": 0,
+            "writes": 0,
+            "bytes_written": 0,
+        }
+
+    def get_message(self, chat_id: str, message_id: str) -> Optional[dict]:
+        # Reads see their own pending writes
+        message = Chats.get_message_by_id_and_message_id(chat_id, message_id)
+        pending = self._pending.get((chat_id, message_id))
+        if pending:
+            return {**(message or {}), **pending}
+        return message
+
+    async def update(self, chat_id: str, message_id: str, message: dict):
+        key = (chat_id, message_id)
+        self._pending[key] = {**self._pending.get(key, {}), **message}
+        self.stats["updates"] += 1
+
+        if self.interval <= 0:
+            self._write(key)
+        elif key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._write_later(key))
+
+    async def flush(self, chat_id: str, message_id: str):
+        key = (chat_id, message_id)
+        task = self._tasks.pop(key, None)
+        if task:
+            task.cancel()
+        self._write(key)
+
+    async def flush_all(self):
+        for chat_id, message_id in list(self._pending.keys()):
+            await self.flush(chat_id, message_id)
+
+    async def _write_later(self, key: tuple[str, str]):
+        await asyncio.sleep(self.interval)
+        self._tasks.pop(key, None)
+        self._write(key)
+
+    def _write(self, key: tuple[str, str]):
+        message = self._pending.pop(key, None)
+        if not message:
+            return
+
+        chat_id, message_id = key
+        try:
+            Chats.update_message_by_id_and_message_id(chat_id, message_id, message)
+            self.stats["writes"] += 1
+            self.stats["bytes_written"] += len(json.dumps(message))
+        except Exception as e:
+            log.exception(f"Error writing message {message_id} of chat {chat_id}: {e}")
+
+
+MESSAGE_WRITE_BUFFER = MessageWriteBuffer(CHAT_MESSAGE_WRITE_BUFFER_INTERVAL)
@@ -23,6 +23,7 @@ from starlette.responses import Response, StreamingResponse
 
 
 from open_webui.models.chats import Chats
+from open_webui.utils.message_buffer import MESSAGE_WRITE_BUFFER
 from open_webui.models.users import Users
 from open_webui.socket.main import (
     get_event_call,
@@ -71,10 +72,13 @@ from open_webui.utils.misc import (
 from open_webui.utils.tools import get_tools
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.filter import (
+    StreamFilterPipeline,
     get_sorted_filter_ids,
     process_filter_functions,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
+from open_webui.utils.tag_parser import StreamTagParser
+from open_webui.utils.content_delta import ContentDeltaTracker
 
 from open_webui.tasks import create_task
 
@@ -88,6 +92,7 @@ from open_webui.env import (
     GLOBAL_LOG_LEVEL,
     BYPASS_MODEL_ACCESS_CONTROL,
     ENABLE_REALTIME_CHAT_SAVE,
+    CHAT_COMPLETION_SNAPSHOT_INTERVAL,
 )
 from open_webui.constants import TASKS
 
@@ -951,15 +956,134 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     return form_data, metadata, events
 
 
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def serialize_content_blocks(content_blocks, raw=False, strip=True):
+    # Unstripped content keeps the separator the next block is appended after
+    content = ""
+
+    for block in content_blocks:
+        if block["type"] == "text":
+            content = f"{content}{block['content'].strip()}\n"
+        elif block["type"] == "tool_calls":
+            attributes = block.get("attributes", {})
+
+            tool_calls = block.get("content", [])
+            results = block.get("results", [])
+
+            if results:
+
+                tool_calls_display_content = ""
+                for tool_call in tool_calls:
+
+                    tool_call_id = tool_call.get("id", "")
+                    tool_name = tool_call.get("function", {}).get("name", "")
+                    tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                    tool_result = None
+                    tool_result_files = None
+                    for result in results:
+                        if tool_call_id == result.get("tool_call_id", ""):
+                            tool_result = result.get("content", None)
+                            tool_result_files = result.get("files", None)
+                            break
+
+                    if tool_result:
+                        tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                    else:
+                        tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+                if not raw:
+                    content = f"{content}\n{tool_calls_display_content}\n\n"
+            else:
+                tool_calls_display_content = ""
+
+                for tool_call in tool_calls:
+                    tool_call_id = tool_call.get("id", "")
+                    tool_name = tool_call.get("function", {}).get("name", "")
+                    tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+                if not raw:
+                    content = f"{content}\n{tool_calls_display_content}\n\n"
+
+        elif block["type"] == "reasoning":
+            reasoning_display_content = "\n".join(
+                (f"> {line}" if not line.startswith(">") else line)
+                for line in block["content"].splitlines()
+            )
+
+            reasoning_duration = block.get("duration", None)
+
+            if reasoning_duration is not None:
+                if raw:
+                    content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+                else:
+                    content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+            else:
+                if raw:
+                    content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+                else:
+                    content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+        elif block["type"] == "code_interpreter":
+            attributes = block.get("attributes", {})
+            output = block.get("output", None)
+            lang = attributes.get("lang", "")
+
+            content_stripped, original_whitespace = split_content_and_whitespace(
+                content
+            )
+            if is_opening_code_block(content_stripped):
+                # Remove trailing backticks that would open a new block
+                content = content_stripped.rstrip("`").rstrip() + original_whitespace
+            else:
+                # Keep content as is - either closing backticks or no backticks
+                content = content_stripped + original_whitespace
+
+            if output:
+                output = html.escape(json.dumps(output))
+
+                if raw:
+                    content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+                else:
+                    content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+            else:
+                if raw:
+                    content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+                else:
+                    content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+        else:
+            block_content = str(block["content"]).strip()
+            content = f"{content}{block['type']}: {block_content}\n"
+
+    return content.strip() if strip else content
+
+
 async def process_chat_response(
     request, response, form_data, user, metadata, model, events, tasks
 ):
     async def background_tasks_handler():
-        message_map = Chats.get_messages_by_chat_id(metadata["chat_id"])
-        message = message_map.get(metadata["message_id"]) if message_map else None
+        messages = Chats.get_message_list_by_id_and_message_id(
+            metadata["chat_id"], metadata["message_id"]
+        )
+        message = messages[-1] if messages else None
 
         if message:
-            messages = get_message_list(message_map, message.get("id"))
 
             if tasks and messages:
                 if TASKS.TITLE_GENERATION in tasks:
@@ -1129,7 +1253,7 @@ async def process_chat_response(
                     )
 
                     # Send a webhook notification if the user is not active
-                    if get_active_status_by_user_id(user.id) is None:
+                    if await get_active_status_by_user_id(user.id) is None:
                         webhook_url = Users.get_user_webhook_url_by_id(user.id)
                         if webhook_url:
                             post_webhook(
@@ -1174,6 +1298,7 @@ async def process_chat_response(
         Functions.get_function_by_id(filter_id)
         for filter_id in get_sorted_filter_ids(model)
     ]
+    stream_filters = StreamFilterPipeline(filter_functions, extra_params)
 
     # Streaming response
     if event_emitter and event_caller:
@@ -1188,135 +1313,8 @@ async def process_chat_response(
             },
         )
 
-        def split_content_and_whitespace(content):
-            content_stripped = content.rstrip()
-            original_whitespace = (
-                content[len(content_stripped) :]
-                if len(content) > len(content_stripped)
-                else ""
-            )
-            return content_stripped, original_whitespace
-
-        def is_opening_code_block(content):
-            backtick_segments = content.split("```")
-            # Even number of segments means the last backticks are opening a new block
-            return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
-
         # Handle as a background task
         async def post_response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        content = f"{content}{block['content'].strip()}\n"
-                    elif block["type"] == "tool_calls":
-                        attributes = block.get("attributes", {})
-
-                        tool_calls = block.get("content", [])
-                        results = block.get("results", [])
-
-                        if results:
-
-                            tool_calls_display_content = ""
-                            for tool_call in tool_calls:
-
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_result = None
-                                tool_result_files = None
-                                for result in results:
-                                    if tool_call_id == result.get("tool_call_id", ""):
-                                        tool_result = result.get("content", None)
-                                        tool_result_files = result.get("files", None)
-                                        break
-
-                                if tool_result:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
-                                else:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-                        else:
-                            tool_calls_display_content = ""
-
-                            for tool_call in tool_calls:
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-
-                    elif block["type"] == "reasoning":
-                        reasoning_display_content = "\n".join(
-                            (f"> {line}" if not line.startswith(">") else line)
-                            for line in block["content"].splitlines()
-                        )
-
-                        reasoning_duration = block.get("duration", None)
-
-                        if reasoning_duration is not None:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
-
-                    elif block["type"] == "code_interpreter":
-                        attributes = block.get("attributes", {})
-                        output = block.get("output", None)
-                        lang = attributes.get("lang", "")
-
-                        content_stripped, original_whitespace = (
-                            split_content_and_whitespace(content)
-                        )
-                        if is_opening_code_block(content_stripped):
-                            # Remove trailing backticks that would open a new block
-                            content = (
-                                content_stripped.rstrip("`").rstrip()
-                                + original_whitespace
-                            )
-                        else:
-                            # Keep content as is - either closing backticks or no backticks
-                            content = content_stripped + original_whitespace
-
-                        if output:
-                            output = html.escape(json.dumps(output))
-
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-
-                    else:
-                        block_content = str(block["content"]).strip()
-                        content = f"{content}{block['type']}: {block_content}\n"
-
-                return content.strip()
-
             def convert_content_blocks_to_messages(content_blocks):
                 messages = []
 
@@ -1357,154 +1355,7 @@ async def process_chat_response(
 
                 return messages
 
-            def tag_content_handler(content_type, tags, content, content_blocks):
-                end_flag = False
-
-                def extract_attributes(tag_content):
-                    """Extract attributes from a tag if they exist."""
-                    attributes = {}
-                    if not tag_content:  # Ensure tag_content is not None
-                        return attributes
-                    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
-                    matches = re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content)
-                    for key, value in matches:
-                        attributes[key] = value
-                    return attributes
-
-                if content_blocks[-1]["type"] == "text":
-                    for start_tag, end_tag in tags:
-                        # Match start tag e.g., <tag> or <tag attr="value">
-                        start_tag_pattern = rf"<{re.escape(start_tag)}(\s.*?)?>"
-                        match = re.search(start_tag_pattern, content)
-                        if match:
-                            attr_content = (
-                                match.group(1) if match.group(1) else ""
-                            )  # Ensure it's not None
-                            attributes = extract_attributes(
-                                attr_content
-                            )  # Extract attributes safely
-
-                            # Capture everything before and after the matched tag
-                            before_tag = content[
-                                : match.start()
-                            ]  # Content before opening tag
-                            after_tag = content[
-                                match.end() :
-                            ]  # Content after opening tag
-
-                            # Remove the start tag and after from the currently handling text block
-                            content_blocks[-1]["content"] = content_blocks[-1][
-                                "content"
-                            ].replace(match.group(0) + after_tag, "")
-
-                            if before_tag:
-                                content_blocks[-1]["content"] = before_tag
-
-                            if not content_blocks[-1]["content"]:
-                                content_blocks.pop()
-
-                            # Append the new block
-                            content_blocks.append(
-                                {
-                                    "type": content_type,
-                                    "start_tag": start_tag,
-                                    "end_tag": end_tag,
-                                    "attributes": attributes,
-                                    "content": "",
-                                    "started_at": time.time(),
-                                }
-                            )
-
-                            if after_tag:
-                                content_blocks[-1]["content"] = after_tag
-
-                            break
-                elif content_blocks[-1]["type"] == content_type:
-                    start_tag = content_blocks[-1]["start_tag"]
-                    end_tag = content_blocks[-1]["end_tag"]
-                    # Match end tag e.g., </tag>
-                    end_tag_pattern = rf"<{re.escape(end_tag)}>"
-
-                    # Check if the content has the end tag
-                    if re.search(end_tag_pattern, content):
-                        end_flag = True
-
-                        block_content = content_blocks[-1]["content"]
-                        # Strip start and end tags from the content
-                        start_tag_pattern = rf"<{re.escape(start_tag)}(.*?)>"
-                        block_content = re.sub(
-                            start_tag_pattern, "", block_content
-                        ).strip()
-
-                        end_tag_regex = re.compile(end_tag_pattern, re.DOTALL)
-                        split_content = end_tag_regex.split(block_content, maxsplit=1)
-
-                        # Content inside the tag
-                        block_content = (
-                            split_content[0].strip() if split_content else ""
-                        )
-
-                        # Leftover content (everything after `</tag>`)
-                        leftover_content = (
-                            split_content[1].strip() if len(split_content) > 1 else ""
-                        )
-
-                        if block_content:
-                            content_blocks[-1]["content"] = block_content
-                            content_blocks[-1]["ended_at"] = time.time()
-                            content_blocks[-1]["duration"] = int(
-                                content_blocks[-1]["ended_at"]
-                                - content_blocks[-1]["started_at"]
-                            )
-
-                            # Reset the content_blocks by appending a new text block
-                            if content_type != "code_interpreter":
-                                if leftover_content:
-
-                                    content_blocks.append(
-                                        {
-                                            "type": "text",
-                                            "content": leftover_content,
-                                        }
-                                    )
-                                else:
-                                    content_blocks.append(
-                                        {
-                                            "type": "text",
-                                            "content": "",
-                                        }
-                                    )
-
-                        else:
-                            # Remove the block if content is empty
-                            content_blocks.pop()
-
-                            if leftover_content:
-                                content_blocks.append(
-                                    {
-                                        "type": "text",
-                                        "content": leftover_content,
-                                    }
-                                )
-                            else:
-                                content_blocks.append(
-                                    {
-                                        "type": "text",
-                                        "content": "",
-                                    }
-                                )
-
-                        # Clean processed content
-                        content = re.sub(
-                            rf"<{re.escape(start_tag)}(.*?)>(.|\n)*?<{re.escape(end_tag)}>",
-                            "",
-                            content,
-                            flags=re.DOTALL,
-                        )
-
-                return content, content_blocks, end_flag
-
-            message = Chats.get_message_by_id_and_message_id(
+            message = MESSAGE_WRITE_BUFFER.get_message(
                 metadata["chat_id"], metadata["message_id"]
             )
 
@@ -1553,6 +1404,29 @@ async def process_chat_response(
 
             solution_tags = [("|begin_of_solution|", "|end_of_solution|")]
 
+            # Splits the streamed content into blocks, reading each delta once
+            tag_parser = StreamTagParser(
+                content_blocks,
+                [
+                    *([("reasoning", reasoning_tags)] if DETECT_REASONING else []),
+                    *(
+                        [("code_interpreter", code_interpreter_tags)]
+                        if DETECT_CODE_INTERPRETER
+                        else []
+                    ),
+                    *([("solution", solution_tags)] if DETECT_SOLUTION else []),
+                ],
+            )
+
+            # Clients opting in receive appended text instead of the full content
+            content_delta = (
+                ContentDeltaTracker(
+                    serialize_content_blocks, CHAT_COMPLETION_SNAPSHOT_INTERVAL
+                )
+                if metadata.get("stream_delta")
+                else None
+            )
+
             try:
                 for event in events:
                     await event_emitter(
@@ -1571,13 +1445,8 @@ async def process_chat_response(
                         },
                     )
 
-                async def stream_body_handler(response):
-                    nonlocal content
-                    nonlocal content_blocks
-
-                    response_tool_calls = []
-
-                    async for line in response.body_iterator:
+                async def get_stream_data(body_iterator):
+                    async for line in body_iterator:
                         line = line.decode("utf-8") if isinstance(line, bytes) else line
                         data = line
 
@@ -1593,16 +1462,21 @@ async def process_chat_response(
                         data = data[len("data:") :].strip()
 
                         try:
-                            data = json.loads(data)
-
-                            data, _ = await process_filter_functions(
-                                request=request,
-                                filter_functions=filter_functions,
-                                filter_type="stream",
-                                form_data=data,
-                                extra_params=extra_params,
-                            )
+                            yield json.loads(data)
+                        except Exception as e:
+                            if data != "[DONE]":
+                                log.debug("Error: ", e)
 
+                async def stream_body_handler(response):
+                    nonlocal content_blocks
+
+                    response_tool_calls = []
+
+                    stream_data = stream_filters.apply(
+                        get_stream_data(response.body_iterator)
+                    )
+                    async for data in stream_data:
+                        try:
                             if data:
                                 if "event" in data:
                                     await event_emitter(data.get("event", {}))
@@ -1719,11 +1593,16 @@ async def process_chat_response(
 
                                         reasoning_block["content"] += reasoning_content
 
-                                        data = {
-                                            "content": serialize_content_blocks(
+                                        if content_delta:
+                                            data = content_delta.get_data(
                                                 content_blocks
                                             )
-                                        }
+                                        else:
+                                            data = {
+                                                "content": serialize_content_blocks(
+                                                    content_blocks
+                                                )
+                                            }
 
                                     if value:
                                         if (
@@ -1749,55 +1628,26 @@ async def process_chat_response(
                                                 }
                                             )
 
-                                        content = f"{content}{value}"
-                                        if not content_blocks:
-                                            content_blocks.append(
-                                                {
-                                                    "type": "text",
-                                                    "content": "",
-                                                }
-                                            )
+                                        if tag_parser.feed(value):
+                                            break
 
-                                        content_blocks[-1]["content"] = (
-                                            content_blocks[-1]["content"] + value
-                                        )
-
-                                        if DETECT_REASONING:
-                                            content, content_blocks, _ = (
-                                                tag_content_handler(
-                                                    "reasoning",
-                                                    reasoning_tags,
-                                                    content,
-                                                    content_blocks,
-                                                )
-                                            )
-
-                                        if DETECT_CODE_INTERPRETER:
-                                            content, content_blocks, end = (
-                                                tag_content_handler(
-                                                    "code_interpreter",
-                                                    code_interpreter_tags,
-                                                    content,
-                                                    content_blocks,
-                                                )
+                                        if content_delta:
+                                            data = content_delta.get_data(
+                                                content_blocks
                                             )
 
-                                            if end:
-                                                break
-
-                                        if DETECT_SOLUTION:
-                                            content, content_blocks, _ = (
-                                                tag_content_handler(
-                                                    "solution",
-                                                    solution_tags,
-                                                    content,
-                                                    content_blocks,
+                                            # Saved on snapshots, the final content is saved on completion
+                                            if ENABLE_REALTIME_CHAT_SAVE and (
+                                                data and "delta" not in data
+                                            ):
+                                                await MESSAGE_WRITE_BUFFER.update(
+                                                    metadata["chat_id"],
+                                                    metadata["message_id"],
+                                                    {"content": content_delta.content},
                                                 )
-                                            )
-
-                                        if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                                        elif ENABLE_REALTIME_CHAT_SAVE:
+                                            # Save message in the database, coalesced by the write buffer
+                                            await MESSAGE_WRITE_BUFFER.update(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
                                                 {
@@ -1813,19 +1663,22 @@ async def process_chat_response(
                                                 ),
                                             }
 
-                                await event_emitter(
-                                    {
-                                        "type": "chat:completion",
-                                        "data": data,
-                                    }
-                                )
+                                if data:
+                                    await event_emitter(
+                                        {
+                                            "type": "chat:completion",
+                                            "data": data,
+                                        },
+                                        coalesce=True,
+                                    )
                         except Exception as e:
-                            done = "data: [DONE]" in line
-                            if done:
-                                pass
-                            else:
-                                log.debug("Error: ", e)
-                                continue
+                            log.debug("Error: ", e)
+                            continue
+
+                    # Stops reading the upstream when the loop ended early
+                    await stream_data.aclose()
+
+                    tag_parser.flush()
 
                     if content_blocks:
                         # Clean up the last text block
@@ -2202,18 +2055,26 @@ async def process_chat_response(
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MESSAGE_WRITE_BUFFER.update(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
                             "content": serialize_content_blocks(content_blocks),
                         },
                     )
+                await MESSAGE_WRITE_BUFFER.flush(
+                    metadata["chat_id"], metadata["message_id"]
+                )
 
                 # Send a webhook notification if the user is not active
-                if get_active_status_by_user_id(user.id) is None:
+                if await get_active_status_by_user_id(user.id) is None:
                     webhook_url = Users.get_user_webhook_url_by_id(user.id)
                     if webhook_url:
+                        content = "\n".join(
+                            block["content"].strip()
+                            for block in content_blocks
+                            if block["type"] == "text"
+                        ).strip()
                         post_webhook(
                             request.app.state.WEBUI_NAME,
                             webhook_url,
@@ -2240,13 +2101,16 @@ async def process_chat_response(
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await MESSAGE_WRITE_BUFFER.update(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
                             "content": serialize_content_blocks(content_blocks),
                         },
                     )
+                await MESSAGE_WRITE_BUFFER.flush(
+                    metadata["chat_id"], metadata["message_id"]
+                )
 
             if response.background is not None:
                 await response.background()
@@ -2263,29 +2127,11 @@ async def process_chat_response(
             def wrap_item(item):
                 return f"data: {item}\n\n"
 
-            for event in events:
-                event, _ = await process_filter_functions(
-                    request=request,
-                    filter_functions=filter_functions,
-                    filter_type="stream",
-                    form_data=event,
-                    extra_params=extra_params,
-                )
-
-                if event:
-                    yield wrap_item(json.dumps(event))
-
-            async for data in original_generator:
-                data, _ = await process_filter_functions(
-                    request=request,
-                    filter_functions=filter_functions,
-                    filter_type="stream",
-                    form_data=data,
-                    extra_params=extra_params,
-                )
+            for event in await stream_filters.process_batch(list(events)):
+                yield wrap_item(json.dumps(event))
 
-                if data:
-                    yield data
+            async for data in stream_filters.apply(original_generator):
+                yield data
 
         return StreamingResponse(
             stream_wrapper(response.body_iterator, events),
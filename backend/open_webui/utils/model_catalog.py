@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS, MODEL_LIST_CACHE_TTL
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class CatalogEntry:
+    def __init__(self, value: Any, generation: int):
+        self.value = value
+        self.generation = generation
+        self.updated_at = time.time()
+
+
+class ModelCatalog:
+    """
+    Stale-while-revalidate cache for the model lists, one entry per key:
+        openai, ollama: lists fetched from the upstream connections
+        models:         the merged catalog, indexed by model id
+
+    Entries older than `ttl` are still served while a single background task
+    loads them again. Invalidated entries are loaded again before being served,
+    so writes to models and functions are visible to the next request.
+    The merged entry goes stale whenever an upstream list is loaded again.
+    """
+
+    def __init__(self, ttl: int, merged_key: str = "models"):
+        self.ttl = ttl
+        self.merged_key = merged_key
+
+        self._entries: dict[str, CatalogEntry] = {}
+        self._generations: dict[str, int] = {}
+        self._tasks: dict[str, tuple[asyncio.Task, int]] = {}
+        self.stats = {"hits": 0, "stale": 0, "loads": 0, "errors": 0}
+
+    def _is_valid(self, key: str, entry: Optional[CatalogEntry]) -> bool:
+        return entry is not None and entry.generation == self._generations.get(key, 0)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]):
+        generation = self._generations.get(key, 0)
+        self.stats["loads"] += 1
+        try:
+            value = await loader()
+        except Exception as e:
+            self.stats["errors"] += 1
+            raise e
+
+        # Loads started before an invalidation are stored but not served as valid
+        self._entries[key] = CatalogEntry(value, generation)
+
+        if key != self.merged_key and self.merged_key in self._entries:
+            self._entries[self.merged_key].updated_at = 0.0
+        return value
+
+    def _start_load(
+        self, key: str, loader: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        generation = self._generations.get(key, 0)
+        task, task_generation = self._tasks.get(key, (None, None))
+        if task is None or task.done() or task_generation != generation:
+            task = asyncio.create_task(self._load(key, loader))
+            task.add_done_callback(self._log_task_error)
+            self._tasks[key] = (task, generation)
+        return task
+
+    @staticmethod
+    def _log_task_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            log.warning(f"Error loading model list: {task.exception()}")
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+
+        if not self._is_valid(key, entry):
+            # Concurrent callers wait on the same load
+            return await asyncio.shield(self._start_load(key, loader))
+
+        if time.time() - entry.updated_at > self.ttl:
+            self.stats["stale"] += 1
+            self._start_load(key, loader)
+        else:
+            self.stats["hits"] += 1
+
+        return entry.value
+
+    def invalidate(self, *keys: str):
+        for key in keys or list(self._generations.keys() | self._entries.keys()):
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def get_stats(self) -> dict:
+        now = time.time()
+        return {
+            "ttl": self.ttl,
+            **self.stats,
+            "entries": {
+                key: {
+                    "age": now - entry.updated_at,
+                    "valid": self._is_valid(key, entry),
+                }
+                for key, entry in self._entries.items()
+            },
+        }
+
+
+MODEL_CATALOG = ModelCatalog(MODEL_LIST_CACHE_TTL)
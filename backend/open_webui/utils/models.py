@@ -2,7 +2,6 @@ import time
 import logging
 import sys
 
-from aiocache import cached
 from fastapi import Request
 
 from open_webui.routers import openai, ollama
@@ -13,8 +12,9 @@ from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 
 
-from open_webui.utils.plugin import load_function_module_by_id
+from open_webui.utils.plugin import get_function_module
 from open_webui.utils.access_control import has_access
+from open_webui.utils.model_catalog import MODEL_CATALOG
 
 
 from open_webui.config import (
@@ -61,11 +61,20 @@ async def get_all_base_models(request: Request, user: UserModel = None):
 
 
 async def get_all_models(request, user: UserModel = None):
-    models = await get_all_base_models(request, user=user)
+    models = await MODEL_CATALOG.get(
+        "models", lambda: build_all_models(request, user=user)
+    )
+    return list(models.values())
+
+
+async def build_all_models(request, user: UserModel = None) -> dict[str, dict]:
+    # Upstream lists are shared with other entries, copy before applying overrides
+    models = [{**model} for model in await get_all_base_models(request, user=user)]
 
     # If there are no models, return an empty list
     if len(models) == 0:
-        return []
+        request.app.state.MODELS = {}
+        return {}
 
     # Add arena models
     if request.app.state.config.ENABLE_EVALUATION_ARENA_MODELS:
@@ -102,74 +111,84 @@ async def get_all_models(request, user: UserModel = None):
             ]
         models = models + arena_models
 
+    models_by_id = {}
+    # Ollama may return model ids in different formats (e.g., 'llama3' vs. 'llama3:7b')
+    models_by_name = {}
+
+    def index_model(model):
+        models_by_id.setdefault(model["id"], model)
+        models_by_name.setdefault(model["id"].split(":")[0], []).append(model)
+
+    for model in models:
+        index_model(model)
+
     global_action_ids = [
         function.id for function in Functions.get_global_action_functions()
     ]
-    enabled_action_ids = [
-        function.id
+    action_functions = {
+        function.id: function
         for function in Functions.get_functions_by_type("action", active_only=True)
-    ]
+    }
 
+    removed_models = set()
     custom_models = Models.get_all_models()
     for custom_model in custom_models:
         if custom_model.base_model_id is None:
-            for model in models:
-                if custom_model.id == model["id"] or (
-                    model.get("owned_by") == "ollama"
-                    and custom_model.id
-                    == model["id"].split(":")[
-                        0
-                    ]  # Ollama may return model ids in different formats (e.g., 'llama3' vs. 'llama3:7b')
-                ):
-                    if custom_model.is_active:
-                        model["name"] = custom_model.name
-                        model["info"] = custom_model.model_dump()
-
-                        action_ids = []
-                        if "info" in model and "meta" in model["info"]:
-                            action_ids.extend(
-                                model["info"]["meta"].get("actionIds", [])
-                            )
-
-                        model["action_ids"] = action_ids
-                    else:
-                        models.remove(model)
-
-        elif custom_model.is_active and (
-            custom_model.id not in [model["id"] for model in models]
-        ):
+            matching_models = [
+                model
+                for model in models_by_name.get(custom_model.id, [])
+                if model.get("owned_by") == "ollama"
+            ]
+            if custom_model.id in models_by_id:
+                matching_models.append(models_by_id[custom_model.id])
+
+            for model in matching_models:
+                if custom_model.is_active:
+                    model["name"] = custom_model.name
+                    model["info"] = custom_model.model_dump()
+
+                    action_ids = []
+                    if "info" in model and "meta" in model["info"]:
+                        action_ids.extend(model["info"]["meta"].get("actionIds", []))
+
+                    model["action_ids"] = action_ids
+                else:
+                    removed_models.add(id(model))
+
+        elif custom_model.is_active and (custom_model.id not in models_by_id):
             owned_by = "openai"
             pipe = None
             action_ids = []
 
-            for model in models:
-                if (
-                    custom_model.base_model_id == model["id"]
-                    or custom_model.base_model_id == model["id"].split(":")[0]
-                ):
-                    owned_by = model.get("owned_by", "unknown owner")
-                    if "pipe" in model:
-                        pipe = model["pipe"]
-                    break
+            base_model = models_by_id.get(custom_model.base_model_id)
+            if base_model is None and models_by_name.get(custom_model.base_model_id):
+                base_model = models_by_name[custom_model.base_model_id][0]
+
+            if base_model is not None:
+                owned_by = base_model.get("owned_by", "unknown owner")
+                if "pipe" in base_model:
+                    pipe = base_model["pipe"]
 
             if custom_model.meta:
                 meta = custom_model.meta.model_dump()
                 if "actionIds" in meta:
                     action_ids.extend(meta["actionIds"])
 
-            models.append(
-                {
-                    "id": f"{custom_model.id}",
-                    "name": custom_model.name,
-                    "object": "model",
-                    "created": custom_model.created_at,
-                    "owned_by": owned_by,
-                    "info": custom_model.model_dump(),
-                    "preset": True,
-                    **({"pipe": pipe} if pipe is not None else {}),
-                    "action_ids": action_ids,
-                }
-            )
+            model = {
+                "id": f"{custom_model.id}",
+                "name": custom_model.name,
+                "object": "model",
+                "created": custom_model.created_at,
+                "owned_by": owned_by,
+                "info": custom_model.model_dump(),
+                "preset": True,
+                **({"pipe": pipe} if pipe is not None else {}),
+                "action_ids": action_ids,
+            }
+            models.append(model)
+            index_model(model)
+
+    models = [model for model in models if id(model) not in removed_models]
 
     # Process action_ids to get the actions
     def get_action_items_from_module(function, module):
@@ -197,34 +216,27 @@ async def get_all_models(request, user: UserModel = None):
                 }
             ]
 
-    def get_function_module_by_id(function_id):
-        if function_id in request.app.state.FUNCTIONS:
-            function_module = request.app.state.FUNCTIONS[function_id]
-        else:
-            function_module, _, _ = load_function_module_by_id(function_id)
-            request.app.state.FUNCTIONS[function_id] = function_module
-
+    action_items = {}
     for model in models:
         action_ids = [
             action_id
             for action_id in list(set(model.pop("action_ids", []) + global_action_ids))
-            if action_id in enabled_action_ids
+            if action_id in action_functions
         ]
 
         model["actions"] = []
         for action_id in action_ids:
-            action_function = Functions.get_function_by_id(action_id)
-            if action_function is None:
-                raise Exception(f"Action not found: {action_id}")
-
-            function_module = get_function_module_by_id(action_id)
-            model["actions"].extend(
-                get_action_items_from_module(action_function, function_module)
-            )
-    log.debug(f"get_all_models() returned {len(models)} models")
+            if action_id not in action_items:
+                action_function = action_functions[action_id]
+                function_module = get_function_module(action_id)
+                action_items[action_id] = get_action_items_from_module(
+                    action_function, function_module
+                )
+            model["actions"].extend(action_items[action_id])
+    log.debug(f"build_all_models() returned {len(models)} models")
 
     request.app.state.MODELS = {model["id"]: model for model in models}
-    return models
+    return request.app.state.MODELS
 
 
 def check_model_access(user, model):
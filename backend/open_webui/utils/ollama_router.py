@@ -0,0 +1,209 @@
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    OLLAMA_ROUTING_POLICY,
+    OLLAMA_ROUTING_EJECTION_THRESHOLD,
+    OLLAMA_ROUTING_EJECTION_TIME,
+    OLLAMA_ROUTING_STICKY_TTL,
+)
+from open_webui.utils.session_pool import get_base_url
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
+
+
+ROUTING_POLICIES = ["random", "least_in_flight", "ewma", "affinity", "sticky"]
+
+# Weight of the latest sample in the latency moving average
+EWMA_ALPHA = 0.3
+# Bound on the number of chats remembered by the sticky policy
+STICKY_MAX_ENTRIES = 10000
+# Seconds before the models loaded on each node are fetched from /api/ps again
+LOADED_MODELS_TTL = 10
+
+
+class NodeState:
+    def __init__(self):
+        self.in_flight = 0
+        self.ewma_latency: Optional[float] = None
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.loaded_models: set[str] = set()
+        self.loaded_models_updated_at = 0.0
+
+
+class OllamaRouter:
+    """
+    Picks one of the Ollama nodes serving a model, based on the state observed from
+    the requests sent to them.
+
+    Policies, each one falling back to the next on ties:
+        sticky:          the node that served the chat last, for KV-cache reuse
+        affinity:        nodes that already have the model loaded (from /api/ps)
+        ewma:            lowest moving average of the time to response headers
+        least_in_flight: fewest requests in progress
+        random:          uniform choice, the previous behaviour
+
+    Nodes failing `ejection_threshold` times in a row are skipped for
+    `ejection_time` seconds, unless every candidate is ejected.
+    """
+
+    def __init__(
+        self,
+        policy: str,
+        ejection_threshold: int,
+        ejection_time: float,
+        sticky_ttl: float,
+    ):
+        if policy not in ROUTING_POLICIES:
+            log.warning(f"Unknown Ollama routing policy {policy}, using random")
+            policy = "random"
+
+        self.policy = policy
+        self.ejection_threshold = ejection_threshold
+        self.ejection_time = ejection_time
+        self.sticky_ttl = sticky_ttl
+
+        self._nodes: dict[str, NodeState] = {}
+        self._sticky: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def _get_node(self, url: str) -> NodeState:
+        base_url = get_base_url(url)
+        if base_url not in self._nodes:
+            self._nodes[base_url] = NodeState()
+        return self._nodes[base_url]
+
+    def is_ejected(self, url: str) -> bool:
+        return self._get_node(url).ejected_until > time.time()
+
+    def select(
+        self, model: str, urls: dict[int, str], chat_id: Optional[str] = None
+    ) -> int:
+        """Returns the index of the node to send a request for `model` to."""
+        candidates = [idx for idx, url in urls.items() if not self.is_ejected(url)]
+        if not candidates:
+            # Fail open rather than rejecting the request
+            candidates = list(urls.keys())
+
+        if self.policy == "random" or len(candidates) == 1:
+            return random.choice(candidates)
+
+        if self.policy == "sticky" and chat_id:
+            sticky = self._sticky.get(chat_id)
+            if sticky and sticky[1] > time.time():
+                for idx in candidates:
+                    if get_base_url(urls[idx]) == sticky[0]:
+                        return idx
+
+        if self.policy in ["sticky", "affinity"]:
+            loaded = [
+                idx
+                for idx in candidates
+                if model in self._get_node(urls[idx]).loaded_models
+            ]
+            if loaded:
+                candidates = loaded
+
+        def key(idx):
+            node = self._get_node(urls[idx])
+            latency = node.ewma_latency if node.ewma_latency is not None else 0.0
+            if self.policy == "ewma":
+                return (latency, node.in_flight)
+            return (node.in_flight, latency)
+
+        best = min(key(idx) for idx in candidates)
+        return random.choice([idx for idx in candidates if key(idx) == best])
+
+    def start(self, url: str) -> float:
+        node = self._get_node(url)
+        node.in_flight += 1
+        node.requests += 1
+        return time.monotonic()
+
+    def record_latency(self, url: str, started_at: float):
+        node = self._get_node(url)
+        latency = time.monotonic() - started_at
+        node.ewma_latency = (
+            latency
+            if node.ewma_latency is None
+            else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * node.ewma_latency
+        )
+
+    def finish(
+        self,
+        url: str,
+        success: bool,
+        model: Optional[str] = None,
+        chat_id: Optional[str] = None,
+    ):
+        node = self._get_node(url)
+        node.in_flight = max(node.in_flight - 1, 0)
+
+        if success:
+            node.failures = 0
+            if model:
+                # Ollama keeps the model loaded after serving it
+                node.loaded_models.add(model)
+            if chat_id and self.policy == "sticky":
+                self._sticky[chat_id] = (
+                    get_base_url(url),
+                    time.time() + self.sticky_ttl,
+                )
+                self._sticky.move_to_end(chat_id)
+                while len(self._sticky) > STICKY_MAX_ENTRIES:
+                    self._sticky.popitem(last=False)
+        else:
+            node.errors += 1
+            node.failures += 1
+            if node.failures >= self.ejection_threshold:
+                log.warning(
+                    f"Ejecting Ollama node {get_base_url(url)} for {self.ejection_time}s after {node.failures} failures"
+                )
+                node.ejected_until = time.time() + self.ejection_time
+                node.failures = 0
+
+    def set_loaded_models(self, url: str, models: list[str]):
+        node = self._get_node(url)
+        node.loaded_models = set(models)
+        node.loaded_models_updated_at = time.time()
+
+    def needs_loaded_models(self, urls: list[str]) -> bool:
+        if self.policy not in ["affinity", "sticky"]:
+            return False
+        return any(
+            time.time() - self._get_node(url).loaded_models_updated_at
+            > LOADED_MODELS_TTL
+            for url in urls
+        )
+
+    def get_stats(self) -> dict:
+        now = time.time()
+        return {
+            "policy": self.policy,
+            "nodes": {
+                base_url: {
+                    "in_flight": node.in_flight,
+                    "ewma_latency": node.ewma_latency,
+                    "requests": node.requests,
+                    "errors": node.errors,
+                    "ejected": node.ejected_until > now,
+                    "loaded_models": sorted(node.loaded_models),
+                }
+                for base_url, node in self._nodes.items()
+            },
+        }
+
+
+OLLAMA_ROUTER = OllamaRouter(
+    OLLAMA_ROUTING_POLICY,
+    OLLAMA_ROUTING_EJECTION_THRESHOLD,
+    OLLAMA_ROUTING_EJECTION_TIME,
+    OLLAMA_ROUTING_STICKY_TTL,
+)
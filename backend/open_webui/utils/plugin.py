@@ -6,10 +6,24 @@ from importlib import util
 import types
 import tempfile
 import logging
-
-from open_webui.env import SRC_LOG_LEVELS, PIP_OPTIONS, PIP_PACKAGE_INDEX_OPTIONS
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    PIP_OPTIONS,
+    PIP_PACKAGE_INDEX_OPTIONS,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
 from open_webui.models.functions import Functions
 from open_webui.models.tools import Tools
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -68,6 +82,223 @@ def replace_imports(content):
     return content
 
 
+# Bound on the code objects kept for the sources loaded so far
+CODE_CACHE_MAX_ENTRIES = 256
+
+
+def get_content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class PluginRegistry:
+    """
+    Functions and tools loaded on this node, with their valves.
+
+    Sources are compiled once per content hash, and the instance of a function or
+    tool is reused as long as its content is the same. Instances and valves are
+    stored with the version of their function or tool, bumped by `invalidate` on
+    every write, locally and on the other nodes through Redis pub/sub, so requests
+    and stream filters use them without reading the database.
+    """
+
+    _channel = "open-webui:plugins:invalidate"
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = [],
+    ):
+        self.redis_url = redis_url
+        self.redis_sentinels = redis_sentinels
+
+        # Instances by kind ("function" or "tool") and id, as app.state.FUNCTIONS
+        # and app.state.TOOLS
+        self.modules: dict[str, dict[str, Any]] = {"function": {}, "tool": {}}
+
+        self._code: OrderedDict[str, types.CodeType] = OrderedDict()
+        # Content hash and loaded result of each function and tool
+        self._instances: dict[tuple[str, str], tuple[str, tuple]] = {}
+        self._versions: dict[tuple[str, str], int] = {}
+        # Version the instances in `modules` were loaded at
+        self._loaded: dict[tuple[str, str], int] = {}
+        self._valves: dict[tuple[str, str], tuple[dict, int]] = {}
+
+        self._redis = None
+        self._listener: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "compiled": 0, "invalidations": 0}
+
+    def _start(self):
+        # The subscription starts on first use rather than on import
+        if self._listener is not None or not self.redis_url:
+            return
+
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._redis = get_redis_connection(
+                self.redis_url, self.redis_sentinels, decode_responses=True
+            )
+            self._listener = threading.Thread(target=self._listen, daemon=True)
+            self._listener.start()
+
+    def compile(self, content: str, filename: str) -> types.CodeType:
+        content_hash = get_content_hash(content)
+        code = self._code.get(content_hash)
+        if code is None:
+            self.stats["compiled"] += 1
+            code = compile(content, filename, "exec")
+            self._code[content_hash] = code
+            while len(self._code) > CODE_CACHE_MAX_ENTRIES:
+                self._code.popitem(last=False)
+        else:
+            self._code.move_to_end(content_hash)
+        return code
+
+    def get_instance(self, kind: str, id: str, content: str) -> Optional[tuple]:
+        """The result of loading `content` for the function or tool, if cached."""
+        entry = self._instances.get((kind, id))
+        if entry and entry[0] == get_content_hash(content):
+            return entry[1]
+        return None
+
+    def set_instance(self, kind: str, id: str, content: str, result: tuple):
+        self._instances[(kind, id)] = (get_content_hash(content), result)
+
+    def get_module(self, kind: str, id: str, loader: Callable[[str], Any]) -> Any:
+        self._start()
+
+        key = (kind, id)
+        version = self._versions.get(key, 0)
+        module = self.modules[kind].get(id)
+        if module is not None and self._loaded.get(key) == version:
+            self.stats["hits"] += 1
+            return module
+
+        self.stats["misses"] += 1
+        module = loader(id)
+        self.modules[kind][id] = module
+        self._loaded[key] = version
+        return module
+
+    def set_module(self, kind: str, id: str, module: Any):
+        """Stores the instance loaded from new content, invalidating the previous one."""
+        self.invalidate(kind, id)
+        self.modules[kind][id] = module
+        self._loaded[(kind, id)] = self._versions.get((kind, id), 0)
+
+    def remove_module(self, kind: str, id: str):
+        self.invalidate(kind, id)
+        self.modules[kind].pop(id, None)
+        self._instances.pop((kind, id), None)
+
+    def get_valves(
+        self, kind: str, id: str, loader: Callable[[str], Optional[dict]]
+    ) -> Optional[dict]:
+        self._start()
+
+        key = (kind, id)
+        version = self._versions.get(key, 0)
+        entry = self._valves.get(key)
+        if entry and entry[1] == version:
+            self.stats["hits"] += 1
+            return entry[0]
+
+        self.stats["misses"] += 1
+        valves = loader(id)
+        if valves is not None:
+            self._valves[key] = (valves, version)
+        return valves
+
+    def invalidate(self, kind: str, id: str):
+        """Called on writes to the content or valves of a function or tool."""
+        self._invalidate(kind, id)
+        self._publish({"kind": kind, "id": id})
+
+    def _invalidate(self, kind: str, id: str):
+        self.stats["invalidations"] += 1
+        key = (kind, id)
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._valves.pop(key, None)
+
+    def clear(self):
+        self._loaded = {}
+        self._valves = {}
+
+    def _publish(self, data: dict):
+        self._start()
+        if self._redis is None:
+            return
+
+        try:
+            self._redis.publish(self._channel, json.dumps(data))
+        except Exception as e:
+            log.error(f"Error publishing plugin invalidation: {e}")
+
+    def _handle_message(self, message: dict):
+        try:
+            data = json.loads(message["data"])
+            self._invalidate(data["kind"], data["id"])
+        except (json.JSONDecodeError, TypeError, KeyError):
+            log.error(f"Invalid plugin invalidation message: {message['data']}")
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+
+                # Invalidations published while not subscribed were missed
+                self.clear()
+
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._handle_message(message)
+            except Exception as e:
+                log.warning(f"Plugin registry subscription lost, retrying: {e}")
+                time.sleep(1)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "functions": len(self.modules["function"]),
+            "tools": len(self.modules["tool"]),
+            "code": len(self._code),
+        }
+
+
+PLUGINS = PluginRegistry(
+    redis_url=REDIS_URL,
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
+
+
+def get_function_module(function_id: str) -> Any:
+    """
+    Instance of the function, loaded again only after a write to the function.
+    """
+    return PLUGINS.get_module(
+        "function", function_id, lambda id: load_function_module_by_id(id)[0]
+    )
+
+
+def get_tool_module(tool_id: str) -> Any:
+    """
+    Instance of the tool, loaded again only after a write to the tool.
+    """
+    return PLUGINS.get_module("tool", tool_id, lambda id: load_tool_module_by_id(id)[0])
+
+
+def get_function_valves(function_id: str) -> Optional[dict]:
+    return PLUGINS.get_valves(
+        "function", function_id, Functions.get_function_valves_by_id
+    )
+
+
+def get_tool_valves(tool_id: str) -> Optional[dict]:
+    return PLUGINS.get_valves("tool", tool_id, Tools.get_tool_valves_by_id)
+
+
 def load_tool_module_by_id(tool_id, content=None):
 
     if content is None:
@@ -75,44 +306,45 @@ def load_tool_module_by_id(tool_id, content=None):
         if not tool:
             raise Exception(f"Toolkit not found: {tool_id}")
 
-        content = tool.content
-
-        content = replace_imports(content)
-        Tools.update_tool_by_id(tool_id, {"content": content})
+        content = replace_imports(tool.content)
+        if content != tool.content:
+            Tools.update_tool_by_id(tool_id, {"content": content})
     else:
         frontmatter = extract_frontmatter(content)
         # Install required packages found within the frontmatter
         install_frontmatter_requirements(frontmatter.get("requirements", ""))
 
+    # The instance loaded from the same content is reused
+    cached = PLUGINS.get_instance("tool", tool_id, content)
+    if cached is not None:
+        return cached
+
     module_name = f"tool_{tool_id}"
     module = types.ModuleType(module_name)
     sys.modules[module_name] = module
 
-    # Create a temporary file and use it to define `__file__` so
-    # that it works as expected from the module's perspective.
-    temp_file = tempfile.NamedTemporaryFile(delete=False)
-    temp_file.close()
+    # `__file__` is defined as it works from the module's perspective, the
+    # source itself is not written to disk
+    module.__dict__["__file__"] = os.path.join(
+        tempfile.gettempdir(), f"{module_name}.py"
+    )
     try:
-        with open(temp_file.name, "w", encoding="utf-8") as f:
-            f.write(content)
-        module.__dict__["__file__"] = temp_file.name
-
         # Executing the modified content in the created module's namespace
-        exec(content, module.__dict__)
+        exec(PLUGINS.compile(content, module.__file__), module.__dict__)
         frontmatter = extract_frontmatter(content)
         log.info(f"Loaded module: {module.__name__}")
 
         # Create and return the object if the class 'Tools' is found in the module
         if hasattr(module, "Tools"):
-            return module.Tools(), frontmatter
+            result = (module.Tools(), frontmatter)
+            PLUGINS.set_instance("tool", tool_id, content, result)
+            return result
         else:
             raise Exception("No Tools class found in the module")
     except Exception as e:
         log.error(f"Error loading module: {tool_id}: {e}")
         del sys.modules[module_name]  # Clean up
         raise e
-    finally:
-        os.unlink(temp_file.name)
 
 
 def load_function_module_by_id(function_id, content=None):
@@ -120,49 +352,52 @@ def load_function_module_by_id(function_id, content=None):
         function = Functions.get_function_by_id(function_id)
         if not function:
             raise Exception(f"Function not found: {function_id}")
-        content = function.content
 
-        content = replace_imports(content)
-        Functions.update_function_by_id(function_id, {"content": content})
+        content = replace_imports(function.content)
+        if content != function.content:
+            Functions.update_function_by_id(function_id, {"content": content})
     else:
         frontmatter = extract_frontmatter(content)
         install_frontmatter_requirements(frontmatter.get("requirements", ""))
 
+    # The instance loaded from the same content is reused
+    cached = PLUGINS.get_instance("function", function_id, content)
+    if cached is not None:
+        return cached
+
     module_name = f"function_{function_id}"
     module = types.ModuleType(module_name)
     sys.modules[module_name] = module
 
-    # Create a temporary file and use it to define `__file__` so
-    # that it works as expected from the module's perspective.
-    temp_file = tempfile.NamedTemporaryFile(delete=False)
-    temp_file.close()
+    # `__file__` is defined as it works from the module's perspective, the
+    # source itself is not written to disk
+    module.__dict__["__file__"] = os.path.join(
+        tempfile.gettempdir(), f"{module_name}.py"
+    )
     try:
-        with open(temp_file.name, "w", encoding="utf-8") as f:
-            f.write(content)
-        module.__dict__["__file__"] = temp_file.name
-
         # Execute the modified content in the created module's namespace
-        exec(content, module.__dict__)
+        exec(PLUGINS.compile(content, module.__file__), module.__dict__)
         frontmatter = extract_frontmatter(content)
         log.info(f"Loaded module: {module.__name__}")
 
         # Create appropriate object based on available class type in the module
         if hasattr(module, "Pipe"):
-            return module.Pipe(), "pipe", frontmatter
+            result = (module.Pipe(), "pipe", frontmatter)
         elif hasattr(module, "Filter"):
-            return module.Filter(), "filter", frontmatter
+            result = (module.Filter(), "filter", frontmatter)
         elif hasattr(module, "Action"):
-            return module.Action(), "action", frontmatter
+            result = (module.Action(), "action", frontmatter)
         else:
             raise Exception("No Function class found in the module")
+
+        PLUGINS.set_instance("function", function_id, content, result)
+        return result
     except Exception as e:
         log.error(f"Error loading module: {function_id}: {e}")
         del sys.modules[module_name]  # Cleanup by removing the module in case of error
 
         Functions.update_function_by_id(function_id, {"is_active": False})
         raise e
-    finally:
-        os.unlink(temp_file.name)
 
 
 def install_frontmatter_requirements(requirements: str):
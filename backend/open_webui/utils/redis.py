@@ -18,10 +18,15 @@ def parse_redis_service_url(redis_url):
     }
 
 
-def get_redis_connection(redis_url, redis_sentinels, decode_responses=True):
+def get_redis_connection(
+    redis_url, redis_sentinels, decode_responses=True, async_mode=False
+):
     if redis_sentinels:
         redis_config = parse_redis_service_url(redis_url)
-        sentinel = redis.sentinel.Sentinel(
+        sentinel_class = (
+            aioredis.sentinel.Sentinel if async_mode else redis.sentinel.Sentinel
+        )
+        sentinel = sentinel_class(
             redis_sentinels,
             port=redis_config["port"],
             db=redis_config["db"],
@@ -34,6 +39,8 @@ def get_redis_connection(redis_url, redis_sentinels, decode_responses=True):
         return sentinel.master_for(redis_config["service"])
     else:
         # Standard Redis connection
+        if async_mode:
+            return aioredis.from_url(redis_url, decode_responses=decode_responses)
         return redis.Redis.from_url(redis_url, decode_responses=decode_responses)
 
 
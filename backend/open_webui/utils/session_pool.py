@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from urllib.parse import urlparse
+
+import aiohttp
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def get_base_url(url: str) -> str:
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+
+class ClientSessionPool:
+    """
+    One long-lived aiohttp session per upstream base URL, so requests to the same
+    Ollama or OpenAI-compatible server reuse keep-alive connections.
+
+    Sessions are created lazily on the running loop and closed on app shutdown.
+    Timeouts are passed per request since a session is shared by all callers.
+    """
+
+    def __init__(self, limit: int, ttl_dns_cache: int, keepalive_timeout: float):
+        self.limit = limit
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+
+        self._sessions: dict[str, aiohttp.ClientSession] = {}
+        self._requests: dict[str, int] = {}
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        base_url = get_base_url(url)
+
+        session = self._sessions.get(base_url)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.limit,
+                    ttl_dns_cache=self.ttl_dns_cache,
+                    keepalive_timeout=self.keepalive_timeout,
+                ),
+                trust_env=True,
+                # Cookies set by an upstream for one user must not be sent on the
+                # requests of others
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+            self._sessions[base_url] = session
+
+        self._requests[base_url] = self._requests.get(base_url, 0) + 1
+        return session
+
+    async def close(self):
+        sessions = list(self._sessions.values())
+        self._sessions = {}
+        await asyncio.gather(
+            *[session.close() for session in sessions], return_exceptions=True
+        )
+
+    def get_stats(self) -> dict:
+        stats = {}
+        for base_url, session in self._sessions.items():
+            connector = session.connector
+            if connector is None:
+                continue
+
+            # aiohttp does not expose pool state publicly
+            acquired = len(getattr(connector, "_acquired", ()))
+            idle = sum(
+                len(conns) for conns in getattr(connector, "_conns", {}).values()
+            )
+            waiting = sum(
+                len(waiters) for waiters in getattr(connector, "_waiters", {}).values()
+            )
+
+            stats[base_url] = {
+                "limit": self.limit,
+                "open": acquired + idle,
+                "active": acquired,
+                "idle": idle,
+                "waiting": waiting,
+                "requests": self._requests.get(base_url, 0),
+                "closed": session.closed,
+            }
+        return stats
+
+
+SESSION_POOL = ClientSessionPool(
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT,
+)
@@ -0,0 +1,187 @@
+import re
+import time
+
+
+def extract_attributes(tag_content: str) -> dict:
+    """Extract attributes from a tag if they exist."""
+    attributes = {}
+    if not tag_content:
+        return attributes
+    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+    for key, value in re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content):
+        attributes[key] = value
+    return attributes
+
+
+class StreamTagParser:
+    """
+    Splits streamed content into content blocks on tags such as <think>...</think>,
+    consuming each delta once. Text that may be the start of a tag is held back
+    until the next delta completes or rules it out.
+
+    Content blocks are updated in place, in the format used by process_chat_response:
+        {"type": "text", "content": ...}
+        {"type": <content_type>, "start_tag": ..., "end_tag": ..., "attributes": ...,
+         "content": ..., "started_at": ..., "ended_at": ..., "duration": ...}
+    """
+
+    def __init__(self, content_blocks: list[dict], tags: list[tuple[str, list]]):
+        """`tags` lists (content_type, [(start_tag, end_tag), ...]) to detect."""
+        self.content_blocks = content_blocks
+        self.start_tags = [
+            (content_type, start_tag, end_tag)
+            for content_type, type_tags in tags
+            for start_tag, end_tag in type_tags
+        ]
+        self.buffer = ""
+        # Whitespace right after a closing tag is dropped
+        self.strip_leading = False
+        self.code_interpreter_closed = False
+
+    def feed(self, value: str) -> bool:
+        """
+        Consumes a delta. Returns True when a code_interpreter block was closed,
+        the rest of the stream is then discarded by the caller.
+        """
+        self.buffer += value
+        self.code_interpreter_closed = False
+
+        while self.buffer:
+            block = self.content_blocks[-1] if self.content_blocks else None
+
+            if block is not None and block.get("end_tag") and "ended_at" not in block:
+                progressed = self._consume_block(block)
+            else:
+                if block is None or block["type"] != "text":
+                    self.content_blocks.append({"type": "text", "content": ""})
+                progressed = self._consume_text(self.content_blocks[-1])
+
+            if self.code_interpreter_closed:
+                self.buffer = ""
+                return True
+            if not progressed:
+                break
+
+        return False
+
+    def flush(self):
+        """Appends text held back as a possible tag, at the end of the stream."""
+        if self.buffer:
+            if not self.content_blocks:
+                self.content_blocks.append({"type": "text", "content": ""})
+            self.content_blocks[-1]["content"] += self.buffer
+            self.buffer = ""
+
+    def _append_text(self, block: dict, text: str):
+        if self.strip_leading:
+            text = text.lstrip()
+            if text:
+                self.strip_leading = False
+        block["content"] += text
+
+    def _match_start_tag(self, text: str):
+        """
+        Matches the start tags against `text`, which begins with "<".
+        Returns (content_type, start_tag, end_tag, attributes, length) for a
+        complete tag, None if a tag may still complete, or False if none can.
+        """
+        possible = False
+        for content_type, start_tag, end_tag in self.start_tags:
+            tag = f"<{start_tag}"
+            if len(text) <= len(tag):
+                if tag.startswith(text):
+                    possible = True
+                continue
+            if not text.startswith(tag):
+                continue
+
+            # Same as the pattern <tag(\s.*?)?>
+            next_char = text[len(tag)]
+            if next_char == ">":
+                return (content_type, start_tag, end_tag, {}, len(tag) + 1)
+            if next_char.isspace():
+                end = text.find(">", len(tag) + 1)
+                newline = text.find("\n", len(tag) + 1)
+                if end != -1 and (newline == -1 or newline > end):
+                    attributes = extract_attributes(text[len(tag) : end])
+                    return (content_type, start_tag, end_tag, attributes, end + 1)
+                if newline == -1:
+                    possible = True
+
+        return None if possible else False
+
+    def _consume_text(self, block: dict) -> bool:
+        """Returns False when the rest of the buffer is held back."""
+        start = self.buffer.find("<")
+        if start == -1:
+            self._append_text(block, self.buffer)
+            self.buffer = ""
+            return True
+
+        self._append_text(block, self.buffer[:start])
+        self.buffer = self.buffer[start:]
+
+        match = self._match_start_tag(self.buffer)
+        if match is None:
+            return False
+        if match is False:
+            self._append_text(block, "<")
+            self.buffer = self.buffer[1:]
+            return True
+
+        content_type, start_tag, end_tag, attributes, length = match
+        self.buffer = self.buffer[length:]
+        self.strip_leading = False
+
+        if not block["content"]:
+            self.content_blocks.pop()
+
+        self.content_blocks.append(
+            {
+                "type": content_type,
+                "start_tag": start_tag,
+                "end_tag": end_tag,
+                "attributes": attributes,
+                "content": "",
+                "started_at": time.time(),
+            }
+        )
+        return True
+
+    def _end_tag_prefix_length(self, block: dict) -> int:
+        # Length of the longest end of the buffer that starts the end tag
+        tag = f"<{block['end_tag']}>"
+        for length in range(min(len(tag) - 1, len(self.buffer)), 0, -1):
+            if self.buffer.endswith(tag[:length]):
+                return length
+        return 0
+
+    def _consume_block(self, block: dict) -> bool:
+        """Returns False when the rest of the buffer is held back."""
+        tag = f"<{block['end_tag']}>"
+        end = self.buffer.find(tag)
+        if end == -1:
+            held = self._end_tag_prefix_length(block)
+            block["content"] += self.buffer[: len(self.buffer) - held]
+            self.buffer = self.buffer[len(self.buffer) - held :]
+            return False
+
+        block["content"] = (block["content"] + self.buffer[:end]).strip()
+        self.buffer = self.buffer[end + len(tag) :]
+
+        # The code is run before the model continues
+        self.code_interpreter_closed = block["type"] == "code_interpreter"
+
+        if block["content"]:
+            block["ended_at"] = time.time()
+            block["duration"] = int(block["ended_at"] - block["started_at"])
+
+            if block["type"] == "code_interpreter":
+                return True
+        else:
+            # Remove the block if content is empty
+            self.content_blocks.pop()
+
+        self.content_blocks.append({"type": "text", "content": ""})
+        self.strip_leading = True
+        return True
@@ -0,0 +1,199 @@
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    USER_CACHE_TTL,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class UserCache:
+    """
+    Short-lived cache of the users resolved from auth tokens, the groups they are
+    members of and their effective permissions, so a request resolves each of them
+    once instead of querying the database on every check.
+
+    Entries expire after `ttl` seconds. Group and permission entries also carry the
+    group version, which is bumped on every group change. Writes to users and groups
+    invalidate the entries locally and, with Redis, on the other nodes through
+    pub/sub. Cached values are shared and must not be modified.
+    """
+
+    _channel = "open-webui:user-cache:invalidate"
+
+    def __init__(
+        self,
+        ttl: float,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = [],
+    ):
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self.redis_sentinels = redis_sentinels
+
+        self._users: dict[str, tuple[Any, float]] = {}
+        self._groups: dict[str, tuple[list, int, float]] = {}
+        self._permissions: dict[str, tuple[dict, dict, int, float]] = {}
+        self._group_version = 0
+
+        self._redis = None
+        self._listener: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _start(self):
+        # The subscription starts on first use rather than on import
+        if self._listener is not None or not self.redis_url:
+            return
+
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._redis = get_redis_connection(
+                self.redis_url, self.redis_sentinels, decode_responses=True
+            )
+            self._listener = threading.Thread(target=self._listen, daemon=True)
+            self._listener.start()
+
+    def get_user(self, user_id: str, loader: Callable[[str], Any]) -> Any:
+        if self.ttl <= 0:
+            return loader(user_id)
+        self._start()
+
+        entry = self._users.get(user_id)
+        if entry and entry[1] > time.time():
+            self.stats["hits"] += 1
+            return entry[0]
+
+        self.stats["misses"] += 1
+        user = loader(user_id)
+        if user is not None:
+            self._users[user_id] = (user, time.time() + self.ttl)
+        return user
+
+    def get_groups(self, user_id: str, loader: Callable[[str], list]) -> list:
+        if self.ttl <= 0:
+            return loader(user_id)
+        self._start()
+
+        entry = self._groups.get(user_id)
+        if entry and entry[1] == self._group_version and entry[2] > time.time():
+            self.stats["hits"] += 1
+            return entry[0]
+
+        self.stats["misses"] += 1
+        version = self._group_version
+        groups = loader(user_id)
+        self._groups[user_id] = (groups, version, time.time() + self.ttl)
+        return groups
+
+    def get_permissions(
+        self,
+        user_id: str,
+        default_permissions: dict,
+        loader: Callable[[], dict],
+    ) -> dict:
+        if self.ttl <= 0:
+            return loader()
+        self._start()
+
+        # Config updates replace the default permissions with a new dict
+        entry = self._permissions.get(user_id)
+        if (
+            entry
+            and entry[1] is default_permissions
+            and entry[2] == self._group_version
+            and entry[3] > time.time()
+        ):
+            self.stats["hits"] += 1
+            return entry[0]
+
+        self.stats["misses"] += 1
+        version = self._group_version
+        permissions = loader()
+        self._permissions[user_id] = (
+            permissions,
+            default_permissions,
+            version,
+            time.time() + self.ttl,
+        )
+        return permissions
+
+    def invalidate_user(self, user_id: str):
+        self._invalidate_user(user_id)
+        self._publish({"user_id": user_id})
+
+    def invalidate_groups(self):
+        self._invalidate_groups()
+        self._publish({"groups": True})
+
+    def _invalidate_user(self, user_id: str):
+        self.stats["invalidations"] += 1
+        self._users.pop(user_id, None)
+        self._groups.pop(user_id, None)
+        self._permissions.pop(user_id, None)
+
+    def _invalidate_groups(self):
+        self.stats["invalidations"] += 1
+        self._group_version += 1
+
+    def clear(self):
+        self._users = {}
+        self._groups = {}
+        self._permissions = {}
+        self._group_version += 1
+
+    def _publish(self, data: dict):
+        self._start()
+        if self._redis is None:
+            return
+
+        try:
+            self._redis.publish(self._channel, json.dumps(data))
+        except Exception as e:
+            log.error(f"Error publishing user cache invalidation: {e}")
+
+    def _handle_message(self, message: dict):
+        try:
+            data = json.loads(message["data"])
+        except (json.JSONDecodeError, TypeError):
+            log.error(f"Invalid user cache message: {message['data']}")
+            return
+
+        if data.get("user_id"):
+            self._invalidate_user(data["user_id"])
+        if data.get("groups"):
+            self._invalidate_groups()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+
+                # Invalidations published while not subscribed were missed
+                self.clear()
+
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._handle_message(message)
+            except Exception as e:
+                log.warning(f"User cache subscription lost, retrying: {e}")
+                time.sleep(1)
+
+
+USER_CACHE = UserCache(
+    USER_CACHE_TTL,
+    redis_url=REDIS_URL,
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
@@ -27,6 +27,50 @@ export const uploadFile = async (token: string, file: File) => {
 		throw error;
 	}
 
+	// Files are processed in the background, wait for the processing to finish
+	if (res?.job) {
+		let job = res.job;
+		while (!['completed', 'failed'].includes(job?.status ?? 'completed')) {
+			await new Promise((resolve) => setTimeout(resolve, 1000));
+			job = await getFileJobById(token, res.id);
+		}
+
+		const file = await getFileById(token, res.id).catch(() => res);
+		return {
+			...file,
+			job: job,
+			...(job?.status === 'failed' ? { error: job.error } : {})
+		};
+	}
+
+	return res;
+};
+
+export const getFileJobById = async (token: string, id: string) => {
+	let error = null;
+
+	const res = await fetch(`${WEBUI_API_BASE_URL}/files/${id}/job`, {
+		method: 'GET',
+		headers: {
+			Accept: 'application/json',
+			'Content-Type': 'application/json',
+			authorization: `Bearer ${token}`
+		}
+	})
+		.then(async (res) => {
+			if (!res.ok) throw await res.json();
+			return res.json();
+		})
+		.catch((err) => {
+			error = err.detail;
+			console.log(err);
+			return null;
+		});
+
+	if (error) {
+		throw error;
+	}
+
 	return res;
 };
 
@@ -776,6 +776,28 @@ export const removeAllDetails = (content) => {
 	return content;
 };
 
+// Renders a content block streamed in delta events, like serialize_content_blocks in the backend,
+// with the separators around it
+export const renderContentBlock = (block) => {
+	if (block.type === 'reasoning') {
+		const lines = block.content.split(/\r\n|\r|\n/);
+		if (lines.at(-1) === '') {
+			lines.pop();
+		}
+
+		const reasoningContent = lines
+			.map((line) => (line.startsWith('>') ? line : `> ${line}`))
+			.join('\n');
+
+		if (block.duration !== undefined) {
+			return `\n<details type="reasoning" done="true" duration="${block.duration}">\n<summary>Thought for ${block.duration} seconds</summary>\n${reasoningContent}\n</details>\n`;
+		}
+		return `\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n${reasoningContent}\n</details>\n`;
+	}
+
+	return `${block.content.trim()}\n`;
+};
+
 export const processDetails = (content) => {
 	content = removeDetails(content, ['reasoning', 'code_interpreter']);
 